@@ -69,6 +69,76 @@ CREATE INDEX "properties_idx" ON items USING GIN (properties);
 CREATE INDEX "collection_idx" ON items (collection_id);
 CREATE INDEX "geometry_idx" ON items USING GIST (geometry);
 
+/*
+Locator of the datetime, and thus of the weekly partition, of each item so
+point lookups don't have to probe the primary key of every partition.
+
+Dropping or detaching a partition of items doesn't fire any trigger, so no
+pg_partman retention is configured for items. Partitions dropped by hand must
+have their locators deleted in the same transaction, for instance:
+
+    BEGIN;
+    DELETE FROM items_locator
+    WHERE datetime >= '2020-01-06' AND datetime < '2020-01-13';
+    DROP TABLE items_p2020w02;
+    COMMIT;
+*/
+CREATE TABLE IF NOT EXISTS items_locator (
+    id text NOT NULL,
+    collection_id text NOT NULL,
+    datetime timestamptz NOT NULL,
+    PRIMARY KEY (id, collection_id)
+);
+
+CREATE INDEX IF NOT EXISTS "items_locator_id_idx" ON items_locator (id);
+
+/*
+Keeps items_locator in sync with items. Updates moving an item to another
+partition fire as a delete and an insert, so deletes only remove a locator
+still pointing at the deleted row.
+*/
+CREATE OR REPLACE FUNCTION items_locator_trigger_func()
+RETURNS TRIGGER AS $$
+DECLARE
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM items_locator
+        WHERE id = OLD.id AND collection_id = OLD.collection_id AND datetime = OLD.datetime;
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' AND (OLD.id, OLD.collection_id) IS DISTINCT FROM (NEW.id, NEW.collection_id) THEN
+        DELETE FROM items_locator
+        WHERE id = OLD.id AND collection_id = OLD.collection_id AND datetime = OLD.datetime;
+    END IF;
+    INSERT INTO items_locator (id, collection_id, datetime)
+    VALUES (NEW.id, NEW.collection_id, NEW.datetime)
+    ON CONFLICT (id, collection_id) DO UPDATE SET datetime = EXCLUDED.datetime;
+    RETURN NULL;
+END;
+$$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
+
+DROP TRIGGER IF EXISTS items_locator_trigger ON items;
+CREATE TRIGGER items_locator_trigger
+AFTER INSERT OR UPDATE OR DELETE ON items
+FOR EACH ROW EXECUTE PROCEDURE items_locator_trigger_func();
+
+CREATE OR REPLACE FUNCTION items_locator_truncate_func()
+RETURNS TRIGGER AS $$
+BEGIN
+    TRUNCATE items_locator;
+    RETURN NULL;
+END;
+$$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
+
+DROP TRIGGER IF EXISTS items_locator_truncate_trigger ON items;
+CREATE TRIGGER items_locator_truncate_trigger
+AFTER TRUNCATE ON items
+FOR EACH STATEMENT EXECUTE PROCEDURE items_locator_truncate_func();
+
+INSERT INTO items_locator (id, collection_id, datetime)
+SELECT id, collection_id, datetime FROM items
+ON CONFLICT (id, collection_id) DO UPDATE SET datetime = EXCLUDED.datetime;
+
 
 CREATE TYPE item AS (
     id text,
@@ -128,15 +198,49 @@ CREATE OR REPLACE FUNCTION features_to_items(value jsonb) RETURNS SETOF item AS
 $$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE SET SEARCH_PATH TO pgstac,public;
 */
 
+/*
+Point operations filter on the datetime found in items_locator as well as on
+the id so that only the partition holding the item is scanned.
+*/
+CREATE OR REPLACE FUNCTION get_item(_id text, _collection text) RETURNS jsonb AS $$
+    SELECT i.content
+    FROM items_locator l
+    JOIN items i ON i.datetime = l.datetime AND i.id = l.id AND i.collection_id = l.collection_id
+    WHERE l.id = _id AND l.collection_id = _collection;
+$$ LANGUAGE SQL SET SEARCH_PATH TO pgstac,public;
+
 CREATE OR REPLACE FUNCTION get_item(_id text) RETURNS jsonb AS $$
-    SELECT content FROM items WHERE id=_id;
+    SELECT i.content
+    FROM items_locator l
+    JOIN items i ON i.datetime = l.datetime AND i.id = l.id AND i.collection_id = l.collection_id
+    WHERE l.id = _id
+    LIMIT 1;
 $$ LANGUAGE SQL SET SEARCH_PATH TO pgstac,public;
 
+CREATE OR REPLACE FUNCTION delete_item(_id text, _collection text) RETURNS VOID AS $$
+DECLARE
+out items%ROWTYPE;
+_datetime timestamptz;
+BEGIN
+    SELECT datetime INTO STRICT _datetime FROM items_locator
+    WHERE id = _id AND collection_id = _collection;
+    DELETE FROM items
+    WHERE datetime = _datetime AND id = _id AND collection_id = _collection
+    RETURNING * INTO STRICT out;
+END;
+$$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
+
 CREATE OR REPLACE FUNCTION delete_item(_id text) RETURNS VOID AS $$
 DECLARE
 out items%ROWTYPE;
+_datetime timestamptz;
+_collection text;
 BEGIN
-    DELETE FROM items WHERE id = _id RETURNING * INTO STRICT out;
+    SELECT datetime, collection_id INTO STRICT _datetime, _collection FROM items_locator
+    WHERE id = _id;
+    DELETE FROM items
+    WHERE datetime = _datetime AND id = _id AND collection_id = _collection
+    RETURNING * INTO STRICT out;
 END;
 $$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
 
@@ -150,7 +254,15 @@ CREATE OR REPLACE FUNCTION update_item(data jsonb) RETURNS VOID AS $$
 DECLARE
 out items%ROWTYPE;
 BEGIN
-    UPDATE items SET content=data WHERE id = data->>'id' RETURNING * INTO STRICT out;
+    UPDATE items SET content=data
+    WHERE
+        datetime = (
+            SELECT datetime FROM items_locator
+            WHERE id = data->>'id' AND collection_id = data->>'collection'
+        )
+        AND id = data->>'id'
+        AND collection_id = data->>'collection'
+    RETURNING * INTO STRICT out;
 END;
 $$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
 
@@ -162,6 +274,16 @@ newcontent jsonb;
 BEGIN
     PERFORM make_partitions(stac_datetime(data));
     partition := get_partition(stac_datetime(data));
+    -- An item whose datetime changed lives in another partition, remove it there
+    DELETE FROM items
+    WHERE
+        datetime = (
+            SELECT datetime FROM items_locator
+            WHERE id = data->>'id' AND collection_id = data->>'collection'
+        )
+        AND datetime IS DISTINCT FROM stac_datetime(data)
+        AND id = data->>'id'
+        AND collection_id = data->>'collection';
     q := format($q$
         INSERT INTO %I (content) VALUES ($1)
         ON CONFLICT (id) DO
@@ -174,6 +296,76 @@ BEGIN
 END;
 $$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
 
+/*
+Loads a batch of items, given as an array or as an object with an items
+member. Partitions of the weeks of the batch are created at once, items are inserted
+with one statement per partition and empty partitions are analyzed once
+rather than after every statement.
+*/
+CREATE OR REPLACE FUNCTION load_items(data jsonb, _upsert boolean DEFAULT false) RETURNS VOID AS $$
+DECLARE
+partition text;
+q text;
+BEGIN
+    CREATE TEMP TABLE pgstac_tmp_load ON COMMIT DROP AS
+    SELECT
+        value AS content,
+        value->>'id' AS id,
+        value->>'collection' AS collection_id,
+        stac_datetime(value) AS datetime
+    FROM jsonb_array_elements(
+        CASE WHEN jsonb_typeof(data) = 'array' THEN data ELSE data->'items' END
+    );
+
+    -- Only the weeks of the batch get a partition, not every week in between
+    PERFORM partman.create_partition_time(
+        'pgstac.items', array_agg(DISTINCT date_trunc('week', datetime)), true
+    )
+    FROM pgstac_tmp_load
+    HAVING count(*) > 0;
+    PERFORM set_config('pgstac.defer_analyze', 'on', true);
+
+    IF _upsert THEN
+        -- Items whose datetime changed live in another partition, remove them there
+        DELETE FROM items
+        USING items_locator l, pgstac_tmp_load t
+        WHERE
+            l.id = t.id
+            AND l.collection_id = t.collection_id
+            AND l.datetime IS DISTINCT FROM t.datetime
+            AND items.datetime = l.datetime
+            AND items.id = l.id
+            AND items.collection_id = l.collection_id;
+    END IF;
+
+    FOR partition IN SELECT DISTINCT get_partition(datetime) FROM pgstac_tmp_load LOOP
+        q := format($q$
+            INSERT INTO %I (content)
+            SELECT content FROM pgstac_tmp_load WHERE get_partition(datetime) = $1
+            $q$, partition);
+        IF _upsert THEN
+            q := q || format($q$
+                ON CONFLICT (id) DO
+                UPDATE SET content = EXCLUDED.content
+                WHERE %I.content IS DISTINCT FROM EXCLUDED.content
+                $q$, partition);
+        END IF;
+        EXECUTE q USING partition;
+    END LOOP;
+
+    PERFORM set_config('pgstac.defer_analyze', 'off', true);
+    PERFORM analyze_empty_partitions();
+    DROP TABLE pgstac_tmp_load;
+END;
+$$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
+
+CREATE OR REPLACE FUNCTION create_items(data jsonb) RETURNS VOID AS $$
+    SELECT load_items(data, false);
+$$ LANGUAGE SQL SET SEARCH_PATH TO pgstac,public;
+
+CREATE OR REPLACE FUNCTION upsert_items(data jsonb) RETURNS VOID AS $$
+    SELECT load_items(data, true);
+$$ LANGUAGE SQL SET SEARCH_PATH TO pgstac,public;
 
 CREATE OR REPLACE FUNCTION analyze_empty_partitions() RETURNS VOID AS $$
 DECLARE
@@ -261,6 +453,10 @@ CREATE OR REPLACE FUNCTION items_trigger_stmt_func()
 RETURNS TRIGGER AS $$
 DECLARE
 BEGIN
+    -- Batch loads analyze the partitions once they are done
+    IF current_setting('pgstac.defer_analyze', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
     PERFORM analyze_empty_partitions();
     RETURN NULL;
 END;
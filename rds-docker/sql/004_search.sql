@@ -144,9 +144,9 @@ SELECT
     key,
     col,
     dir,
-    CASE dir WHEN 'DESC' THEN 'ASC' ELSE 'ASC' END as rdir,
+    CASE dir WHEN 'DESC' THEN 'ASC' ELSE 'DESC' END as rdir,
     concat(col, ' ', dir, ' NULLS LAST ') AS sort,
-    concat(col,' ', CASE dir WHEN 'DESC' THEN 'ASC' ELSE 'ASC' END, ' NULLS LAST ') AS rsort
+    concat(col,' ', CASE dir WHEN 'DESC' THEN 'ASC' ELSE 'DESC' END, ' NULLS FIRST ') AS rsort
 FROM sorts
 UNION ALL
 SELECT 'id', 'id', 'DESC', 'ASC', 'id DESC', 'id ASC'
@@ -329,6 +329,77 @@ RETURN ret;
 END;
 $$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
 
+-- Jsonb object expression holding the values of the sort keys of an items row
+CREATE OR REPLACE FUNCTION sort_keys_sql(_sort jsonb) RETURNS text AS $$
+SELECT string_agg(DISTINCT format('%L, %s', col, col), ', ') FROM sort_base(_sort);
+$$ LANGUAGE SQL SET SEARCH_PATH TO pgstac,public;
+
+-- Paging tokens are the sort keys of an item as urlsafe base64 encoded json
+CREATE OR REPLACE FUNCTION encode_token(_keys jsonb) RETURNS text AS $$
+SELECT translate(encode(convert_to(_keys::text, 'UTF8'), 'base64'), E'+/=\n', '-_');
+$$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION decode_token(_token text) RETURNS jsonb AS $$
+DECLARE
+_padded text := translate(_token, '-_', '+/');
+_keys jsonb;
+BEGIN
+_padded := rpad(_padded, ((length(_padded) + 3) / 4) * 4, '=');
+_keys := convert_from(decode(_padded, 'base64'), 'UTF8')::jsonb;
+IF jsonb_typeof(_keys) = 'object' AND _keys ? 'id' THEN
+    RETURN _keys;
+END IF;
+RETURN NULL;
+EXCEPTION WHEN others THEN
+    -- Not a sort key token, tokens from earlier releases hold an item id
+    RETURN NULL;
+END;
+$$ LANGUAGE PLPGSQL IMMUTABLE PARALLEL SAFE;
+
+-- Keyset filter for the items strictly after ('next') or before ('prev') the item
+-- with the sort keys _keys, or starting at that item when _inclusive is set
+CREATE OR REPLACE FUNCTION filter_by_keys(
+    _keys jsonb,
+    _sort jsonb,
+    _type text,
+    _inclusive boolean DEFAULT FALSE
+) RETURNS text AS $$
+DECLARE
+sorts RECORD;
+val text;
+cmp text;
+ors text[];
+eqs text[];
+BEGIN
+FOR sorts IN SELECT * FROM sort_base(_sort) LOOP
+    val := _keys->>sorts.col;
+    -- Nulls are sorted last
+    IF val IS NULL THEN
+        cmp := CASE WHEN _type = 'prev' THEN format('%s IS NOT NULL', sorts.col) ELSE 'FALSE' END;
+    ELSE
+        cmp := format(
+            '%s %s %L',
+            sorts.col,
+            CASE WHEN (_type = 'prev') = (sorts.dir = 'DESC') THEN '>' ELSE '<' END,
+            val
+        );
+        IF _type <> 'prev' THEN
+            cmp := format('(%s OR %s IS NULL)', cmp, sorts.col);
+        END IF;
+    END IF;
+    ors := array_append(ors, array_to_string(array_append(eqs, cmp), ' AND '));
+    eqs := array_append(eqs, CASE
+        WHEN val IS NULL THEN format('%s IS NULL', sorts.col)
+        ELSE format('%s = %L', sorts.col, val)
+    END);
+END LOOP;
+IF _inclusive THEN
+    ors := array_append(ors, array_to_string(eqs, ' AND '));
+END IF;
+RETURN format('((%s))', array_to_string(ors, ') OR ('));
+END;
+$$ LANGUAGE PLPGSQL SET SEARCH_PATH TO pgstac,public;
+
 CREATE OR REPLACE FUNCTION search_dtrange(IN _indate jsonb, OUT _tstzrange tstzrange) AS
 $$
 WITH t AS (
@@ -370,6 +441,50 @@ SELECT jsonb_agg(i) from o
 ;
 $$ LANGUAGE SQL IMMUTABLE PARALLEL SAFE;
 
+/*
+Builds the WHERE clause matching the filters of a search request, paging and
+sorting aside, so items can be read without going through search().
+*/
+CREATE OR REPLACE FUNCTION search_where(_search jsonb = '{}'::jsonb) RETURNS text AS $$
+DECLARE
+qa text[];
+_geom geometry;
+_dtrange tstzrange;
+BEGIN
+IF _search ? 'datetime' THEN
+    _dtrange := search_dtrange(_search->'datetime');
+    qa := array_append(qa, format('stac_datetime(content) <@ %L::tstzrange', _dtrange));
+END IF;
+
+IF _search ? 'ids' THEN
+    RAISE NOTICE 'searching solely based on ids... %',_search;
+    qa := array_append(qa, in_array_q('id', _search->'ids'));
+ELSE
+    IF _search ? 'intersects' THEN
+        _geom := ST_SetSRID(ST_GeomFromGeoJSON(_search->>'intersects'), 4326);
+    ELSIF _search ? 'bbox' THEN
+        _geom := bbox_geom(_search->'bbox');
+    END IF;
+
+    IF _geom IS NOT NULL THEN
+        qa := array_append(qa, format('st_intersects(geometry, %L::geometry)',_geom));
+    END IF;
+
+    IF _search ? 'collections' THEN
+        qa := array_append(qa, in_array_q('collection_id', _search->'collections'));
+    END IF;
+
+    IF _search ? 'query' THEN
+        qa := array_cat(qa,
+            stac_query(_search->'query')
+        );
+    END IF;
+END IF;
+
+RETURN COALESCE(array_to_string(qa,' AND '),' TRUE ');
+END;
+$$ LANGUAGE PLPGSQL STABLE SET SEARCH_PATH TO pgstac,public;
+
 
 CREATE OR REPLACE FUNCTION search(_search jsonb = '{}'::jsonb) RETURNS SETOF jsonb AS $$
 DECLARE
@@ -377,14 +492,12 @@ qstart timestamptz := clock_timestamp();
 _sort text := '';
 _rsort text := '';
 _limit int := 10;
-_geom geometry;
-qa text[];
 pq text[];
 query text;
 pq_prop record;
 pq_op record;
-prev_id text := NULL;
-next_id text := NULL;
+prev_token text := NULL;
+next_token text := NULL;
 whereq text := 'TRUE';
 links jsonb := '[]'::jsonb;
 token text;
@@ -410,7 +523,11 @@ m record;
 _dtrange tstzrange := tstzrange('-infinity','infinity');
 _dtsort text;
 _token_dtrange tstzrange := tstzrange('-infinity','infinity');
-_token_record items%ROWTYPE;
+_token_keys jsonb;
+_token_dt timestamptz;
+_legacy_token boolean := false;
+_keys_sql text;
+_keys jsonb;
 is_prev boolean := false;
 includes text[];
 excludes text[];
@@ -440,52 +557,43 @@ IF _search ? 'token' THEN
     IF starts_with(token, 'prev:') THEN
         is_prev := true;
     END IF;
-    SELECT INTO _token_record * FROM items WHERE id=tok_val;
-    IF
-        (is_prev AND _dtsort = 'DESC')
-        OR
-        (not is_prev AND _dtsort = 'ASC')
-    THEN
-        _token_dtrange := tstzrange(_token_record.datetime, 'infinity');
-    ELSIF
-        _dtsort IS NOT NULL
-    THEN
-        _token_dtrange := tstzrange('-infinity',_token_record.datetime);
+    _keys_sql := sort_keys_sql(_search->'sortby');
+    _token_keys := decode_token(tok_val);
+    IF _token_keys IS NULL THEN
+        -- Tokens from earlier releases point at the first item of the page
+        EXECUTE format('SELECT jsonb_build_object(%s) FROM items WHERE id = $1', _keys_sql)
+            INTO _token_keys USING tok_val;
+        _legacy_token := true;
     END IF;
-    IF is_prev THEN
-        tok_q := filter_by_order(tok_val,  _search->'sortby', 'first');
-        _sort := _rsort;
-    ELSIF starts_with(token, 'next:') THEN
-       tok_q := filter_by_order(tok_val,  _search->'sortby', 'last');
+    IF _token_keys IS NOT NULL AND (is_prev OR starts_with(token, 'next:')) THEN
+        IF _dtsort IS NOT NULL THEN
+            _token_dt := (_token_keys->>'datetime')::timestamptz;
+            IF
+                (is_prev AND _dtsort = 'DESC')
+                OR
+                (not is_prev AND _dtsort = 'ASC')
+            THEN
+                _token_dtrange := _dtrange * tstzrange(_token_dt, 'infinity', '[]');
+            ELSE
+                _token_dtrange := _dtrange * tstzrange('-infinity', _token_dt, '[]');
+            END IF;
+        END IF;
+        tok_q := filter_by_keys(
+            _token_keys,
+            _search->'sortby',
+            CASE WHEN is_prev THEN 'prev' ELSE 'next' END,
+            _legacy_token
+        );
+        IF is_prev THEN
+            _sort := _rsort;
+        END IF;
     END IF;
 END IF;
 RAISE NOTICE 'timing: %', age(clock_timestamp(), qstart);
 RAISE NOTICE 'tok_q: % _token_dtrange: %', tok_q, _token_dtrange;
 
-IF _search ? 'ids' THEN
-    RAISE NOTICE 'searching solely based on ids... %',_search;
-    qa := array_append(qa, in_array_q('id', _search->'ids'));
-ELSE
-    IF _search ? 'intersects' THEN
-        _geom := ST_SetSRID(ST_GeomFromGeoJSON(_search->>'intersects'), 4326);
-    ELSIF _search ? 'bbox' THEN
-        _geom := bbox_geom(_search->'bbox');
-    END IF;
-
-    IF _geom IS NOT NULL THEN
-        qa := array_append(qa, format('st_intersects(geometry, %L::geometry)',_geom));
-    END IF;
-
-    IF _search ? 'collections' THEN
-        qa := array_append(qa, in_array_q('collection_id', _search->'collections'));
-    END IF;
-
-    IF _search ? 'query' THEN
-        qa := array_cat(qa,
-            stac_query(_search->'query')
-        );
-    END IF;
-END IF;
+-- The datetime filter is applied through the partitions scanned
+whereq := search_where(_search - 'datetime');
 
 IF _search ? 'limit' THEN
     _limit := (_search->>'limit')::int;
@@ -504,7 +612,6 @@ IF _search ? 'fields' THEN
     RAISE NOTICE 'Includes: %, Excludes: %', includes, excludes;
 END IF;
 
-whereq := COALESCE(array_to_string(qa,' AND '),' TRUE ');
 dq := COALESCE(array_to_string(dqa,' AND '),' TRUE ');
 RAISE NOTICE 'timing before temp table: %', age(clock_timestamp(), qstart);
 
@@ -514,80 +621,64 @@ SELECT * FROM items_by_partition(
     _token_dtrange,
     _sort,
     _limit + 1
-);
+) WITH ORDINALITY;
 RAISE NOTICE 'timing after temp table: %', age(clock_timestamp(), qstart);
 
-RAISE NOTICE 'timing before min/max: %', age(clock_timestamp(), qstart);
-
-IF is_prev THEN
-    SELECT INTO last_id, first_id, counter
-        first_value(id) OVER (),
-        last_value(id) OVER (),
-        count(*) OVER ()
-    FROM results_page;
-ELSE
-    SELECT INTO first_id, last_id, counter
-        first_value(id) OVER (),
-        last_value(id) OVER (),
-        count(*) OVER ()
-    FROM results_page;
-END IF;
-RAISE NOTICE 'firstid: %, lastid %', first_id, last_id;
-RAISE NOTICE 'timing after min/max: %', age(clock_timestamp(), qstart);
-
-
-
-
-IF counter > _limit THEN
-    next_id := last_id;
-    RAISE NOTICE 'next_id: %', next_id;
-ELSE
-    RAISE NOTICE 'No more next';
-END IF;
+SELECT INTO counter count(*) FROM results_page;
 
-IF tok_q = 'TRUE' THEN
-    RAISE NOTICE 'Not a paging query, no previous item';
-ELSE
-    RAISE NOTICE 'Getting previous item id';
-    RAISE NOTICE 'timing: %', age(clock_timestamp(), qstart);
-    SELECT INTO _token_record * FROM items WHERE id=first_id;
-    IF
-        _dtsort = 'DESC'
-    THEN
-        _token_dtrange := _dtrange * tstzrange(_token_record.datetime, 'infinity');
-    ELSE
-        _token_dtrange := _dtrange * tstzrange('-infinity',_token_record.datetime);
+-- The tokens carry the sort keys of the first and last items of the page. The
+-- extra row tells if there is another page in the direction of travel, there
+-- always is one in the other direction when paging.
+IF counter > 0 THEN
+    IF _keys_sql IS NULL THEN
+        _keys_sql := sort_keys_sql(_search->'sortby');
+    END IF;
+    IF counter > _limit THEN
+        EXECUTE format(
+            'SELECT jsonb_build_object(%s) FROM results_page WHERE ordinality = $1',
+            _keys_sql
+        ) INTO _keys USING _limit;
+        IF is_prev THEN
+            prev_token := encode_token(_keys);
+        ELSE
+            next_token := encode_token(_keys);
+        END IF;
+    END IF;
+    IF tok_q <> 'TRUE' THEN
+        EXECUTE format(
+            'SELECT jsonb_build_object(%s) FROM results_page WHERE ordinality = 1',
+            _keys_sql
+        ) INTO _keys;
+        IF is_prev THEN
+            next_token := encode_token(_keys);
+        ELSE
+            prev_token := encode_token(_keys);
+        END IF;
     END IF;
-    RAISE NOTICE '% %', _token_dtrange, _dtrange;
-    SELECT id INTO prev_id FROM items_by_partition(
-        concat(whereq, ' AND ', filter_by_order(first_id, _search->'sortby', 'prev')),
-        _token_dtrange,
-        _rsort,
-        1
-    );
-    RAISE NOTICE 'timing: %', age(clock_timestamp(), qstart);
-
-    RAISE NOTICE 'prev_id: %', prev_id;
 END IF;
+RAISE NOTICE 'next: %, prev: %', next_token, prev_token;
+RAISE NOTICE 'timing after tokens: %', age(clock_timestamp(), qstart);
 
 
 RETURN QUERY
 WITH features AS (
-    SELECT filter_jsonb(content, includes, excludes) as content
-    FROM results_page LIMIT _limit
-),
-j AS (SELECT jsonb_agg(content) as feature_arr FROM features)
+    SELECT filter_jsonb(content, includes, excludes) as content, ordinality
+    FROM results_page
+    WHERE ordinality <= _limit
+)
 SELECT jsonb_build_object(
     'type', 'FeatureCollection',
-    'features', coalesce (
-        CASE WHEN is_prev THEN flip_jsonb_array(feature_arr) ELSE feature_arr END
-        ,'[]'::jsonb),
+    'features', coalesce((
+        SELECT jsonb_agg(
+            content ORDER BY CASE WHEN is_prev THEN -ordinality ELSE ordinality END
+        )
+        FROM features
+    ), '[]'::jsonb),
     'links', links,
     'timeStamp', now(),
-    'next', next_id,
-    'prev', prev_id
+    'next', next_token,
+    'prev', prev_token
 )
-FROM j
 ;
 
 
@@ -12,6 +12,7 @@ from stac_pydantic.version import STAC_VERSION
 
 
 from stac_fastapi.api.errors import DEFAULT_STATUS_CODES, add_exception_handlers
+from stac_fastapi.api.middleware import AdmissionControlMiddleware, AdmissionController
 from stac_fastapi.api.models import (
     CollectionUri,
     EmptyRequest,
@@ -237,6 +238,15 @@ class StacApi:
         # add compression middleware
         self.app.add_middleware(BrotliMiddleware)
 
+        # shed load per class of routes
+        if self.settings.admission_control:
+            self.app.state.admission = AdmissionController(
+                limits=self.settings.admission_limits
+            )
+            self.app.add_middleware(
+                AdmissionControlMiddleware, controller=self.app.state.admission
+            )
+
         # add cors support for origins
         origins = [
             "http://localhost:8080",
@@ -10,20 +10,29 @@ from starlette.requests import Request
 from starlette.responses import JSONResponse
 
 from stac_fastapi.types.errors import (
+    ClientDisconnectedError,
     ConflictError,
     DatabaseError,
     ForeignKeyError,
+    InvalidQueryParameter,
     NotFoundError,
+    QueryTimeoutError,
 )
 
 logger = logging.getLogger(__name__)
 
+# Non-standard status code of requests closed by the client (nginx)
+HTTP_499_CLIENT_CLOSED_REQUEST = 499
+
 
 DEFAULT_STATUS_CODES = {
     NotFoundError: status.HTTP_404_NOT_FOUND,
     ConflictError: status.HTTP_409_CONFLICT,
     ForeignKeyError: status.HTTP_422_UNPROCESSABLE_ENTITY,
     DatabaseError: status.HTTP_424_FAILED_DEPENDENCY,
+    InvalidQueryParameter: status.HTTP_400_BAD_REQUEST,
+    QueryTimeoutError: status.HTTP_504_GATEWAY_TIMEOUT,
+    ClientDisconnectedError: HTTP_499_CLIENT_CLOSED_REQUEST,
     Exception: status.HTTP_500_INTERNAL_SERVER_ERROR,
 }
 
@@ -1,11 +1,32 @@
 """api middleware."""
 
-from typing import Callable
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Set
 
+import attr
 from fastapi import APIRouter, FastAPI
+from starlette import status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
+from starlette.responses import JSONResponse
 from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from stac_fastapi.types.config import AdmissionLimits
+
+# Cheap routes which are always served
+ADMISSION_EXEMPT_PATHS = {
+    "/_mgmt/metrics",
+    "/_mgmt/ping",
+    "/conformance",
+    "/docs",
+    "/docs/oauth2-redirect",
+    "/openapi.json",
+    "/redoc",
+}
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 def router_middleware(app: FastAPI, router: APIRouter):
@@ -29,3 +50,149 @@ def router_middleware(app: FastAPI, router: APIRouter):
         return func
 
     return deco
+
+
+class AdmissionRejected(Exception):
+    """Request rejected by admission control."""
+
+    def __init__(self, status_code: int, retry_after: int):
+        """Reject a request with a status code."""
+        super().__init__(status_code, retry_after)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@attr.s
+class AdmissionQueue:
+    """Bound the number of requests of a class of routes served at once.
+
+    Requests over the concurrency limit wait for a slot in arrival order. Requests
+    arriving when the queue is full are rejected with `429`, those which waited for
+    `queue_timeout` seconds with `503`.
+
+    Attributes:
+        limits: admission limits of the class of routes.
+        in_flight: number of requests being served.
+        rejected: number of rejected requests.
+    """
+
+    limits: AdmissionLimits = attr.ib()
+    in_flight: int = attr.ib(default=0, init=False)
+    rejected: int = attr.ib(default=0, init=False)
+    _waiters: Deque[asyncio.Future] = attr.ib(factory=deque, init=False, repr=False)
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting to be served."""
+        return len(self._waiters)
+
+    def _reject(self, status_code: int) -> AdmissionRejected:
+        """Count a rejected request."""
+        self.rejected += 1
+        return AdmissionRejected(status_code, self.limits.retry_after)
+
+    async def acquire(self) -> None:
+        """Wait for a slot, raising `AdmissionRejected` if there is none in time."""
+        if self.in_flight < self.limits.concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.limits.queue_size:
+            raise self._reject(status.HTTP_429_TOO_MANY_REQUESTS)
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.limits.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(status.HTTP_503_SERVICE_UNAVAILABLE)
+        except asyncio.CancelledError:
+            # Pass on a slot handed over as the request was cancelled
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self) -> None:
+        """Free a slot, handing it over to the oldest waiting request."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+@attr.s
+class AdmissionController:
+    """Admission control of the routes of the api, by class of routes.
+
+    Routes are classified as `write` (requests which aren't reads, except searches),
+    `search` (searches and item collections) or `item` (other reads). Paths in
+    `exempt_paths` aren't limited.
+
+    Attributes:
+        limits: admission limits by class of routes, classes without limits aren't
+            limited.
+        exempt_paths: paths which are always served.
+    """
+
+    limits: Dict[str, AdmissionLimits] = attr.ib()
+    exempt_paths: Set[str] = attr.ib(default=ADMISSION_EXEMPT_PATHS)
+    queues: Dict[str, AdmissionQueue] = attr.ib(init=False)
+
+    @queues.default
+    def _create_queues(self) -> Dict[str, AdmissionQueue]:
+        """Create a queue per class of routes."""
+        return {name: AdmissionQueue(limits) for name, limits in self.limits.items()}
+
+    def route_class(self, scope: Scope) -> Optional[str]:
+        """Classify the route of a request, None if it is exempt."""
+        path = scope["path"]
+        if path in self.exempt_paths:
+            return None
+        search = path == "/search" or path.startswith("/search/")
+        if scope["method"] not in READ_METHODS and not search:
+            return "write"
+        if search or path.endswith("/items"):
+            return "search"
+        return "item"
+
+
+class AdmissionControlMiddleware:
+    """Shed load before requests queue for database connections.
+
+    Requests are admitted by an `AdmissionController`, the rejected ones are answered
+    right away with a `Retry-After` header.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        """Wrap an application."""
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Admit a request."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        queue = self.controller.queues.get(self.controller.route_class(scope))
+        if queue is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await queue.acquire()
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                content={"detail": "Too many requests, retry later"},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            queue.release()
@@ -1,12 +1,44 @@
 """route factories."""
+import asyncio
 import inspect
-from typing import Callable, Type, Union
+from typing import Any, Awaitable, Callable, Optional, Type, Union
 
 from fastapi import Depends
 from pydantic import BaseModel
 from starlette.requests import Request
 
 from stac_fastapi.api.models import APIRequest
+from stac_fastapi.types.config import Settings
+from stac_fastapi.types.errors import ClientDisconnectedError
+
+
+def statement_timeout(func: Callable) -> Optional[float]:
+    """Get the statement timeout of the route served by a client method."""
+    settings = Settings.get()
+    return settings.statement_timeouts.get(func.__name__, settings.statement_timeout)
+
+
+async def cancel_on_disconnect(request: Request, call: Awaitable) -> Any:
+    """Await an endpoint call, cancelling it if the client disconnects.
+
+    Starlette is asked every `disconnect_poll_interval` seconds if the client is still
+    connected, so abandoned requests don't keep their database connection busy.
+    """
+    interval = Settings.get().disconnect_poll_interval
+    if not interval:
+        return await call
+    task = asyncio.ensure_future(call)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnectedError(
+                    f"Client disconnected from {request.method} {request.url.path}"
+                )
+    finally:
+        task.cancel()
 
 
 def create_endpoint(
@@ -26,6 +58,9 @@ def create_endpoint(
     APIRequest is good for validating query/path parameters (ex. GET requests) and allows for FastAPI dependency
     injection.  It is expected the that the return of `APIRequest.kwargs` matches that of the callable.
 
+    The statement timeout of the route is set in `request.state.statement_timeout` for the client. Coroutines are
+    cancelled when the client disconnects, calls run in the threadpool can't be and rely on the timeout.
+
     Args:
         func: the wrapped function.
         request_model: either `stac_fastapi.api.models.APIRequest` or `pydantic.BaseModel`.
@@ -41,6 +76,7 @@ def create_endpoint(
                 request_data: request_model = Depends(),  # type:ignore
             ):
                 """Endpoint."""
+                request.state.statement_timeout = statement_timeout(func)
                 resp = func(
                     request=request, **request_data.kwargs()  # type:ignore
                 )
@@ -53,6 +89,7 @@ def create_endpoint(
                 request_data: request_model,  # type:ignore
             ):
                 """Endpoint."""
+                request.state.statement_timeout = statement_timeout(func)
                 resp = func(request_data, request=request)
                 return resp
 
@@ -65,8 +102,10 @@ def create_endpoint(
                 request_data: request_model = Depends(),  # type:ignore
             ):
                 """Endpoint."""
-                resp = await func(
-                    request=request, **request_data.kwargs()  # type:ignore
+                request.state.statement_timeout = statement_timeout(func)
+                resp = await cancel_on_disconnect(
+                    request,
+                    func(request=request, **request_data.kwargs()),  # type:ignore
                 )
                 return resp
 
@@ -77,7 +116,10 @@ def create_endpoint(
                 request_data: request_model,  # type:ignore
             ):
                 """Endpoint."""
-                resp = await func(request_data, request=request)
+                request.state.statement_timeout = statement_timeout(func)
+                resp = await cancel_on_disconnect(
+                    request, func(request_data, request=request)
+                )
                 return resp
 
         return _endpoint
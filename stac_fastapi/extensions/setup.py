@@ -14,7 +14,7 @@ __version__ = load_source(
 ).__version__  # type:ignore
 
 install_requires = [
-    "fastapi",
+    "fastapi>=0.68",
     "attrs",
     "pydantic[dotenv]",
     "stac_pydantic==1.3.8",
@@ -1,5 +1,15 @@
 """stac_api.extensions.third_party module."""
 from .bulk_transactions import BulkTransactionExtension
-from .tiles import TilesExtension
+from .export import ExportExtension
+from .ingest import IngestExtension
+from .metrics import MetricsExtension
+from .tiles import TilesExtension, VectorTilesExtension
 
-__all__ = ("BulkTransactionExtension", "TilesExtension")
+__all__ = (
+    "BulkTransactionExtension",
+    "ExportExtension",
+    "IngestExtension",
+    "MetricsExtension",
+    "TilesExtension",
+    "VectorTilesExtension",
+)
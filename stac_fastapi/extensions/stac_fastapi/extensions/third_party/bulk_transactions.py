@@ -1,21 +1,87 @@
 """bulk transactions extension."""
 import abc
-from typing import List, Optional
+import inspect
+import logging
+from enum import Enum
+from typing import AsyncIterator, List, Optional
 
 import attr
-from fastapi import APIRouter, FastAPI
-from pydantic import BaseModel
+from fastapi import APIRouter, FastAPI, Path, Query
+from pydantic import BaseModel, ValidationError
 from stac_pydantic import Item
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
 
 from stac_fastapi.api.models import _create_request_model
 from stac_fastapi.api.routes import create_endpoint
+from stac_fastapi.types.errors import StacApiError
 from stac_fastapi.types.extension import ApiExtension
 
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class BulkTransactionMethod(str, Enum):
+    """Bulk Transaction Methods."""
+
+    INSERT = "insert"
+    UPSERT = "upsert"
+
 
 class Items(BaseModel):
-    """Items model."""
+    """Items model.
+
+    Attributes:
+        items: items to load.
+        method: `insert` fails if an item already exists, `upsert` replaces it.
+    """
 
     items: List[Item]
+    method: BulkTransactionMethod = BulkTransactionMethod.INSERT
+
+
+class BulkItemError(BaseModel):
+    """Error loading a line of a NDJSON bulk load."""
+
+    line: int
+    id: Optional[str]
+    error: str
+
+
+class BulkItemsReport(BaseModel):
+    """Outcome of a NDJSON bulk load.
+
+    Attributes:
+        received: number of items read.
+        loaded: number of items loaded.
+        queued: number of items accepted by the backend to be loaded later.
+        errors: lines which couldn't be loaded.
+    """
+
+    received: int = 0
+    loaded: int = 0
+    queued: int = 0
+    errors: List[BulkItemError] = []
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield the lines of a request body as it is received."""
+    buffer = b""
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _error_message(e: Exception) -> str:
+    """Describe the error of a batch, with the database error it translates."""
+    error = e.__cause__ or e
+    message = str(error)
+    return f"{type(error).__name__}: {message}" if message else type(error).__name__
 
 
 @attr.s  # type: ignore
@@ -53,10 +119,89 @@ class BulkTransactionExtension(ApiExtension):
     """Bulk Transaction Extension.
 
     Bulk Transaction extension adds the `POST /collections/{collectionId}/bulk_items` endpoint to the application
-    for efficient bulk insertion of items.
+    for efficient bulk insertion of items, and the `POST /collections/{collectionId}/bulk_items/ndjson` endpoint
+    loading items streamed as newline delimited json.
     """
 
     client: BaseBulkTransactionsClient = attr.ib()
+    ndjson_batch_size: int = attr.ib(default=1000)
+
+    async def _load_batch(
+        self,
+        batch: List[Item],
+        lines: List[int],
+        method: BulkTransactionMethod,
+        report: BulkItemsReport,
+        request: Request,
+    ) -> None:
+        """Hand a batch of items to the client, reporting its failure on every line.
+
+        A `202 Accepted` response from the client counts the items as queued rather
+        than loaded.
+        """
+        items = Items.construct(items=batch, method=method)
+        try:
+            if inspect.iscoroutinefunction(self.client.bulk_item_insert):
+                result = await self.client.bulk_item_insert(items, request=request)
+            else:
+                result = await run_in_threadpool(
+                    self.client.bulk_item_insert, items, request=request
+                )
+        except Exception as e:
+            if not isinstance(e, StacApiError):
+                logger.exception("Failed to load a batch of %d items", len(batch))
+            report.errors.extend(
+                BulkItemError(line=line, id=item.id, error=_error_message(e))
+                for line, item in zip(lines, batch)
+            )
+        else:
+            if isinstance(result, Response) and result.status_code == 202:
+                report.queued += len(batch)
+            else:
+                report.loaded += len(batch)
+
+    async def bulk_item_insert_ndjson(
+        self,
+        request: Request,
+        collectionId: str = Path(..., description="Collection ID"),
+        method: BulkTransactionMethod = Query(BulkTransactionMethod.INSERT),
+    ) -> BulkItemsReport:
+        """Load items streamed as newline delimited json.
+
+        Items are validated as they are received and loaded in batches of
+        `ndjson_batch_size`, invalid items are reported without failing the others.
+        """
+        report = BulkItemsReport()
+        batch: List[Item] = []
+        lines: List[int] = []
+        number = 0
+        async for line in _iter_lines(request):
+            number += 1
+            if not line.strip():
+                continue
+            report.received += 1
+            try:
+                item = Item.parse_raw(line)
+            except ValidationError as e:
+                report.errors.append(BulkItemError(line=number, error=str(e)))
+                continue
+            if item.collection != collectionId:
+                report.errors.append(
+                    BulkItemError(
+                        line=number,
+                        id=item.id,
+                        error=f"Item belongs to collection {item.collection}",
+                    )
+                )
+                continue
+            batch.append(item)
+            lines.append(number)
+            if len(batch) >= self.ndjson_batch_size:
+                await self._load_batch(batch, lines, method, report, request)
+                batch, lines = [], []
+        if batch:
+            await self._load_batch(batch, lines, method, report, request)
+        return report
 
     def register(self, app: FastAPI) -> None:
         """Register the extension with a FastAPI application.
@@ -79,4 +224,17 @@ class BulkTransactionExtension(ApiExtension):
             methods=["POST"],
             endpoint=create_endpoint(self.client.bulk_item_insert, items_request_model),
         )
+        router.add_api_route(
+            name="Bulk Create Item NDJSON",
+            path="/collections/{collectionId}/bulk_items/ndjson",
+            response_model=BulkItemsReport,
+            methods=["POST"],
+            endpoint=self.bulk_item_insert_ndjson,
+            openapi_extra={
+                "requestBody": {
+                    "required": True,
+                    "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+                }
+            },
+        )
         app.include_router(router, tags=["Bulk Transaction Extension"])
@@ -0,0 +1,66 @@
+"""export extension."""
+import abc
+from typing import Type
+
+import attr
+from fastapi import APIRouter, FastAPI
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+
+from stac_fastapi.api.models import _create_request_model
+from stac_fastapi.api.routes import create_endpoint
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.search import STACSearch
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@attr.s  # type: ignore
+class BaseExportClient(abc.ABC):
+    """Defines a pattern for implementing the Export Extension."""
+
+    @abc.abstractmethod
+    def export(self, search_request: BaseModel, **kwargs) -> StreamingResponse:
+        """Stream all items matching a search.
+
+        Args:
+            search_request: search request parameters, paging parameters are ignored.
+
+        Returns:
+            A response streaming the items as newline delimited GeoJSON.
+        """
+        ...
+
+
+@attr.s
+class ExportExtension(ApiExtension):
+    """Export Extension.
+
+    The Export extension adds the `POST /search/export` endpoint to the application, which
+    streams every item matching a search as newline delimited GeoJSON without paging.
+    """
+
+    client: BaseExportClient = attr.ib()
+    search_request_model: Type[BaseModel] = attr.ib(default=STACSearch)
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        search_request_model = _create_request_model(self.search_request_model)
+
+        router = APIRouter()
+        router.add_api_route(
+            name="Export Search",
+            path="/search/export",
+            response_class=StreamingResponse,
+            responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+            methods=["POST"],
+            endpoint=create_endpoint(self.client.export, search_request_model),
+        )
+        app.include_router(router, tags=["Export Extension"])
@@ -0,0 +1,95 @@
+"""ingest extension."""
+import abc
+from enum import Enum
+from typing import Dict, Optional
+
+import attr
+from fastapi import APIRouter, FastAPI, Path
+from pydantic import BaseModel
+
+from stac_fastapi.api.models import APIRequest
+from stac_fastapi.api.routes import create_endpoint
+from stac_fastapi.types.extension import ApiExtension
+
+
+class IngestJobStatus(str, Enum):
+    """Ingest job statuses."""
+
+    PENDING = "pending"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class IngestJob(BaseModel):
+    """Ingest job model.
+
+    Attributes:
+        id: id of the job.
+        status: whether the items were loaded.
+        items: number of items of the job.
+        error: why the items couldn't be loaded.
+    """
+
+    id: str
+    status: IngestJobStatus
+    items: int
+    error: Optional[str]
+
+
+@attr.s
+class IngestJobUri(APIRequest):
+    """Get ingest job."""
+
+    jobId: str = attr.ib(default=Path(..., description="Job ID"))
+
+    def kwargs(self) -> Dict:
+        """kwargs."""
+        return {"job_id": self.jobId}
+
+
+@attr.s  # type: ignore
+class BaseIngestClient(abc.ABC):
+    """Defines a pattern for implementing the Ingest Extension."""
+
+    @abc.abstractmethod
+    def get_job(self, job_id: str, **kwargs) -> IngestJob:
+        """Get the status of an ingest job.
+
+        Args:
+            job_id: id of the job.
+
+        Returns:
+            The ingest job.
+        """
+        ...
+
+
+@attr.s
+class IngestExtension(ApiExtension):
+    """Ingest Extension.
+
+    Backends which queue item writes, acknowledging them with `202 Accepted` and the
+    id of an ingest job, serve the status of the jobs at `GET /ingest/jobs/{jobId}`.
+    """
+
+    client: BaseIngestClient = attr.ib()
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        router = APIRouter()
+        router.add_api_route(
+            name="Get Ingest Job",
+            path="/ingest/jobs/{jobId}",
+            response_model=IngestJob,
+            response_model_exclude_none=True,
+            methods=["GET"],
+            endpoint=create_endpoint(self.client.get_job, IngestJobUri),
+        )
+        app.include_router(router, tags=["Ingest Extension"])
@@ -0,0 +1,302 @@
+"""metrics extension."""
+import math
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import attr
+from fastapi import APIRouter, FastAPI
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from stac_fastapi.types.extension import ApiExtension
+from stac_fastapi.types.metrics import Collector, Sample
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(float(1024 * 4 ** n) for n in range(9))
+
+# Label of requests which didn't match any route
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _format_value(value: float) -> str:
+    """Format a value in the Prometheus text format."""
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Format labels in the Prometheus text format."""
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\""))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def render_samples(samples: Iterable[Sample]) -> Iterator[str]:
+    """Render samples in the Prometheus text format, grouped by metric."""
+    metrics: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        metrics.setdefault(sample.name, []).append(sample)
+    for name, values in metrics.items():
+        yield f"# HELP {name} {values[0].help}"
+        yield f"# TYPE {name} {values[0].type}"
+        for sample in values:
+            yield f"{name}{_format_labels(sample.labels)} {_format_value(sample.value)}"
+
+
+@attr.s
+class Histogram:
+    """Histogram of observations by labels.
+
+    Attributes:
+        name: name of the metric.
+        help: description of the metric.
+        labelnames: names of the labels of the observations.
+        buckets: upper bounds of the buckets, in increasing order.
+    """
+
+    name: str = attr.ib()
+    help: str = attr.ib()
+    labelnames: Tuple[str, ...] = attr.ib()
+    buckets: Tuple[float, ...] = attr.ib(default=LATENCY_BUCKETS)
+    # Count of each bucket then of `+Inf`, the sum and the count by labels
+    _series: Dict[Tuple[str, ...], List[float]] = attr.ib(
+        factory=dict, init=False, repr=False
+    )
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Add an observation."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> Iterator[str]:
+        """Render the histogram in the Prometheus text format."""
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in sorted(self._series.items()):
+            labels = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}"
+            yield f"{self.name}_count{_format_labels(labels)} {series[-1]}"
+
+
+@attr.s
+class RequestMetrics:
+    """Metrics of the requests served by the process.
+
+    Attributes:
+        latency: seconds to serve requests, by route, method and status.
+        size: bytes of the response bodies before compression, by route, method and
+            status.
+        phases: seconds spent by requests in each phase timed by the backend (see
+            `stac_fastapi.types.timings`), by route and phase.
+        in_progress: number of requests being served.
+    """
+
+    latency: Histogram = attr.ib(
+        factory=lambda: Histogram(
+            "stac_request_duration_seconds",
+            "Seconds to serve requests.",
+            ("route", "method", "status"),
+        )
+    )
+    size: Histogram = attr.ib(
+        factory=lambda: Histogram(
+            "stac_response_size_bytes",
+            "Bytes of the response bodies, before compression.",
+            ("route", "method", "status"),
+            SIZE_BUCKETS,
+        )
+    )
+    phases: Histogram = attr.ib(
+        factory=lambda: Histogram(
+            "stac_request_phase_seconds",
+            "Seconds spent by requests waiting for a connection, querying the "
+            "database and serializing the response.",
+            ("route", "phase"),
+        )
+    )
+    in_progress: int = attr.ib(default=0, init=False)
+
+    def observe(
+        self,
+        route: str,
+        method: str,
+        status_code: int,
+        duration: float,
+        size: int,
+        timings: Dict[str, float],
+    ) -> None:
+        """Record a served request."""
+        self.latency.observe(duration, route, method, str(status_code))
+        self.size.observe(size, route, method, str(status_code))
+        for phase, seconds in timings.items():
+            self.phases.observe(seconds, route, phase)
+
+    def render(self) -> Iterator[str]:
+        """Render the metrics in the Prometheus text format."""
+        yield from self.latency.render()
+        yield from self.size.render()
+        yield from self.phases.render()
+        yield from render_samples(
+            [
+                Sample(
+                    "stac_requests_in_progress",
+                    self.in_progress,
+                    help="Number of requests being served.",
+                )
+            ]
+        )
+
+
+def route_name(scope: Scope) -> str:
+    """Get the name of the route serving a request, as registered with the app."""
+    name = UNMATCHED_ROUTE
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.name
+        if match == Match.PARTIAL and name == UNMATCHED_ROUTE:
+            name = route.name
+    return name
+
+
+class MetricsMiddleware:
+    """Record the latency, the response size and the phases of requests."""
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics):
+        """Wrap an application."""
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve a request, recording its metrics."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_name(scope)
+        # Shared with `request.state`, where the backends record their timings
+        state = scope.setdefault("state", {})
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        start = time.perf_counter()
+        self.metrics.in_progress += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.in_progress -= 1
+            self.metrics.observe(
+                route,
+                scope["method"],
+                status_code,
+                time.perf_counter() - start,
+                size,
+                state.get("timings", {}),
+            )
+
+
+def admission_metrics(app: FastAPI) -> Iterator[Sample]:
+    """Collect the state of the admission control queues, if enabled."""
+    controller = getattr(app.state, "admission", None)
+    if controller is None:
+        return
+    for route_class, queue in controller.queues.items():
+        labels = {"route_class": route_class}
+        yield Sample(
+            "stac_admission_in_flight",
+            queue.in_flight,
+            labels,
+            help="Number of admitted requests being served.",
+        )
+        yield Sample(
+            "stac_admission_waiting",
+            queue.waiting,
+            labels,
+            help="Number of requests waiting to be admitted.",
+        )
+        yield Sample(
+            "stac_admission_rejected_total",
+            queue.rejected,
+            labels,
+            "counter",
+            "Requests rejected by the admission control.",
+        )
+
+
+@attr.s
+class MetricsExtension(ApiExtension):
+    """Metrics Extension.
+
+    The Metrics extension adds the `GET /_mgmt/metrics` endpoint to the application,
+    which serves the request latency and response size histograms by route name and
+    status, the time requests spend in each phase timed by the backend and the
+    admission control queues in the Prometheus text format. Backends add their own
+    metrics, like the state of their connection pools and the lookups of their
+    caches, with `collectors`.
+
+    Metrics are kept by each process, so every worker has to be scraped.
+    """
+
+    collectors: List[Collector] = attr.ib(factory=list)
+    path: str = attr.ib(default="/_mgmt/metrics")
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        metrics = app.state.metrics = RequestMetrics()
+        collectors = [admission_metrics, *self.collectors]
+
+        async def get_metrics(request: Request) -> Response:
+            """Serve the metrics in the Prometheus text format."""
+            samples = (
+                sample for collect in collectors for sample in collect(request.app)
+            )
+            lines = [*metrics.render(), *render_samples(samples)]
+            return Response("\n".join(lines) + "\n", media_type=PROMETHEUS_MEDIA_TYPE)
+
+        router = APIRouter()
+        router.add_api_route(
+            name="Metrics",
+            path=self.path,
+            response_class=Response,
+            responses={200: {"content": {PROMETHEUS_MEDIA_TYPE: {}}}},
+            methods=["GET"],
+            endpoint=get_metrics,
+        )
+        app.include_router(router, tags=["Liveliness/Readiness"])
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
@@ -1,21 +1,24 @@
 """tiles extension."""
 import abc
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from urllib.parse import urljoin
 
 import attr
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, Path
 from pydantic import BaseModel
 from stac_pydantic.collection import SpatialExtent
 from stac_pydantic.shared import Link, MimeTypes, Relations
 from starlette.requests import Request
-from starlette.responses import HTMLResponse, RedirectResponse
+from starlette.responses import HTMLResponse, RedirectResponse, Response
 
-from stac_fastapi.api.models import ItemUri
+from stac_fastapi.api.models import APIRequest, ItemUri
 from stac_fastapi.api.routes import create_endpoint
 from stac_fastapi.types.core import BaseCoreClient
+from stac_fastapi.types.errors import InvalidQueryParameter
 from stac_fastapi.types.extension import ApiExtension
 
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
 
 class OGCTileLink(Link):
     """OGC Tiles API - Link."""
@@ -210,3 +213,147 @@ class TilesExtension(ApiExtension):
             endpoint=create_endpoint(self.client.get_item_tiles, ItemUri),
             tags=["OGC Tiles"],
         )
+
+
+def validate_tile(z: int, x: int, y: int) -> None:
+    """Check a tile exists in the web mercator tile matrix set."""
+    if not 0 <= z <= 30 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise InvalidQueryParameter(f"Invalid tile {z}/{x}/{y}")
+
+
+@attr.s
+class TileUri(APIRequest):
+    """Get vector tile."""
+
+    z: int = attr.ib(default=Path(..., description="Zoom level"))
+    x: int = attr.ib(default=Path(..., description="Tile column"))
+    y: int = attr.ib(default=Path(..., description="Tile row"))
+
+    def kwargs(self) -> Dict:
+        """kwargs."""
+        return {"z": self.z, "x": self.x, "y": self.y}
+
+
+@attr.s
+class CollectionTileUri(TileUri):
+    """Get vector tile of a collection."""
+
+    collectionId: str = attr.ib(default=Path(..., description="Collection ID"))
+
+    def kwargs(self) -> Dict:
+        """kwargs."""
+        return {"collection_id": self.collectionId, **super().kwargs()}
+
+
+@attr.s
+class SearchTileRequest(TileUri):
+    """Get vector tile of a search."""
+
+    collections: Optional[str] = attr.ib(default=None)
+    ids: Optional[str] = attr.ib(default=None)
+    datetime: Optional[str] = attr.ib(default=None)
+    query: Optional[str] = attr.ib(default=None)
+
+    def kwargs(self) -> Dict:
+        """kwargs."""
+        return {
+            "collections": self.collections.split(",")
+            if self.collections
+            else self.collections,
+            "ids": self.ids.split(",") if self.ids else self.ids,
+            "datetime": self.datetime,
+            "query": self.query,
+            **super().kwargs(),
+        }
+
+
+@attr.s  # type: ignore
+class BaseVectorTilesClient(abc.ABC):
+    """Defines a pattern for implementing the Vector Tiles Extension."""
+
+    @abc.abstractmethod
+    def get_collection_tile(
+        self, collection_id: str, z: int, x: int, y: int, **kwargs
+    ) -> Response:
+        """Get the footprints of the items of a collection as a vector tile.
+
+        Args:
+            collection_id: id of the collection.
+            z: zoom level of the tile.
+            x: column of the tile.
+            y: row of the tile.
+
+        Returns:
+            A Mapbox Vector Tile.
+        """
+        ...
+
+    @abc.abstractmethod
+    def get_search_tile(
+        self,
+        z: int,
+        x: int,
+        y: int,
+        collections: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        datetime: Optional[str] = None,
+        query: Optional[str] = None,
+        **kwargs,
+    ) -> Response:
+        """Get the footprints of the items matching a search as a vector tile.
+
+        Args:
+            z: zoom level of the tile.
+            x: column of the tile.
+            y: row of the tile.
+            collections: ids of the collections to search.
+            ids: ids of the items to search.
+            datetime: datetime or interval of the items.
+            query: query extension filter, as json.
+
+        Returns:
+            A Mapbox Vector Tile.
+        """
+        ...
+
+
+@attr.s
+class VectorTilesExtension(ApiExtension):
+    """Vector Tiles Extension.
+
+    The Vector Tiles extension adds the `GET /collections/{collectionId}/tiles/{z}/{x}/{y}.mvt`
+    and `GET /search/tiles/{z}/{x}/{y}.mvt` endpoints to the application, serving item
+    footprints as Mapbox Vector Tiles in the web mercator tile matrix set.
+    """
+
+    client: BaseVectorTilesClient = attr.ib()
+
+    def register(self, app: FastAPI) -> None:
+        """Register the extension with a FastAPI application.
+
+        Args:
+            app: target FastAPI application.
+
+        Returns:
+            None
+        """
+        router = APIRouter()
+        router.add_api_route(
+            name="Get Collection Vector Tile",
+            path="/collections/{collectionId}/tiles/{z}/{x}/{y}.mvt",
+            response_class=Response,
+            responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+            methods=["GET"],
+            endpoint=create_endpoint(
+                self.client.get_collection_tile, CollectionTileUri
+            ),
+        )
+        router.add_api_route(
+            name="Get Search Vector Tile",
+            path="/search/tiles/{z}/{x}/{y}.mvt",
+            response_class=Response,
+            responses={200: {"content": {MVT_MEDIA_TYPE: {}}}},
+            methods=["GET"],
+            endpoint=create_endpoint(self.client.get_search_tile, SearchTileRequest),
+        )
+        app.include_router(router, tags=["Vector Tiles"])
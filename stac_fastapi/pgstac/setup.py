@@ -41,6 +41,7 @@ extra_reqs = {
     "docs": ["mkdocs", "mkdocs-material", "pdocs"],
     "server": ["uvicorn[standard]>=0.12.0,<0.14.0"],
     "awslambda": ["mangum"],
+    "arrow": ["pyarrow"],
 }
 
 
@@ -1,27 +1,56 @@
 """FastAPI application using PGStac."""
 from stac_fastapi.api.app import StacApi
 from stac_fastapi.extensions.core import (
+    ContextExtension,
     FieldsExtension,
     QueryExtension,
     SortExtension,
     TransactionExtension,
 )
+from stac_fastapi.extensions.third_party import (
+    BulkTransactionExtension,
+    ExportExtension,
+    IngestExtension,
+    MetricsExtension,
+    VectorTilesExtension,
+)
+from stac_fastapi.pgstac.cache import cache_metrics
+from stac_fastapi.pgstac.coalesce import close_write_coalescer
 from stac_fastapi.pgstac.config import Settings
 from stac_fastapi.pgstac.core import CoreCrudClient
-from stac_fastapi.pgstac.db import close_db_connection, connect_to_db
-from stac_fastapi.pgstac.transactions import TransactionsClient
+from stac_fastapi.pgstac.db import close_db_connection, connect_to_db, pool_metrics
+from stac_fastapi.pgstac.export import ExportClient
+from stac_fastapi.pgstac.ingest import (
+    IngestClient,
+    start_ingest_queue,
+    stop_ingest_queue,
+)
+from stac_fastapi.pgstac.tiles import VectorTilesClient
+from stac_fastapi.pgstac.transactions import (
+    BulkTransactionsClient,
+    TransactionsClient,
+)
 from stac_fastapi.pgstac.types.search import PgstacSearch
 
 settings = Settings()
 
+extensions = [
+    TransactionExtension(client=TransactionsClient),
+    BulkTransactionExtension(client=BulkTransactionsClient()),
+    QueryExtension(),
+    SortExtension(),
+    FieldsExtension(),
+    ContextExtension(),
+    ExportExtension(client=ExportClient(), search_request_model=PgstacSearch),
+    VectorTilesExtension(client=VectorTilesClient()),
+    IngestExtension(client=IngestClient()),
+]
+if settings.enable_metrics:
+    extensions.append(MetricsExtension(collectors=[pool_metrics, cache_metrics]))
+
 api = StacApi(
     settings=settings,
-    extensions=[
-        TransactionExtension(client=TransactionsClient),
-        QueryExtension(),
-        SortExtension(),
-        FieldsExtension(),
-    ],
+    extensions=extensions,
     client=CoreCrudClient(),
     search_request_model=PgstacSearch,
 )
@@ -32,11 +61,14 @@ app = api.app
 async def startup_event():
     """Connect to database on startup."""
     await connect_to_db(app)
+    await start_ingest_queue(app)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection."""
+    await stop_ingest_queue(app)
+    await close_write_coalescer(app)
     await close_db_connection(app)
 
 
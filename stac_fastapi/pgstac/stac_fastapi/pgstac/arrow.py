@@ -0,0 +1,156 @@
+"""Columnar (Arrow IPC and GeoParquet) encoding of search results."""
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import orjson
+from starlette.requests import Request
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/x-parquet"
+COLUMNAR_MEDIA_TYPES = (ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE)
+JSON_MEDIA_TYPES = ("application/json", "application/geo+json")
+
+# Number of rows of the record batches written to arrow streams
+ARROW_BATCH_SIZE = 1024
+
+# Columns built from the top-level members of the items, properties are flattened
+# next to them
+ITEM_COLUMNS = ("id", "collection", "datetime", "geometry", "bbox")
+
+# Search result rows, `geometry` is returned as WKB by the database
+COLUMNAR_SEARCH_QUERY = """
+    SELECT
+        r->>'next' AS next,
+        r->>'prev' AS prev,
+        f->>'id' AS id,
+        f->>'collection' AS collection,
+        stac_datetime(f) AS datetime,
+        ST_AsBinary(stac_geom(f)) AS geometry,
+        f->'bbox' AS bbox,
+        (f->'properties') - 'datetime' AS properties
+    FROM search(:req::text::jsonb) AS r
+    LEFT JOIN LATERAL jsonb_array_elements(r->'features') AS f ON TRUE;
+"""
+
+
+def _import_pyarrow():
+    """Import pyarrow, which is an optional dependency."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise RuntimeError(
+            "pyarrow must be installed to encode columnar responses, "
+            "install stac-fastapi.pgstac[arrow]"
+        )
+    return pyarrow
+
+
+@lru_cache(maxsize=None)
+def columnar_available() -> bool:
+    """Check if pyarrow, which encodes the columnar responses, is installed."""
+    try:
+        _import_pyarrow()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _accepted_media_types(request: Request) -> Iterator[Tuple[str, float]]:
+    """Parse the media types of the Accept header and their q-values."""
+    for value in request.headers.get("accept", "").split(","):
+        media_type, *params = value.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+        yield media_type.strip().lower(), quality
+
+
+def columnar_media_type(request: Request) -> Optional[str]:
+    """Get the columnar media type preferred by the Accept header, if any.
+
+    Media types are ranked by q-value, then explicit media types are preferred to
+    wildcards, which select JSON, then the first listed wins. Responses fall back to
+    JSON when pyarrow isn't installed.
+    """
+    if not columnar_available():
+        return None
+    preferred = None
+    preferred_rank = (0.0, 0)
+    for media_type, quality in _accepted_media_types(request):
+        if media_type in COLUMNAR_MEDIA_TYPES or media_type in JSON_MEDIA_TYPES:
+            rank = (quality, 2)
+        elif media_type in ("application/*", "*/*"):
+            rank = (quality, 1)
+        else:
+            continue
+        if quality > 0 and rank > preferred_rank:
+            preferred, preferred_rank = media_type, rank
+    return preferred if preferred in COLUMNAR_MEDIA_TYPES else None
+
+
+def _property_array(pa, values: List[Any]):
+    """Build a typed array from property values, falling back to json text."""
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pa.array(
+            [
+                None if value is None else orjson.dumps(value).decode()
+                for value in values
+            ],
+            type=pa.string(),
+        )
+
+
+def build_table(rows: Sequence[Dict[str, Any]]):
+    """Build an arrow table of items from search result rows.
+
+    The geometry column holds WKB and is described by GeoParquet metadata.
+    """
+    pa = _import_pyarrow()
+
+    keys: Dict[str, None] = {}
+    for row in rows:
+        keys.update(dict.fromkeys(row["properties"] or ()))
+
+    columns = {
+        "id": pa.array([row["id"] for row in rows], type=pa.string()),
+        "collection": pa.array([row["collection"] for row in rows], type=pa.string()),
+        "datetime": pa.array(
+            [row["datetime"] for row in rows], type=pa.timestamp("us", tz="UTC")
+        ),
+        "geometry": pa.array([row["geometry"] for row in rows], type=pa.binary()),
+        "bbox": pa.array([row["bbox"] for row in rows], type=pa.list_(pa.float64())),
+    }
+    for key in keys:
+        name = f"properties.{key}" if key in ITEM_COLUMNS else key
+        columns[name] = _property_array(
+            pa, [(row["properties"] or {}).get(key) for row in rows]
+        )
+
+    geo = {
+        "version": "1.0.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}},
+    }
+    return pa.table(columns).replace_schema_metadata({"geo": orjson.dumps(geo)})
+
+
+def encode_table(table, media_type: str) -> bytes:
+    """Serialize an arrow table as an arrow stream or a parquet file."""
+    pa = _import_pyarrow()
+    sink = pa.BufferOutputStream()
+    if media_type == PARQUET_MEDIA_TYPE:
+        pa.parquet.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=ARROW_BATCH_SIZE):
+                writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,75 @@
+"""Response caches."""
+from typing import Iterator
+
+from fastapi import FastAPI
+
+from stac_fastapi.types.cache import ResponseCache, SingleFlight, TTLCache
+from stac_fastapi.types.metrics import Sample, cache_samples
+
+# Tag of cached searches which aren't restricted to some collections
+ALL_COLLECTIONS = "*"
+
+
+def get_collection_cache(app: FastAPI) -> TTLCache:
+    """Get the collection cache of the application, creating it on first use."""
+    cache = getattr(app.state, "collection_cache", None)
+    if cache is None:
+        settings = app.state.settings
+        cache = app.state.collection_cache = TTLCache(
+            ttl=settings.collection_cache_ttl,
+            maxsize=settings.collection_cache_maxsize,
+        )
+    return cache
+
+
+def get_search_cache(app: FastAPI) -> ResponseCache:
+    """Get the search result cache of the application, creating it on first use.
+
+    Search results are cached without the links of the response, and sized by their
+    body.
+    """
+    cache = getattr(app.state, "search_cache", None)
+    if cache is None:
+        settings = app.state.settings
+        cache = app.state.search_cache = ResponseCache(
+            ttl=settings.search_cache_ttl,
+            maxsize=settings.search_cache_maxsize,
+            maxbytes=settings.search_cache_max_bytes,
+            sizeof=lambda result: len(result.body),
+        )
+    return cache
+
+
+def get_search_flights(app: FastAPI) -> SingleFlight:
+    """Get the searches in flight of the application, creating them on first use."""
+    flights = getattr(app.state, "search_flights", None)
+    if flights is None:
+        flights = app.state.search_flights = SingleFlight()
+    return flights
+
+
+def get_count_cache(app: FastAPI) -> TTLCache:
+    """Get the cache of the number of items matched by searches, creating it on first use."""
+    cache = getattr(app.state, "count_cache", None)
+    if cache is None:
+        settings = app.state.settings
+        cache = app.state.count_cache = TTLCache(
+            ttl=settings.count_cache_ttl,
+            maxsize=settings.count_cache_maxsize,
+        )
+    return cache
+
+
+def invalidate_searches(app: FastAPI, collection_id: str) -> None:
+    """Remove the cached searches which may include items of a collection."""
+    cache = get_search_cache(app)
+    cache.invalidate_tag(collection_id)
+    cache.invalidate_tag(ALL_COLLECTIONS)
+
+
+def cache_metrics(app: FastAPI) -> Iterator[Sample]:
+    """Collect the lookups of the caches of the application, for the metrics extension."""
+    for name in ("collection_cache", "search_cache", "search_flights", "count_cache"):
+        cache = getattr(app.state, name, None)
+        if cache is not None:
+            yield from cache_samples(name, cache)
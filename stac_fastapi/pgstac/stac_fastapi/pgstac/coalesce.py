@@ -0,0 +1,125 @@
+"""Coalescing of concurrent item writes."""
+import asyncio
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Optional, Set, Tuple
+
+import attr
+from asyncpg import Connection, exceptions, pool
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from stac_fastapi.pgstac.db import translate_pgstac_errors
+from stac_fastapi.types.errors import StacApiError
+
+# Pending write: pgstac function, item as json and the future of the caller
+Write = Tuple[str, str, asyncio.Future]
+
+
+@attr.s
+class WriteCoalescer:
+    """Group concurrent item writes into a single transaction.
+
+    Writes are buffered until `max_items` are pending or for at most `max_delay`
+    seconds, then run in one transaction. Consecutive creates are inserted by a single
+    `create_items` call, falling back to one savepoint per item if it fails so each
+    caller gets the outcome of its own item.
+
+    Attributes:
+        max_delay: maximum number of seconds a write is buffered.
+        max_items: number of pending writes flushed at once.
+    """
+
+    max_delay: float = attr.ib(default=0.005)
+    max_items: int = attr.ib(default=100)
+    _pending: List[Write] = attr.ib(factory=list, init=False, repr=False)
+    _timer: Optional[asyncio.TimerHandle] = attr.ib(
+        default=None, init=False, repr=False
+    )
+    _tasks: Set[asyncio.Task] = attr.ib(factory=set, init=False, repr=False)
+
+    async def submit(self, pool: pool, func: str, item: BaseModel) -> None:
+        """Write an item with a pgstac function, along with other pending writes."""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((func, item.json(exclude_unset=True), future))
+        if len(self._pending) >= self.max_items:
+            self._flush(pool)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush, pool)
+        await future
+
+    async def close(self, pool: pool) -> None:
+        """Write the pending items and wait for the writes in progress."""
+        self._flush(pool)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _flush(self, pool: pool) -> None:
+        """Start writing the pending items."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._write(pool, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _run(conn: Connection, func: str, data: str) -> Optional[Exception]:
+        """Run a write in a savepoint, returning its error."""
+        try:
+            with translate_pgstac_errors():
+                async with conn.transaction():
+                    await conn.execute(f"SELECT {func}($1::text::jsonb);", data)
+        except (StacApiError, exceptions.PostgresError) as e:
+            return e
+        return None
+
+    async def _write(self, pool: pool, batch: List[Write]) -> None:
+        """Write a batch of items in a transaction and resolve their futures."""
+        errors: List[Optional[Exception]] = []
+        try:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    for func, run in groupby(batch, key=itemgetter(0)):
+                        data = [write[1] for write in run]
+                        if func == "create_item" and len(data) > 1:
+                            error = await self._run(
+                                conn, "create_items", f"[{','.join(data)}]"
+                            )
+                            if error is None:
+                                errors.extend([None] * len(data))
+                                continue
+                        for item in data:
+                            errors.append(await self._run(conn, func, item))
+        except Exception as e:
+            errors = [e] * len(batch)
+
+        for (_, _, future), error in zip(batch, errors):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+
+def get_write_coalescer(app: FastAPI) -> WriteCoalescer:
+    """Get the write coalescer of the application, creating it on first use."""
+    coalescer = getattr(app.state, "write_coalescer", None)
+    if coalescer is None:
+        settings = app.state.settings
+        coalescer = app.state.write_coalescer = WriteCoalescer(
+            max_delay=settings.write_coalescing_max_delay,
+            max_items=settings.write_coalescing_max_items,
+        )
+    return coalescer
+
+
+async def close_write_coalescer(app: FastAPI) -> None:
+    """Finish the writes of the write coalescer, if created."""
+    coalescer = getattr(app.state, "write_coalescer", None)
+    if coalescer is not None:
+        await coalescer.close(app.state.writepool)
@@ -1,6 +1,7 @@
 """Postgres API configuration."""
+from typing import Optional
 
-from stac_fastapi.types.config import ApiSettings
+from stac_fastapi.types.config import ApiSettings, CountStrategy
 
 
 class Settings(ApiSettings):
@@ -13,6 +14,33 @@ class Settings(ApiSettings):
         postgres_host_writer: hostname for the writer connection.
         postgres_port: database port.
         postgres_dbname: database name.
+        search_passthrough: return the `search()` result to the client without
+            decoding it into python objects.
+        collection_cache_ttl: seconds collection responses are cached for, 0
+            disables the cache.
+        collection_cache_maxsize: maximum number of cached collection responses.
+        search_cache_ttl: seconds search results are cached for with
+            `search_passthrough`, 0 (the default) disables the cache. Results are
+            cached without the links of the response, which are built for each
+            request.
+        search_cache_maxsize: maximum number of cached search results.
+        search_cache_max_bytes: maximum total size of the cached search results.
+        search_single_flight: run concurrent identical searches once, sharing the
+            response between their callers.
+        write_coalescing: group concurrent item creates and updates in a single
+            transaction.
+        write_coalescing_max_delay: maximum number of seconds a write waits for
+            others to be grouped with.
+        write_coalescing_max_items: maximum number of writes grouped together.
+        ingest_queue_path: directory of the ingest queue. When set, item creations
+            are acknowledged with `202 Accepted` once queued on disk and loaded in
+            the background.
+        ingest_batch_size: maximum number of queued items loaded per transaction.
+        ingest_poll_interval: seconds between checks for newly queued items.
+        ingest_status_retention: seconds the status of a completed ingest job is
+            kept, forever when 0.
+        count_strategy: how the number of matching items is computed, estimated by
+            default.
     """
 
     postgres_user: str
@@ -31,6 +59,27 @@ class Settings(ApiSettings):
     db_max_queries: int = 50000
     db_max_inactive_conn_lifetime: float = 300
 
+    search_passthrough: bool = True
+
+    collection_cache_ttl: float = 60
+    collection_cache_maxsize: int = 256
+
+    search_cache_ttl: float = 0
+    search_cache_maxsize: int = 1024
+    search_cache_max_bytes: int = 64 * 1024 * 1024
+    search_single_flight: bool = True
+
+    write_coalescing: bool = False
+    write_coalescing_max_delay: float = 0.005
+    write_coalescing_max_items: int = 100
+
+    ingest_queue_path: Optional[str] = None
+    ingest_batch_size: int = 1000
+    ingest_poll_interval: float = 1.0
+    ingest_status_retention: float = 7 * 24 * 3600
+
+    count_strategy: CountStrategy = CountStrategy.estimated
+
     testing: bool = False
 
     @property
@@ -1,21 +1,48 @@
 """Item crud client."""
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import urljoin
 
 import attr
 import orjson
+from asyncpg import Connection
 from buildpg import render
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from stac_pydantic import Collection, Item, ItemCollection
 from stac_pydantic.api import ConformanceClasses, LandingPage
 from stac_pydantic.shared import Link, MimeTypes, Relations
 
+from stac_fastapi.extensions.core import ContextExtension
+from stac_fastapi.pgstac.arrow import (
+    COLUMNAR_SEARCH_QUERY,
+    build_table,
+    columnar_media_type,
+    encode_table,
+)
+from stac_fastapi.pgstac.cache import (
+    ALL_COLLECTIONS,
+    get_collection_cache,
+    get_search_cache,
+    get_search_flights,
+)
+from stac_fastapi.pgstac.count import count_matched
+from stac_fastapi.pgstac.db import acquire, statement_timeout, translate_pgstac_errors
 from stac_fastapi.pgstac.models.links import CollectionLinks, ItemLinks, PagingLinks, merge_params
 from stac_fastapi.pgstac.types.search import PgstacSearch
 from stac_fastapi.types.core import BaseCoreClient
 from stac_fastapi.types.errors import NotFoundError
+from stac_fastapi.types.timings import SERIALIZATION, timed
 
 NumType = Union[float, int]
 
@@ -23,6 +50,61 @@ from stac_fastapi.pgstac.config import Settings
 
 settings = Settings()
 
+# Placeholders substituted in the database when rendering item links in passthrough mode
+COLLECTION_PLACEHOLDER = "{collectionId}"
+ITEM_PLACEHOLDER = "{itemId}"
+
+SEARCH_PASSTHROUGH_QUERY = """
+    SELECT
+        r->>'next' AS next,
+        r->>'prev' AS prev,
+        coalesce(jsonb_array_length(r->'features'), 0) AS returned,
+        CASE WHEN :links::text IS NULL THEN r - '{next,prev,links}'::text[]
+        ELSE jsonb_set(
+            r - '{next,prev,links}'::text[],
+            '{features}',
+            coalesce((
+                SELECT jsonb_agg(f || jsonb_build_object('links', (
+                    SELECT jsonb_agg(l || jsonb_build_object('href', replace(replace(
+                        l->>'href',
+                        '{collectionId}', coalesce(f->>'collection', '')),
+                        '{itemId}', f->>'id'
+                    )) ORDER BY ln)
+                    FROM jsonb_array_elements(:links::text::jsonb)
+                        WITH ORDINALITY AS ls(l, ln)
+                )) ORDER BY fn)
+                FROM jsonb_array_elements(r->'features') WITH ORDINALITY AS fs(f, fn)
+            ), '[]'::jsonb)
+        ) END::text AS body
+    FROM search(:req::text::jsonb) AS r;
+"""
+
+
+class SearchResult(NamedTuple):
+    """Result of a search, shared by identical searches.
+
+    Attributes:
+        body: the FeatureCollection as text, without `links` and `context`.
+        next: token of the next page.
+        prev: token of the previous page.
+        context: context of the search, if the context extension is enabled.
+    """
+
+    body: str
+    next: Optional[str]
+    prev: Optional[str]
+    context: Optional[Dict]
+
+
+def splice_members(body: str, **members: Any) -> bytes:
+    """Add top-level members to a serialized json object without decoding it."""
+    extra = b"".join(
+        b"," + orjson.dumps(key) + b":" + orjson.dumps(value)
+        for key, value in members.items()
+    )
+    return body[:-1].encode() + extra + b"}"
+
+
 @attr.s
 class CoreCrudClient(BaseCoreClient):
     """Client for core endpoints defined by stac."""
@@ -44,7 +126,32 @@ class CoreCrudClient(BaseCoreClient):
         request._url = merge_params(urljoin(request._base_url, request.scope["path"]), request.query_params)
         return request
 
-    async def landing_page(self, **kwargs) -> ORJSONResponse:
+    @staticmethod
+    async def _single_flight(
+        request, key: Tuple, render: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Run a call, sharing its result with the identical requests in flight."""
+        if not request.app.state.settings.search_single_flight:
+            return await render()
+        return await get_search_flights(request.app).run(key, render)
+
+    @staticmethod
+    async def _cached_response(
+        request, key: Tuple, render: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """Serve a response from the collection cache, rendering it on a miss."""
+        cache = get_collection_cache(request.app)
+        body = cache.get(key)
+        if body is None:
+            # A write clearing the cache while rendering makes the render stale
+            generation = cache.generation
+            value = await render()
+            with timed(request, SERIALIZATION):
+                body = ORJSONResponse(value).body
+            cache.set(key, body, generation=generation)
+        return Response(body, media_type=MimeTypes.json)
+
+    async def landing_page(self, **kwargs) -> Response:
         """Landing page.
 
         Called with `GET /`.
@@ -52,8 +159,16 @@ class CoreCrudClient(BaseCoreClient):
         Returns:
             API landing page, serving as an entry point to the API.
         """
-        request = kwargs["request"]
         request = await self.modify_urls(kwargs["request"])
+        return await self._cached_response(
+            request,
+            ("landing_page", request._base_url),
+            lambda: self._landing_page(request=request),
+        )
+
+    async def _landing_page(self, **kwargs) -> Dict:
+        """Render the landing page."""
+        request = kwargs["request"]
         landing_page = LandingPage(
             title="Arturo STAC API",
             description="Arturo raster datastore",
@@ -97,7 +212,7 @@ class CoreCrudClient(BaseCoreClient):
                 coll_link.rel = Relations.child
                 coll_link.title = coll.title
                 landing_page.links.append(coll_link)
-        return ORJSONResponse(landing_page.dict(exclude_none=True))
+        return landing_page.dict(exclude_none=True)
 
     async def conformance(self, **kwargs) -> ConformanceClasses:
         """Conformance classes."""
@@ -114,12 +229,14 @@ class CoreCrudClient(BaseCoreClient):
 
         pool = request.app.state.readpool
 
-        async with pool.acquire() as conn:
-            collections = await conn.fetchval(
-                """
-                SELECT * FROM all_collections();
-                """
-            )
+        with translate_pgstac_errors():
+            async with acquire(request, pool) as conn:
+                collections = await conn.fetchval(
+                    """
+                    SELECT * FROM all_collections();
+                    """,
+                    timeout=statement_timeout(request),
+                )
         linked_collections = []
         if collections is not None and len(collections) > 0:
             for c in collections:
@@ -130,14 +247,23 @@ class CoreCrudClient(BaseCoreClient):
                 linked_collections.append(coll)
         return linked_collections
 
-    async def all_collections(self, **kwargs) -> ORJSONResponse:
+    async def all_collections(self, **kwargs) -> Response:
         """Get all collections."""
+        request = await self.modify_urls(kwargs["request"])
+        return await self._cached_response(
+            request,
+            ("all_collections", request._base_url),
+            lambda: self._all_collections(request=request),
+        )
+
+    async def _all_collections(self, **kwargs) -> List[Dict]:
+        """Render all collections."""
         collections = await self._all_collections_func(**kwargs)
         if collections is None or len(collections) < 1:
-            return ORJSONResponse([])
-        return ORJSONResponse([c.dict(exclude_none=True) for c in collections])
+            return []
+        return [c.dict(exclude_none=True) for c in collections]
 
-    async def get_collection(self, id: str, **kwargs) -> ORJSONResponse:
+    async def get_collection(self, id: str, **kwargs) -> Response:
         """Get collection by id.
 
         Called with `GET /collections/{collectionId}`.
@@ -149,23 +275,65 @@ class CoreCrudClient(BaseCoreClient):
             Collection.
         """
         request = await self.modify_urls(kwargs["request"])
+        return await self._cached_response(
+            request,
+            ("collection", id, request._base_url),
+            lambda: self._get_collection(id, request=request),
+        )
 
-        pool = kwargs["request"].app.state.readpool
-        async with pool.acquire() as conn:
-            q, p = render(
-                """
-                SELECT * FROM get_collection(:id::text);
-                """,
-                id=id,
-            )
-            collection = await conn.fetchval(q, *p)
+    async def _get_collection(self, id: str, **kwargs) -> Dict:
+        """Render a collection."""
+        request = kwargs["request"]
+
+        pool = request.app.state.readpool
+        with translate_pgstac_errors():
+            async with acquire(request, pool) as conn:
+                q, p = render(
+                    """
+                    SELECT * FROM get_collection(:id::text);
+                    """,
+                    id=id,
+                )
+                collection = await conn.fetchval(
+                    q, *p, timeout=statement_timeout(request)
+                )
         if collection is None:
             raise NotFoundError
         links = await CollectionLinks(collection_id=id, request=request).get_links()
         collection["links"] = links
-        return ORJSONResponse(
-            Collection.construct(**collection).dict(exclude_none=True)
-        )
+        return Collection.construct(**collection).dict(exclude_none=True)
+
+    async def _context(
+        self,
+        search_request: PgstacSearch,
+        returned: int,
+        conn: Connection,
+        **kwargs,
+    ) -> Optional[Dict]:
+        """Context of a search response, if the context extension is enabled.
+
+        Items are counted on the connection of the search, so the context doesn't
+        wait for a second connection of the pool.
+
+        Args:
+            search_request: search request parameters.
+            returned: number of items in the response.
+            conn: connection which ran the search.
+
+        Returns:
+            The context, with the number of matching items counted with the
+            configured strategy.
+        """
+        if not self.extension_is_enabled(ContextExtension):
+            return None
+        request = kwargs["request"]
+        return {
+            "returned": returned,
+            "limit": search_request.limit,
+            "matched": await count_matched(
+                request, search_request, timeout=statement_timeout(request), conn=conn
+            ),
+        }
 
     async def _search_base(
         self, search_request: PgstacSearch, **kwargs
@@ -187,20 +355,24 @@ class CoreCrudClient(BaseCoreClient):
         # pool = kwargs["request"].app.state.readpool
         req = search_request.json(exclude_none=True)
 
-        async with pool.acquire() as conn:
-            q, p = render(
-                """
-                SELECT * FROM search(:req::text::jsonb);
-                """,
-                req=req,
-            )
-            items = await conn.fetchval(q, *p)
+        with translate_pgstac_errors():
+            async with acquire(request, pool) as conn:
+                q, p = render(
+                    """
+                    SELECT * FROM search(:req::text::jsonb);
+                    """,
+                    req=req,
+                )
+                items = await conn.fetchval(q, *p, timeout=statement_timeout(request))
+                if not items.get("features"):
+                    raise NotFoundError("No features found")
+                context = await self._context(
+                    search_request, len(items["features"]), conn, request=request
+                )
         next = items.pop("next", None)
         prev = items.pop("prev", None)
         collection = ItemCollection.construct(**items)
         cleaned_features = []
-        if collection.features is None or len(collection.features) == 0:
-            raise NotFoundError("No features found")
 
         for feature in collection.features:
             feature = Item.construct(**feature)
@@ -227,11 +399,133 @@ class CoreCrudClient(BaseCoreClient):
             next=next,
             prev=prev,
         ).get_links()
+        collection.context = context
         return collection
 
+    async def _search_passthrough(
+        self, search_request: PgstacSearch, **kwargs
+    ) -> SearchResult:
+        """Run a search and return the serialized result.
+
+        The jsonb returned by `search()` is cast to text in the database so it is
+        never decoded on the python side. Item links are rendered in the same
+        statement from a template built with `ItemLinks`.
+
+        Args:
+            search_request: search request parameters.
+
+        Returns:
+            The FeatureCollection as text without `links`, the next and the prev
+            tokens and the context.
+        """
+        request = await self.modify_urls(kwargs["request"])
+
+        pool = request.app.state.readpool
+        req = search_request.json(exclude_none=True)
+
+        item_links = None
+        if "links" not in search_request.fields.exclude:
+            template = ItemLinks(
+                collection_id=COLLECTION_PLACEHOLDER,
+                item_id=ITEM_PLACEHOLDER,
+                request=request,
+            ).create_links()
+            item_links = orjson.dumps(
+                [link.dict(exclude_none=True) for link in template]
+            ).decode()
+
+        with translate_pgstac_errors():
+            async with acquire(request, pool) as conn:
+                q, p = render(SEARCH_PASSTHROUGH_QUERY, req=req, links=item_links)
+                result = await conn.fetchrow(q, *p, timeout=statement_timeout(request))
+                if result is None or result["returned"] == 0:
+                    raise NotFoundError("No features found")
+                context = await self._context(
+                    search_request, result["returned"], conn, request=request
+                )
+        return SearchResult(result["body"], result["next"], result["prev"], context)
+
+    async def _search_result(
+        self, search_request: PgstacSearch, **kwargs
+    ) -> SearchResult:
+        """Run a search through the search cache and the searches in flight.
+
+        Identical searches share their result, each caller builds the links of its
+        own response.
+
+        Args:
+            search_request: search request parameters.
+
+        Returns:
+            The result of the search.
+        """
+        request = kwargs["request"]
+        # The item links of the body are built from the base url
+        key = (request._base_url, search_request.cache_key())
+        cache = get_search_cache(request.app)
+        if cache.enabled:
+            result = cache.get(key)
+            if result is not None:
+                return result
+
+        async def run() -> SearchResult:
+            generation = cache.generation
+            result = await self._search_passthrough(search_request, **kwargs)
+            cache.set(
+                key,
+                result,
+                tags=search_request.collections or [ALL_COLLECTIONS],
+                generation=generation,
+            )
+            return result
+
+        return await self._single_flight(request, key, run)
+
+    async def _search_columnar(
+        self, search_request: PgstacSearch, media_type: str, **kwargs
+    ) -> Response:
+        """Run a search and encode the items column-wise.
+
+        Called for the `application/vnd.apache.arrow.stream` and
+        `application/x-parquet` media types. Paging links of GET requests are sent
+        in the `Link` header.
+
+        Args:
+            search_request: search request parameters.
+            media_type: columnar media type of the response.
+
+        Returns:
+            The items as an arrow stream or a GeoParquet file.
+        """
+        request = await self.modify_urls(kwargs["request"])
+
+        pool = request.app.state.readpool
+        req = search_request.json(exclude_none=True)
+        with translate_pgstac_errors():
+            async with acquire(request, pool) as conn:
+                q, p = render(COLUMNAR_SEARCH_QUERY, req=req)
+                rows = await conn.fetch(q, *p, timeout=statement_timeout(request))
+        items = [row for row in rows if row["id"] is not None]
+        if not items:
+            raise NotFoundError("No features found")
+
+        headers = {}
+        if request.method == "GET":
+            paging = PagingLinks(
+                request=request, next=rows[0]["next"], prev=rows[0]["prev"]
+            )
+            links = [link for link in (paging.link_next(), paging.link_prev()) if link]
+            if links:
+                headers["Link"] = ", ".join(
+                    f'<{link.href}>; rel="{link.rel}"' for link in links
+                )
+        with timed(request, SERIALIZATION):
+            content = encode_table(build_table(items), media_type)
+        return Response(content, media_type=media_type, headers=headers)
+
     async def item_collection(
         self, id: str, limit: int = 10, token: str = None, **kwargs
-    ) -> ORJSONResponse:
+    ) -> Response:
         """Get all items from a specific collection.
 
         Called with `GET /collections/{collectionId}/items`
@@ -245,33 +539,73 @@ class CoreCrudClient(BaseCoreClient):
             An ItemCollection.
         """
         req = PgstacSearch(collections=[id], limit=limit, token=token)
-        collection = await self._search_base(req, **kwargs)
-        links = await CollectionLinks(
-            collection_id=id, request=kwargs["request"]
-        ).get_links(extra_links=collection.links)
-        collection.links = links
-        return ORJSONResponse(collection.dict(exclude_none=True))
-
-    async def get_item(
-        self, item_id: str, collection_id: str, **kwargs
-    ) -> ORJSONResponse:
+        request = kwargs["request"]
+        media_type = columnar_media_type(request)
+        if media_type:
+            return await self._search_columnar(req, media_type, **kwargs)
+
+        request = await self.modify_urls(request)
+        if not request.app.state.settings.search_passthrough:
+            collection = await self._search_base(req, **kwargs)
+            collection.links = await CollectionLinks(
+                collection_id=id, request=request
+            ).get_links(extra_links=collection.links)
+            with timed(request, SERIALIZATION):
+                return ORJSONResponse(collection.dict(exclude_none=True))
+        result = await self._search_result(req, **kwargs)
+        paging_links = await PagingLinks(
+            request=request, next=result.next, prev=result.prev
+        ).get_links()
+        links = await CollectionLinks(collection_id=id, request=request).get_links(
+            extra_links=paging_links
+        )
+        with timed(request, SERIALIZATION):
+            body = splice_members(
+                result.body,
+                links=[link.dict(exclude_none=True) for link in links],
+                **({"context": result.context} if result.context else {}),
+            )
+        return Response(body, media_type=MimeTypes.json)
+
+    async def get_item(self, item_id: str, collection_id: str, **kwargs) -> Response:
         """Get item by id.
 
         Called with `GET /collections/{collectionId}/items/{itemId}`.
 
         Args:
-            id: Id of the item.
+            item_id: Id of the item.
+            collection_id: Id of the collection holding the item.
 
         Returns:
             Item.
         """
-        req = PgstacSearch(ids=[item_id], limit=1)
-        collection = await self._search_base(req, **kwargs)
-        return ORJSONResponse(collection.features[0])
+        request = await self.modify_urls(kwargs["request"])
 
-    async def post_search(
-        self, search_request: PgstacSearch, **kwargs
-    ) -> ORJSONResponse:
+        pool = request.app.state.readpool
+        with translate_pgstac_errors():
+            async with acquire(request, pool) as conn:
+                q, p = render(
+                    """
+                    SELECT (get_item(:item_id::text, :collection_id::text) - 'links')::text;
+                    """,
+                    item_id=item_id,
+                    collection_id=collection_id,
+                )
+                item = await conn.fetchval(q, *p, timeout=statement_timeout(request))
+        if item is None:
+            raise NotFoundError(
+                f"Item {item_id} not found in collection {collection_id}"
+            )
+        links = await ItemLinks(
+            collection_id=collection_id, item_id=item_id, request=request
+        ).get_links()
+        with timed(request, SERIALIZATION):
+            body = splice_members(
+                item, links=[link.dict(exclude_none=True) for link in links]
+            )
+        return Response(body, media_type=MimeTypes.json)
+
+    async def post_search(self, search_request: PgstacSearch, **kwargs) -> Response:
         """Cross catalog search (POST).
 
         Called with `POST /search`.
@@ -282,8 +616,27 @@ class CoreCrudClient(BaseCoreClient):
         Returns:
             ItemCollection containing items which match the search criteria.
         """
-        collection = await self._search_base(search_request, **kwargs)
-        return ORJSONResponse(collection.dict(exclude_none=True))
+        request = kwargs["request"]
+        media_type = columnar_media_type(request)
+        if media_type:
+            return await self._search_columnar(search_request, media_type, **kwargs)
+
+        request = await self.modify_urls(request)
+        if not request.app.state.settings.search_passthrough:
+            collection = await self._search_base(search_request, **kwargs)
+            with timed(request, SERIALIZATION):
+                return ORJSONResponse(collection.dict(exclude_none=True))
+        result = await self._search_result(search_request, **kwargs)
+        links = await PagingLinks(
+            request=request, next=result.next, prev=result.prev
+        ).get_links()
+        with timed(request, SERIALIZATION):
+            body = splice_members(
+                result.body,
+                links=[link.dict(exclude_none=True) for link in links],
+                **({"context": result.context} if result.context else {}),
+            )
+        return Response(body, media_type=MimeTypes.json)
 
     async def get_search(
         self,
@@ -0,0 +1,107 @@
+"""Number of items matched by searches."""
+from typing import Optional, Tuple
+
+from asyncpg import Connection
+from buildpg import render
+from starlette.requests import Request
+
+from stac_fastapi.pgstac.cache import get_count_cache
+from stac_fastapi.pgstac.db import acquire, translate_pgstac_errors
+from stac_fastapi.pgstac.types.search import PgstacSearch
+from stac_fastapi.types.config import CountStrategy
+
+# Estimate of the number of items from the statistics of the partitions
+PARTITIONS_ESTIMATE_QUERY = """
+    SELECT coalesce(sum(greatest(est_cnt, 0)), 0)::bigint FROM all_items_partitions;
+"""
+
+
+async def _where(
+    conn: Connection, search_request: PgstacSearch, timeout: Optional[float]
+) -> str:
+    """Build the WHERE clause of a search, quoted by pgstac."""
+    q, p = render(
+        "SELECT search_where(:req::text::jsonb);",
+        req=search_request.json(exclude_none=True),
+    )
+    return await conn.fetchval(q, *p, timeout=timeout)
+
+
+async def _estimate(conn: Connection, where: str, timeout: Optional[float]) -> int:
+    """Estimate the number of items matching a WHERE clause."""
+    if where.strip() == "TRUE":
+        return await conn.fetchval(PARTITIONS_ESTIMATE_QUERY, timeout=timeout)
+    plan = await conn.fetchval(
+        f"EXPLAIN (FORMAT JSON) SELECT 1 FROM items WHERE {where}", timeout=timeout
+    )
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def _count(conn: Connection, where: str, timeout: Optional[float]) -> int:
+    """Count the items matching a WHERE clause."""
+    return await conn.fetchval(
+        f"SELECT count(*) FROM items WHERE {where}", timeout=timeout
+    )
+
+
+async def _matched(
+    conn: Connection,
+    search_request: PgstacSearch,
+    strategy: CountStrategy,
+    exact_threshold: int,
+    timeout: Optional[float],
+) -> Tuple[int, bool]:
+    """Count or estimate the items matched by a search, and whether it was counted."""
+    where = await _where(conn, search_request, timeout)
+    if strategy == CountStrategy.estimated:
+        estimate = await _estimate(conn, where, timeout)
+        if estimate >= exact_threshold:
+            return estimate, False
+    return await _count(conn, where, timeout), True
+
+
+async def count_matched(
+    request: Request,
+    search_request: PgstacSearch,
+    timeout: Optional[float] = None,
+    conn: Optional[Connection] = None,
+) -> int:
+    """Get the number of items matched by a search, with the configured strategy.
+
+    The `estimated` strategy reads the statistics of the partitions for searches
+    without any filter, and the row estimate of the query planner otherwise.
+
+    Args:
+        request: the request being served.
+        search_request: search request parameters.
+        timeout: statement timeout of the queries.
+        conn: connection already held by the request, a connection of the read
+            pool is acquired otherwise.
+
+    Returns:
+        The number of matching items, which is approximate if estimated.
+    """
+    settings = request.app.state.settings
+    cache = get_count_cache(request.app)
+    key = search_request.filter_key()
+    if settings.count_strategy == CountStrategy.cached:
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+    args = (
+        search_request,
+        settings.count_strategy,
+        settings.count_exact_threshold,
+        timeout,
+    )
+    with translate_pgstac_errors():
+        if conn is not None:
+            count, counted = await _matched(conn, *args)
+        else:
+            async with acquire(request, request.app.state.readpool) as conn:
+                count, counted = await _matched(conn, *args)
+
+    if counted and settings.count_strategy == CountStrategy.cached:
+        cache.set(key, count)
+    return count
@@ -1,19 +1,25 @@
 """Database connection handling."""
 
-from typing import Dict, Union
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple, Union
 
 import attr
 import orjson
-from asyncpg import exceptions, pool
+from asyncpg import Connection, exceptions, pool
 from buildpg import asyncpg, render
 from fastapi import FastAPI
+from starlette.requests import Request
 
+from stac_fastapi.types import timings
 from stac_fastapi.types.errors import (
     ConflictError,
     DatabaseError,
     ForeignKeyError,
     NotFoundError,
+    QueryTimeoutError,
 )
+from stac_fastapi.types.metrics import Sample
 
 
 async def con_init(conn):
@@ -51,17 +57,94 @@ async def close_db_connection(app: FastAPI) -> None:
     await app.state.writepool.close()
 
 
-async def dbfunc(pool: pool, func: str, arg: Union[str, Dict]):
+@contextmanager
+def translate_pgstac_errors() -> Iterator[None]:
+    """Translate errors raised by pgstac into errors of the api."""
+    try:
+        yield
+    except exceptions.UniqueViolationError as e:
+        raise ConflictError from e
+    except exceptions.NoDataFoundError as e:
+        raise NotFoundError from e
+    except exceptions.NotNullViolationError as e:
+        raise DatabaseError from e
+    except exceptions.ForeignKeyViolationError as e:
+        raise ForeignKeyError from e
+    except (asyncio.TimeoutError, exceptions.QueryCanceledError) as e:
+        raise QueryTimeoutError("Database query exceeded the statement timeout") from e
+
+
+def statement_timeout(request: Request) -> Optional[float]:
+    """Get the statement timeout of the route being served, passed to asyncpg."""
+    return getattr(request.state, "statement_timeout", None)
+
+
+@asynccontextmanager
+async def acquire(request: Request, pool: pool.Pool) -> AsyncIterator[Connection]:
+    """Acquire a connection for a request.
+
+    The time spent waiting for the connection and holding it are added to the
+    `pool_wait` and `db` timings of the request.
+    """
+    with timings.timed(request, timings.POOL_WAIT):
+        conn = await pool.acquire()
+    try:
+        with timings.timed(request, timings.DB):
+            yield conn
+    finally:
+        await pool.release(conn)
+
+
+def pool_metrics(app: FastAPI) -> Iterator[Sample]:
+    """Collect the size and use of the connection pools, for the metrics extension."""
+    for name in ("readpool", "writepool"):
+        db_pool = getattr(app.state, name, None)
+        if db_pool is None:
+            continue
+        labels = {"pool": name}
+        yield Sample(
+            "stac_db_pool_size",
+            db_pool.get_size(),
+            labels,
+            help="Number of open connections of a pool.",
+        )
+        yield Sample(
+            "stac_db_pool_in_use",
+            db_pool.get_size() - db_pool.get_idle_size(),
+            labels,
+            help="Number of connections of a pool in use.",
+        )
+        yield Sample(
+            "stac_db_pool_max_size",
+            db_pool.get_max_size(),
+            labels,
+            help="Maximum number of connections of a pool.",
+        )
+
+
+async def dbfunc(pool: pool, func: str, arg: Union[str, Tuple[str, ...], Dict]):
     """Wrap PLPGSQL Functions.
 
     Keyword arguments:
     pool -- the asyncpg pool to use to connect to the database
     func -- the name of the PostgreSQL function to call
-    arg -- the argument to the PostgreSQL function as either a string
-    or a dict that will be converted into jsonb
+    arg -- the argument to the PostgreSQL function as either a string, a tuple
+    of strings passed as separate text arguments or a dict that will be
+    converted into jsonb
     """
-    try:
-        if isinstance(arg, str):
+    with translate_pgstac_errors():
+        if isinstance(arg, tuple):
+            async with pool.acquire() as conn:
+                params = {f"arg{i}": value for i, value in enumerate(arg)}
+                args = ", ".join(f":{name}::text" for name in params)
+                q, p = render(
+                    f"""
+                        SELECT * FROM {func}({args});
+                        """,
+                    **params,
+                )
+                return await conn.fetchval(q, *p)
+        elif isinstance(arg, str):
             async with pool.acquire() as conn:
                 q, p = render(
                     f"""
@@ -79,14 +162,6 @@ async def dbfunc(pool: pool, func: str, arg: Union[str, Dict]):
                     item=arg.json(exclude_unset=True),
                 )
                 return await conn.fetchval(q, *p)
-    except exceptions.UniqueViolationError as e:
-        raise ConflictError from e
-    except exceptions.NoDataFoundError as e:
-        raise NotFoundError from e
-    except exceptions.NotNullViolationError as e:
-        raise DatabaseError from e
-    except exceptions.ForeignKeyViolationError as e:
-        raise ForeignKeyError from e
 
 
 @attr.s
@@ -0,0 +1,127 @@
+"""Export client."""
+from typing import AsyncIterator, List, Optional
+
+import attr
+import orjson
+from buildpg import render
+from starlette.responses import StreamingResponse
+
+from stac_fastapi.extensions.third_party.export import (
+    NDJSON_MEDIA_TYPE,
+    BaseExportClient,
+)
+from stac_fastapi.pgstac.core import (
+    COLLECTION_PLACEHOLDER,
+    ITEM_PLACEHOLDER,
+    CoreCrudClient,
+)
+from stac_fastapi.pgstac.models.links import ItemLinks
+from stac_fastapi.pgstac.types.search import PgstacSearch
+
+EXPORT_PLAN_QUERY = """
+    SELECT
+        search_where(:req::text::jsonb) AS whereq,
+        CASE WHEN :sortby::text IS NULL THEN NULL
+        ELSE sort(:sortby::text::jsonb) END AS orderby;
+"""
+
+# `where` and `orderby` are built and quoted by pgstac
+EXPORT_QUERY = """
+    SELECT
+        collection_id,
+        id,
+        (filter_jsonb(content, :includes::text[], :excludes::text[]) - 'links')::text
+            AS content
+    FROM items
+    WHERE {where}
+    {orderby}
+"""
+
+
+def _escape(value: Optional[str]) -> str:
+    """Escape a value to be substituted inside a json string."""
+    return orjson.dumps(value or "").decode()[1:-1]
+
+
+@attr.s
+class ExportClient(BaseExportClient):
+    """Stream search results from pgstac.
+
+    Items are read through a server side cursor in a single query, so memory use doesn't
+    depend on the number of matching items and no paging token is involved.
+
+    Attributes:
+        client: core client used to resolve the request urls.
+        prefetch: number of rows fetched per round trip, and written per chunk.
+    """
+
+    client: CoreCrudClient = attr.ib(factory=CoreCrudClient)
+    prefetch: int = attr.ib(default=1000)
+
+    async def export(self, search_request: PgstacSearch, **kwargs) -> StreamingResponse:
+        """Stream all items matching a search as newline delimited GeoJSON.
+
+        Called with `POST /search/export`.
+
+        Args:
+            search_request: search request parameters, `limit` and `token` are ignored.
+
+        Returns:
+            A response streaming one item per line.
+        """
+        request = await self.client.modify_urls(kwargs["request"])
+        pool = request.app.state.readpool
+
+        req = search_request.json(exclude_none=True, exclude={"limit", "token"})
+        sortby = (
+            orjson.dumps(search_request.sortby).decode()
+            if search_request.sortby
+            else None
+        )
+        async with pool.acquire() as conn:
+            q, p = render(EXPORT_PLAN_QUERY, req=req, sortby=sortby)
+            plan = await conn.fetchrow(q, *p)
+
+        includes: List[str] = list(search_request.fields.include or [])
+        if includes and "id" not in includes:
+            includes.append("id")
+        excludes: List[str] = list(search_request.fields.exclude or [])
+        q, p = render(
+            EXPORT_QUERY.format(
+                where=plan["whereq"],
+                orderby=f"ORDER BY {plan['orderby']}" if plan["orderby"] else "",
+            ),
+            includes=includes,
+            excludes=excludes,
+        )
+
+        links = None
+        if "links" not in excludes:
+            template = ItemLinks(
+                collection_id=COLLECTION_PLACEHOLDER,
+                item_id=ITEM_PLACEHOLDER,
+                request=request,
+            ).create_links()
+            links = orjson.dumps(
+                [link.dict(exclude_none=True) for link in template]
+            ).decode()
+
+        async def _lines() -> AsyncIterator[bytes]:
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    chunk = []
+                    async for row in conn.cursor(q, *p, prefetch=self.prefetch):
+                        content = row["content"]
+                        if links is not None:
+                            item_links = links.replace(
+                                COLLECTION_PLACEHOLDER, _escape(row["collection_id"])
+                            ).replace(ITEM_PLACEHOLDER, _escape(row["id"]))
+                            content = f'{content[:-1]},"links":{item_links}}}'
+                        chunk.append(content)
+                        if len(chunk) >= self.prefetch:
+                            yield ("\n".join(chunk) + "\n").encode()
+                            chunk = []
+                    if chunk:
+                        yield ("\n".join(chunk) + "\n").encode()
+
+        return StreamingResponse(_lines(), media_type=NDJSON_MEDIA_TYPE)
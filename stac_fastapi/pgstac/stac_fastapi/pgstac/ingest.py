@@ -0,0 +1,391 @@
+"""Write-behind ingest queue."""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from itertools import groupby, product
+from typing import Dict, List, Optional, Tuple
+
+import attr
+import orjson
+from asyncpg import exceptions, pool
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from stac_fastapi.extensions.third_party.ingest import (
+    BaseIngestClient,
+    IngestJob,
+    IngestJobStatus,
+)
+from stac_fastapi.pgstac.cache import invalidate_searches
+from stac_fastapi.pgstac.db import translate_pgstac_errors
+from stac_fastapi.types.errors import NotFoundError, StacApiError
+
+logger = logging.getLogger("uvicorn")
+
+PENDING = "pending"
+PROCESSING = "processing"
+STATUS = "status"
+
+# Suffix of the files of jobs queued again, which may have been loaded already
+REPLAY = ".replay.json"
+
+# Queued job: file name and content of the job file
+Job = Tuple[str, Dict]
+
+# Single item variants of the bulk functions, used when a batch fails
+ITEM_FUNCS = {"create_items": "create_item", "upsert_items": "upsert_item"}
+
+# Functions loading the jobs queued again, which must not fail on their own writes
+REPLAY_FUNCS = {"create_items": "upsert_items"}
+
+
+def _write_file(path: str, data: bytes) -> None:
+    """Durably and atomically write a file."""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    fd = os.open(os.path.dirname(path), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _error_message(e: Exception) -> str:
+    """Describe the error of a job, with the database error it translates."""
+    error = e.__cause__ or e
+    message = str(error)
+    return f"{type(error).__name__}: {message}" if message else type(error).__name__
+
+
+@attr.s
+class IngestQueue:
+    """Queue of item writes on local disk, drained into pgstac in the background.
+
+    Each job is a file in `<path>/pending`, fsynced before it is acknowledged, so
+    accepted items survive a restart. The consumer claims jobs by moving them to
+    `<path>/processing`, loads them in batches and records their outcome in
+    `<path>/status`. If a batch fails, its jobs are loaded one by one, item by item,
+    so only the jobs with invalid items fail. A job is loaded at least once: jobs
+    claimed by a consumer which stopped before recording them are queued again after
+    `claim_timeout` seconds. Their items may have been written already, so they are
+    created with `upsert_items` when loaded again.
+
+    The status of a job is kept for `status_retention` seconds after it completes.
+
+    Attributes:
+        path: directory of the queue.
+        batch_size: maximum number of items loaded per transaction.
+        poll_interval: seconds between checks for new jobs when the queue is empty.
+        claim_timeout: seconds after which a claimed job is considered abandoned.
+        status_retention: seconds the status of a completed job is kept, forever
+            when 0.
+        prune_interval: seconds between removals of the expired job statuses.
+    """
+
+    path: str = attr.ib()
+    batch_size: int = attr.ib(default=1000)
+    poll_interval: float = attr.ib(default=1.0)
+    claim_timeout: float = attr.ib(default=600)
+    status_retention: float = attr.ib(default=7 * 24 * 3600)
+    prune_interval: float = attr.ib(default=60)
+    _pruned_at: float = attr.ib(default=0, init=False, repr=False)
+    _task: Optional[asyncio.Task] = attr.ib(default=None, init=False, repr=False)
+    _wakeup: Optional[asyncio.Event] = attr.ib(default=None, init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        """Create the directories of the queue."""
+        for name in (PENDING, PROCESSING, STATUS):
+            os.makedirs(os.path.join(self.path, name), exist_ok=True)
+
+    def _job_path(self, directory: str, job_id: str, replay: bool = False) -> str:
+        """Get the path of a job file."""
+        return os.path.join(
+            self.path, directory, f"{job_id}{REPLAY}" if replay else f"{job_id}.json"
+        )
+
+    def _requeue(self, name: str) -> None:
+        """Move a claimed job file back to the queue, to be loaded again."""
+        replay_name = name if name.endswith(REPLAY) else f"{name[:-5]}{REPLAY}"
+        os.replace(
+            os.path.join(self.path, PROCESSING, name),
+            os.path.join(self.path, PENDING, replay_name),
+        )
+
+    def _put(self, func: str, items: List[str]) -> str:
+        """Write a job to the queue, returning its id."""
+        # Jobs are loaded in the order of their ids
+        job_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:12]}"
+        data = b'{"id":%b,"func":%b,"items":[%b]}' % (
+            orjson.dumps(job_id),
+            orjson.dumps(func),
+            ",".join(items).encode(),
+        )
+        _write_file(self._job_path(PENDING, job_id), data)
+        return job_id
+
+    async def put(self, func: str, items: List[str]) -> str:
+        """Queue items, as json, to be written by a pgstac function.
+
+        Returns once the job is on disk.
+
+        Args:
+            func: `create_items` or `upsert_items`.
+            items: the items to write.
+
+        Returns:
+            The id of the ingest job.
+        """
+        job_id = await run_in_threadpool(self._put, func, items)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def _read_status(self, job_id: str) -> Optional[IngestJob]:
+        """Read the status of a job."""
+        if not job_id or os.path.basename(job_id) != job_id:
+            return None
+        try:
+            with open(self._job_path(STATUS, job_id), "rb") as f:
+                return IngestJob(**orjson.loads(f.read()))
+        except FileNotFoundError:
+            pass
+        for directory, replay in product((PENDING, PROCESSING), (False, True)):
+            try:
+                with open(self._job_path(directory, job_id, replay), "rb") as f:
+                    job = orjson.loads(f.read())
+            except FileNotFoundError:
+                continue
+            return IngestJob(
+                id=job_id, status=IngestJobStatus.PENDING, items=len(job["items"])
+            )
+        # The job may have moved between the reads
+        if os.path.exists(self._job_path(STATUS, job_id)):
+            return self._read_status(job_id)
+        return None
+
+    async def status(self, job_id: str) -> Optional[IngestJob]:
+        """Get the status of a job, or None if it doesn't exist."""
+        return await run_in_threadpool(self._read_status, job_id)
+
+    def _requeue_abandoned(self) -> None:
+        """Queue again the jobs claimed for longer than `claim_timeout`."""
+        directory = os.path.join(self.path, PROCESSING)
+        deadline = time.time() - self.claim_timeout
+        for name in os.listdir(directory):
+            try:
+                if os.path.getmtime(os.path.join(directory, name)) < deadline:
+                    self._requeue(name)
+            except FileNotFoundError:
+                continue
+
+    def _prune_statuses(self) -> None:
+        """Remove the statuses of jobs completed more than `status_retention` ago."""
+        now = time.time()
+        if not self.status_retention or now - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = now
+        directory = os.path.join(self.path, STATUS)
+        deadline = now - self.status_retention
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+
+    def _claim(self) -> List[Job]:
+        """Claim the oldest pending jobs, up to `batch_size` items."""
+        jobs: List[Job] = []
+        size = 0
+        directory = os.path.join(self.path, PENDING)
+        for name in sorted(os.listdir(directory)):
+            if size >= self.batch_size:
+                break
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.path, PROCESSING, name)
+            try:
+                # Only one consumer sharing the directory wins the rename
+                os.replace(os.path.join(directory, name), path)
+                os.utime(path)
+            except FileNotFoundError:
+                continue
+            with open(path, "rb") as f:
+                job = orjson.loads(f.read())
+            if name.endswith(REPLAY):
+                job["func"] = REPLAY_FUNCS.get(job["func"], job["func"])
+            jobs.append((name, job))
+            size += len(job["items"])
+        return jobs
+
+    def _complete(self, name: str, job: Dict, error: Optional[str]) -> None:
+        """Record the outcome of a job and remove it from the queue."""
+        status = IngestJob(
+            id=job["id"],
+            status=IngestJobStatus.FAILED if error else IngestJobStatus.SUCCEEDED,
+            items=len(job["items"]),
+            error=error,
+        )
+        _write_file(self._job_path(STATUS, job["id"]), status.json().encode())
+        os.remove(os.path.join(self.path, PROCESSING, name))
+
+    @staticmethod
+    async def _load(pool: pool, func: str, items: List[Dict]) -> Optional[str]:
+        """Load items in a transaction, returning the error."""
+        try:
+            async with pool.acquire() as conn:
+                with translate_pgstac_errors():
+                    async with conn.transaction():
+                        await conn.execute(
+                            f"SELECT {func}($1::text::jsonb);",
+                            orjson.dumps(items).decode(),
+                        )
+        except (StacApiError, exceptions.PostgresError) as e:
+            return _error_message(e)
+        return None
+
+    @staticmethod
+    async def _load_each(pool: pool, func: str, items: List[Dict]) -> Optional[str]:
+        """Load items one by one in a transaction, returning the error."""
+        try:
+            async with pool.acquire() as conn:
+                with translate_pgstac_errors():
+                    async with conn.transaction():
+                        for item in items:
+                            await conn.execute(
+                                f"SELECT {ITEM_FUNCS[func]}($1::text::jsonb);",
+                                orjson.dumps(item).decode(),
+                            )
+        except (StacApiError, exceptions.PostgresError) as e:
+            return _error_message(e)
+        return None
+
+    def _release(self, jobs: List[Job]) -> None:
+        """Queue again claimed jobs whose outcome wasn't recorded."""
+        for name, _ in jobs:
+            try:
+                self._requeue(name)
+            except FileNotFoundError:
+                continue
+
+    async def _drain(self, app: FastAPI) -> int:
+        """Load a batch of pending jobs, returning the number of jobs."""
+        jobs = await run_in_threadpool(self._claim)
+        pool = app.state.writepool
+        try:
+            # Consecutive jobs of a function are loaded together, in claim order
+            for func, claimed in groupby(jobs, key=lambda job: job[1]["func"]):
+                group = list(claimed)
+                error = await self._load(
+                    pool, func, [item for _, job in group for item in job["items"]]
+                )
+                # Load the jobs one by one so only the failing ones are reported
+                errors = [error] * len(group)
+                if error is not None:
+                    errors = [
+                        await self._load_each(pool, func, job["items"])
+                        for _, job in group
+                    ]
+                for (name, job), job_error in zip(group, errors):
+                    await run_in_threadpool(self._complete, name, job, job_error)
+                    if job_error is None:
+                        for collection_id in {
+                            item["collection"] for item in job["items"]
+                        }:
+                            invalidate_searches(app, collection_id)
+        except BaseException:
+            await asyncio.shield(run_in_threadpool(self._release, jobs))
+            raise
+        return len(jobs)
+
+    async def _consume(self, app: FastAPI) -> None:
+        """Load queued jobs until cancelled."""
+        while True:
+            try:
+                if await self._drain(app):
+                    continue
+                await run_in_threadpool(self._requeue_abandoned)
+                await run_in_threadpool(self._prune_statuses)
+            except Exception:
+                logger.exception("Loading ingest jobs failed")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self, app: FastAPI) -> None:
+        """Start loading queued jobs in the background."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._consume(app))
+
+    async def stop(self) -> None:
+        """Stop loading queued jobs, the remaining ones are kept on disk."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def get_ingest_queue(app: FastAPI) -> Optional[IngestQueue]:
+    """Get the ingest queue of the application, if enabled, creating it on first use."""
+    settings = app.state.settings
+    if not settings.ingest_queue_path:
+        return None
+    queue = getattr(app.state, "ingest_queue", None)
+    if queue is None:
+        queue = app.state.ingest_queue = IngestQueue(
+            path=settings.ingest_queue_path,
+            batch_size=settings.ingest_batch_size,
+            poll_interval=settings.ingest_poll_interval,
+            status_retention=settings.ingest_status_retention,
+        )
+    return queue
+
+
+async def start_ingest_queue(app: FastAPI) -> None:
+    """Start the consumer of the ingest queue, if enabled."""
+    queue = get_ingest_queue(app)
+    if queue is not None:
+        queue.start(app)
+
+
+async def stop_ingest_queue(app: FastAPI) -> None:
+    """Stop the consumer of the ingest queue, if started."""
+    queue = getattr(app.state, "ingest_queue", None)
+    if queue is not None:
+        await queue.stop()
+
+
+@attr.s
+class IngestClient(BaseIngestClient):
+    """Status of the jobs of the pgstac ingest queue."""
+
+    async def get_job(self, job_id: str, **kwargs) -> IngestJob:
+        """Get the status of an ingest job.
+
+        Called with `GET /ingest/jobs/{jobId}`.
+
+        Args:
+            job_id: id of the job.
+
+        Returns:
+            The ingest job.
+        """
+        request = kwargs["request"]
+        queue = get_ingest_queue(request.app)
+        job = await queue.status(job_id) if queue is not None else None
+        if job is None:
+            raise NotFoundError(f"Ingest job {job_id} not found")
+        return job
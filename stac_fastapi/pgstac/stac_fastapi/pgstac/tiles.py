@@ -0,0 +1,153 @@
+"""Vector tiles client."""
+from typing import List, Optional
+
+import attr
+import orjson
+from buildpg import render
+from starlette.responses import Response
+
+from stac_fastapi.extensions.third_party.tiles import (
+    MVT_MEDIA_TYPE,
+    BaseVectorTilesClient,
+    validate_tile,
+)
+from stac_fastapi.pgstac.db import acquire, statement_timeout, translate_pgstac_errors
+from stac_fastapi.pgstac.types.search import PgstacSearch
+from stac_fastapi.types.errors import InvalidQueryParameter
+
+# `where` is built and quoted by pgstac. Items are selected with the bounding box
+# operator so the geometry index is used, ST_AsMVTGeom drops the ones outside the tile
+TILE_QUERY = """
+    WITH bounds AS (
+        SELECT
+            ST_TileEnvelope(:z::int, :x::int, :y::int) AS merc,
+            ST_Transform(ST_TileEnvelope(:z::int, :x::int, :y::int), 4326) AS geog
+    ),
+    features AS (
+        SELECT
+            ST_AsMVTGeom(
+                ST_Transform(items.geometry, 3857),
+                bounds.merc,
+                :extent::int,
+                :buffer::int,
+                true
+            ) AS geom,
+            items.id,
+            items.collection_id AS collection,
+            (
+                SELECT jsonb_object_agg(key, value)
+                FROM jsonb_each(items.content->'properties')
+                WHERE key = ANY(:properties::text[])
+            ) AS properties
+        FROM items, bounds
+        WHERE items.geometry && bounds.geog AND {where}
+        LIMIT :max_features::int
+    )
+    SELECT ST_AsMVT(features, :layer::text, :extent::int, 'geom')
+    FROM features
+    WHERE geom IS NOT NULL;
+"""
+
+
+@attr.s
+class VectorTilesClient(BaseVectorTilesClient):
+    """Render item footprints as vector tiles in pgstac.
+
+    Attributes:
+        properties: item properties copied to the tile features, next to the item
+            `id` and `collection`.
+        max_features: maximum number of items drawn in a tile.
+        layer: name of the tile layer.
+        extent: size of the tile in its own coordinates.
+        buffer: size of the buffer around the tile in tile coordinates.
+    """
+
+    properties: List[str] = attr.ib(factory=lambda: ["datetime"])
+    max_features: int = attr.ib(default=10000)
+    layer: str = attr.ib(default="items")
+    extent: int = attr.ib(default=4096)
+    buffer: int = attr.ib(default=64)
+
+    async def _tile(self, request, z: int, x: int, y: int, where: str) -> Response:
+        """Render the items matching a filter in a tile."""
+        pool = request.app.state.readpool
+        q, p = render(
+            TILE_QUERY.format(where=where),
+            z=z,
+            x=x,
+            y=y,
+            extent=self.extent,
+            buffer=self.buffer,
+            properties=self.properties,
+            max_features=self.max_features,
+            layer=self.layer,
+        )
+        with translate_pgstac_errors():
+            async with acquire(request, pool) as conn:
+                tile = await conn.fetchval(q, *p, timeout=statement_timeout(request))
+        return Response(tile or b"", media_type=MVT_MEDIA_TYPE)
+
+    async def get_collection_tile(
+        self, collection_id: str, z: int, x: int, y: int, **kwargs
+    ) -> Response:
+        """Get the footprints of the items of a collection as a vector tile.
+
+        Called with `GET /collections/{collectionId}/tiles/{z}/{x}/{y}.mvt`.
+
+        Args:
+            collection_id: id of the collection.
+            z: zoom level of the tile.
+            x: column of the tile.
+            y: row of the tile.
+
+        Returns:
+            A Mapbox Vector Tile.
+        """
+        return await self.get_search_tile(
+            z, x, y, collections=[collection_id], **kwargs
+        )
+
+    async def get_search_tile(
+        self,
+        z: int,
+        x: int,
+        y: int,
+        collections: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        datetime: Optional[str] = None,
+        query: Optional[str] = None,
+        **kwargs,
+    ) -> Response:
+        """Get the footprints of the items matching a search as a vector tile.
+
+        Called with `GET /search/tiles/{z}/{x}/{y}.mvt`.
+
+        Args:
+            z: zoom level of the tile.
+            x: column of the tile.
+            y: row of the tile.
+            collections: ids of the collections to search.
+            ids: ids of the items to search.
+            datetime: datetime or interval of the items.
+            query: query extension filter, as json.
+
+        Returns:
+            A Mapbox Vector Tile.
+        """
+        request = kwargs["request"]
+        validate_tile(z, x, y)
+        try:
+            query = orjson.loads(query) if query else None
+        except orjson.JSONDecodeError:
+            raise InvalidQueryParameter(f"Invalid query {query}")
+        search_request = PgstacSearch(
+            collections=collections, ids=ids, datetime=datetime, query=query
+        )
+        req = search_request.json(
+            exclude_none=True, exclude={"limit", "token", "fields"}
+        )
+        q, p = render("SELECT search_where(:req::text::jsonb);", req=req)
+        with translate_pgstac_errors():
+            async with acquire(request, request.app.state.readpool) as conn:
+                where = await conn.fetchval(q, *p, timeout=statement_timeout(request))
+        return await self._tile(request, z, x, y, where)
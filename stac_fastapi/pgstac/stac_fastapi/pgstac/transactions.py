@@ -1,12 +1,23 @@
 """transactions extension client."""
 
 import logging
+from typing import List, Optional
+from urllib.parse import urljoin
 
 import attr
 from fastapi.responses import ORJSONResponse
 from stac_pydantic import Item
+from starlette.requests import Request
 
+from stac_fastapi.extensions.third_party.bulk_transactions import (
+    BaseBulkTransactionsClient,
+    BulkTransactionMethod,
+    Items,
+)
+from stac_fastapi.pgstac.cache import get_collection_cache, invalidate_searches
+from stac_fastapi.pgstac.coalesce import get_write_coalescer
 from stac_fastapi.pgstac.db import dbfunc
+from stac_fastapi.pgstac.ingest import get_ingest_queue
 from stac_fastapi.pgstac.models import schemas
 from stac_fastapi.types.core import BaseTransactionsClient
 
@@ -14,6 +25,25 @@ logger = logging.getLogger("uvicorn")
 logger.setLevel(logging.INFO)
 
 
+async def queue_items(
+    request: Request, func: str, items: List[Item]
+) -> Optional[ORJSONResponse]:
+    """Queue items to be loaded in the background, if the ingest queue is enabled.
+
+    Returns:
+        A `202 Accepted` response with the ingest job, or None without queue.
+    """
+    queue = get_ingest_queue(request.app)
+    if queue is None:
+        return None
+    job_id = await queue.put(func, [item.json(exclude_unset=True) for item in items])
+    return ORJSONResponse(
+        {"id": job_id, "status": "pending", "items": len(items)},
+        status_code=202,
+        headers={"Location": urljoin(str(request.base_url), f"ingest/jobs/{job_id}")},
+    )
+
+
 @attr.s
 class TransactionsClient(BaseTransactionsClient):
     """Transactions extension specific CRUD operations."""
@@ -21,15 +51,26 @@ class TransactionsClient(BaseTransactionsClient):
     async def create_item(item: schemas.Item = None, **kwargs) -> Item:
         """Create item."""
         request = kwargs["request"]
+        queued = await queue_items(request, "create_items", [item])
+        if queued is not None:
+            return queued
         pool = request.app.state.writepool
-        await dbfunc(pool, "create_item", item)
+        if request.app.state.settings.write_coalescing:
+            await get_write_coalescer(request.app).submit(pool, "create_item", item)
+        else:
+            await dbfunc(pool, "create_item", item)
+        invalidate_searches(request.app, item.collection)
         return ORJSONResponse(item.dict())
 
     async def update_item(item: schemas.Item = None, **kwargs) -> Item:
         """Update item."""
         request = kwargs["request"]
         pool = request.app.state.writepool
-        await dbfunc(pool, "update_item", item)
+        if request.app.state.settings.write_coalescing:
+            await get_write_coalescer(request.app).submit(pool, "update_item", item)
+        else:
+            await dbfunc(pool, "update_item", item)
+        invalidate_searches(request.app, item.collection)
         return ORJSONResponse(item.dict())
 
     async def create_collection(
@@ -39,6 +80,7 @@ class TransactionsClient(BaseTransactionsClient):
         request = kwargs["request"]
         pool = request.app.state.writepool
         await dbfunc(pool, "create_collection", collection)
+        get_collection_cache(request.app).clear()
         return ORJSONResponse(collection.dict())
 
     async def update_collection(
@@ -48,6 +90,8 @@ class TransactionsClient(BaseTransactionsClient):
         request = kwargs["request"]
         pool = request.app.state.writepool
         await dbfunc(pool, "update_collection", collection)
+        get_collection_cache(request.app).clear()
+        invalidate_searches(request.app, collection.id)
         return ORJSONResponse(collection.dict())
 
     async def delete_item(
@@ -56,7 +100,8 @@ class TransactionsClient(BaseTransactionsClient):
         """Delete collection."""
         request = kwargs["request"]
         pool = request.app.state.writepool
-        await dbfunc(pool, "delete_item", item_id)
+        await dbfunc(pool, "delete_item", (item_id, collection_id))
+        invalidate_searches(request.app, collection_id)
         return ORJSONResponse({"deleted item": item_id})
 
     async def delete_collection(id: str, **kwargs) -> schemas.Collection:
@@ -64,4 +109,51 @@ class TransactionsClient(BaseTransactionsClient):
         request = kwargs["request"]
         pool = request.app.state.writepool
         await dbfunc(pool, "delete_collection", id)
+        get_collection_cache(request.app).clear()
+        invalidate_searches(request.app, id)
         return ORJSONResponse({"deleted collection": id})
+
+
+@attr.s
+class BulkTransactionsClient(BaseBulkTransactionsClient):
+    """Postgres bulk transactions.
+
+    Each chunk of items is loaded by a single call to pgstac, which creates the
+    partitions it needs and inserts the items partition by partition. With the ingest
+    queue enabled, the items are queued and loaded in the background instead.
+    """
+
+    async def bulk_item_insert(
+        self, items: Items, chunk_size: Optional[int] = None, **kwargs
+    ) -> str:
+        """Bulk creation of items.
+
+        Args:
+            items: list of items, and whether existing items are replaced.
+            chunk_size: number of items loaded per transaction.
+
+        Returns:
+            Message indicating the status of the insert, or the ingest job of the
+            queued items.
+        """
+        request = kwargs["request"]
+        func = (
+            "upsert_items"
+            if items.method == BulkTransactionMethod.UPSERT
+            else "create_items"
+        )
+        queued = await queue_items(request, func, items.items)
+        if queued is not None:
+            return queued
+        pool = request.app.state.writepool
+        try:
+            if chunk_size:
+                for chunk in self._chunks(items.items, chunk_size):
+                    await dbfunc(pool, func, items.copy(update={"items": chunk}))
+            else:
+                await dbfunc(pool, func, items)
+        finally:
+            # Chunks loaded before a failing one are committed
+            for collection_id in {item.collection for item in items.items}:
+                invalidate_searches(request.app, collection_id)
+        return f"Successfully added {len(items.items)} items."
@@ -1,16 +1,20 @@
 """stac_fastapi.types.search module."""
 
+import hashlib
 import operator
 from enum import auto
 from types import DynamicClassAttribute
 from typing import Any, Callable, Dict, List, Optional, Set, Union
 
+import orjson
 from pydantic import Field, root_validator, validator
+from pydantic.datetime_parse import parse_datetime
 from stac_pydantic.api import Search
 from stac_pydantic.api.extensions.fields import FieldsExtension as FieldsBase
 from stac_pydantic.utils import AutoValueEnum
 
 from stac_fastapi.types.config import Settings
+from stac_fastapi.types.projection import add_default_includes, compile_fields
 
 # Be careful: https://github.com/samuelcolvin/pydantic/issues/1423#issuecomment-642797287
 NumType = Union[float, int]
@@ -52,20 +56,11 @@ class FieldsExtension(FieldsBase):
     def _get_field_dict(fields: Optional[Set[str]]) -> Dict:
         """Pydantic include/excludes notation.
 
-        Internal method to create a dictionary for advanced include or exclude of pydantic fields on model export
+        Internal method to create a dictionary for advanced include or exclude of pydantic fields on model export,
+        from field paths of any depth.
         Ref: https://pydantic-docs.helpmanual.io/usage/exporting_models/#advanced-include-and-exclude
         """
-        field_dict = {}
-        for field in fields or []:
-            if "." in field:
-                parent, key = field.split(".")
-                if parent not in field_dict:
-                    field_dict[parent] = {key}
-                else:
-                    field_dict[parent].add(key)
-            else:
-                field_dict[field] = ...  # type:ignore
-        return field_dict
+        return compile_fields(fields)
 
     @property
     def filter_fields(self) -> Dict:
@@ -76,9 +71,11 @@ class FieldsExtension(FieldsBase):
         Ref: https://pydantic-docs.helpmanual.io/usage/exporting_models/#advanced-include-and-exclude
         """
         # Always include default_includes, even if they
-        # exist in the exclude list.
-        include = (self.include or set()) - (self.exclude or set())
-        include |= Settings.get().default_includes or set()
+        # exist in the exclude list, unless narrowed by a nested include.
+        include = add_default_includes(
+            (self.include or set()) - (self.exclude or set()),
+            Settings.get().default_includes or set(),
+        )
 
         return {
             "include": self._get_field_dict(include),
@@ -109,3 +106,65 @@ class PgstacSearch(Search):
     def validate_datetime(cls, v):
         """Pgstac does not require the base validator for datetime."""
         return v
+
+    def cache_key(self) -> str:
+        """Hash of the normalized search, equal for equivalent searches."""
+        normalized = self._normalized_filter()
+        normalized.update(limit=self.limit, token=self.token, sortby=self.sortby)
+        if self.fields.include or self.fields.exclude:
+            normalized["fields"] = {
+                "include": sorted(self.fields.include or []),
+                "exclude": sorted(self.fields.exclude or []),
+            }
+        return self._hash(normalized)
+
+    def filter_key(self) -> str:
+        """Hash of the normalized filters, equal for searches matching the same items.
+
+        Paging, sorting and fields are left out, so all the pages of a search share
+        the key.
+        """
+        return self._hash(self._normalized_filter())
+
+    def _normalized_filter(self) -> Dict[str, Any]:
+        """Normalize the filters of the search.
+
+        The normalization is lossless, so only searches matching the same items are
+        equal.
+        """
+        normalized: Dict[str, Any] = {}
+        if self.collections:
+            normalized["collections"] = sorted(set(self.collections))
+        if self.ids:
+            normalized["ids"] = sorted(set(self.ids))
+        if self.bbox:
+            normalized["bbox"] = [float(coord) for coord in self.bbox]
+        if self.intersects:
+            normalized["intersects"] = self.intersects.dict()
+        if self.datetime:
+            normalized["datetime"] = "/".join(
+                self._normalize_datetime(value) for value in self.datetime.split("/")
+            )
+        if self.query:
+            normalized["query"] = {
+                field: {op.value: value for op, value in expr.items()}
+                for field, expr in self.query.items()
+            }
+        return normalized
+
+    @staticmethod
+    def _hash(normalized: Dict[str, Any]) -> str:
+        """Hash a normalized search."""
+        return hashlib.sha256(
+            orjson.dumps(normalized, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+
+    @staticmethod
+    def _normalize_datetime(value: str) -> str:
+        """Normalize an end of a datetime interval."""
+        if value in ("", ".."):
+            return ".."
+        try:
+            return parse_datetime(value).isoformat()
+        except ValueError:
+            return value
@@ -51,6 +51,38 @@ async def test_app_transaction_extension(
     assert resp.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_app_context_extension(load_test_data, app_client, load_test_collection):
+    coll = load_test_collection
+    item = load_test_data("test_item.json")
+    resp = await app_client.post(f"/collections/{coll.id}/items", json=item)
+    assert resp.status_code == 200
+
+    resp = await app_client.get("/search", params={"collections": [coll.id]})
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    # Estimates under the threshold are replaced by exact counts
+    assert resp_json["context"]["returned"] == resp_json["context"]["matched"] == 1
+
+    resp = await app_client.get(f"/collections/{coll.id}/items")
+    assert resp.status_code == 200
+    assert resp.json()["context"]["matched"] == 1
+
+
+@pytest.mark.asyncio
+async def test_app_statement_timeout(
+    app, app_client, load_test_collection, monkeypatch
+):
+    monkeypatch.setattr(
+        app.state.settings, "statement_timeouts", {"post_search": 0.000001}
+    )
+    resp = await app_client.post("/search", json={})
+    assert resp.status_code == 504
+
+    resp = await app_client.get(f"/collections/{load_test_collection.id}")
+    assert resp.status_code == 200
+
+
 @pytest.mark.asyncio
 async def test_app_query_extension(load_test_data, app_client, load_test_collection):
     coll = load_test_collection
@@ -12,15 +12,29 @@ from stac_pydantic import Collection, Item
 
 from stac_fastapi.api.app import StacApi
 from stac_fastapi.extensions.core import (
+    ContextExtension,
     FieldsExtension,
     QueryExtension,
     SortExtension,
     TransactionExtension,
 )
+from stac_fastapi.extensions.third_party import (
+    BulkTransactionExtension,
+    ExportExtension,
+    IngestExtension,
+    VectorTilesExtension,
+)
+from stac_fastapi.pgstac.cache import get_collection_cache
 from stac_fastapi.pgstac.config import Settings
 from stac_fastapi.pgstac.core import CoreCrudClient
 from stac_fastapi.pgstac.db import close_db_connection, connect_to_db
-from stac_fastapi.pgstac.transactions import TransactionsClient
+from stac_fastapi.pgstac.export import ExportClient
+from stac_fastapi.pgstac.ingest import IngestClient
+from stac_fastapi.pgstac.tiles import VectorTilesClient
+from stac_fastapi.pgstac.transactions import (
+    BulkTransactionsClient,
+    TransactionsClient,
+)
 from stac_fastapi.pgstac.types.search import PgstacSearch
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
@@ -69,13 +83,14 @@ async def pg():
 
 
 @pytest.fixture(autouse=True)
-async def pgstac(pg):
+async def pgstac(pg, app):
     print(f"{os.environ['postgres_dbname']}")
     yield
     print("Truncating Data")
     conn = await asyncpg.connect(dsn=settings.testing_connection_string)
     await conn.execute("TRUNCATE items CASCADE; TRUNCATE collections CASCADE;")
     await conn.close()
+    get_collection_cache(app).clear()
 
 
 @pytest.fixture(scope="session")
@@ -85,9 +100,14 @@ def api_client(pg):
         settings=settings,
         extensions=[
             TransactionExtension(client=TransactionsClient),
+            BulkTransactionExtension(client=BulkTransactionsClient()),
             QueryExtension(),
             SortExtension(),
             FieldsExtension(),
+            ContextExtension(),
+            ExportExtension(client=ExportClient(), search_request_model=PgstacSearch),
+            VectorTilesExtension(client=VectorTilesClient()),
+            IngestExtension(client=IngestClient()),
         ],
         client=CoreCrudClient(),
         search_request_model=PgstacSearch,
@@ -90,3 +90,33 @@ async def test_nocollections(
 ):
     resp = await app_client.get("/collections")
     assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_collections_cache_invalidation(
+    app_client, load_test_data, load_test_collection
+):
+    resp = await app_client.get("/collections")
+    assert resp.status_code == 200
+    assert [c["id"] for c in resp.json()] == [load_test_collection.id]
+
+    in_json = load_test_data("test_collection.json")
+    in_json["id"] = "test-collection-2"
+    resp = await app_client.post("/collections", json=in_json)
+    assert resp.status_code == 200
+
+    resp = await app_client.get("/collections")
+    assert resp.status_code == 200
+    assert {c["id"] for c in resp.json()} == {
+        load_test_collection.id,
+        "test-collection-2",
+    }
+
+    resp = await app_client.get("/")
+    child_links = [link for link in resp.json()["links"] if link["rel"] == "child"]
+    assert len(child_links) == 2
+
+    resp = await app_client.delete("/collections/test-collection-2")
+    assert resp.status_code == 200
+    resp = await app_client.get("/collections/test-collection-2")
+    assert resp.status_code == 404
@@ -1,14 +1,28 @@
+import asyncio
+import copy
 import json
+import os
+import time
 import uuid
 from datetime import datetime, timedelta
 from typing import Callable
 from urllib.parse import parse_qs, urlparse
 
+import orjson
 import pytest
 from shapely.geometry import Polygon
 from stac_pydantic import Collection, Item
 from stac_pydantic.api.search import DATETIME_RFC339
 
+from stac_fastapi.extensions.third_party.ingest import IngestJobStatus
+from stac_fastapi.pgstac import arrow
+from stac_fastapi.pgstac.ingest import (
+    IngestQueue,
+    start_ingest_queue,
+    stop_ingest_queue,
+)
+from stac_fastapi.types.cache import ResponseCache, SingleFlight, TTLCache
+
 
 @pytest.mark.asyncio
 async def test_create_collection(app_client, load_test_data: Callable):
@@ -870,6 +884,554 @@ async def test_get_missing_item(app_client, load_test_data):
     assert resp.status_code == 404
 
 
+@pytest.mark.asyncio
+async def test_get_item_links(app_client, load_test_collection, load_test_item):
+    """Test read item renders its links and is scoped to its collection"""
+    coll = load_test_collection
+    item = load_test_item
+
+    resp = await app_client.get(f"/collections/{coll.id}/items/{item.id}")
+    assert resp.status_code == 200
+    links = {link["rel"]: link["href"] for link in resp.json()["links"]}
+    assert links["self"] == f"http://test/collections/{coll.id}/items/{item.id}"
+    assert links["collection"] == f"http://test/collections/{coll.id}"
+
+    resp = await app_client.get(f"/collections/other-collection/items/{item.id}")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_item_search_links(app_client, load_test_data, load_test_collection):
+    """Test item links are rendered on search results"""
+    test_item = load_test_data("test_item.json")
+    resp = await app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    resp = await app_client.post("/search", json={"ids": [test_item["id"]]})
+    assert resp.status_code == 200
+    resp_json = resp.json()
+    assert resp_json["type"] == "FeatureCollection"
+    assert "next" not in resp_json
+    assert {link["rel"] for link in resp_json["links"]} >= {"self", "root"}
+
+    item_links = {
+        link["rel"]: link["href"] for link in resp_json["features"][0]["links"]
+    }
+    assert item_links["self"] == (
+        f"http://test/collections/{test_item['collection']}/items/{test_item['id']}"
+    )
+    assert item_links["parent"] == f"http://test/collections/{test_item['collection']}"
+
+    resp = await app_client.post(
+        "/search", json={"ids": [test_item["id"]], "fields": {"exclude": ["links"]}}
+    )
+    assert resp.status_code == 200
+    assert "links" not in resp.json()["features"][0]
+
+
+@pytest.mark.asyncio
+async def test_search_cache_invalidation(
+    app, app_client, load_test_data, load_test_collection
+):
+    """Test cached searches are invalidated by item writes"""
+    app.state.search_cache = ResponseCache(
+        ttl=60, sizeof=lambda result: len(result.body)
+    )
+    try:
+        test_item = load_test_data("test_item.json")
+        resp = await app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+        params = {"collections": [test_item["collection"]]}
+        resp = await app_client.post("/search", json=params)
+        assert len(resp.json()["features"]) == 1
+        assert len(app.state.search_cache) == 1
+
+        test_item["id"] = "test-item-2"
+        resp = await app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+        assert len(app.state.search_cache) == 0
+
+        resp = await app_client.post("/search", json=params)
+        assert len(resp.json()["features"]) == 2
+    finally:
+        del app.state.search_cache
+
+
+@pytest.mark.asyncio
+async def test_search_cache_links(
+    app, app_client, load_test_data, load_test_collection
+):
+    """Test equivalent searches share a cached result but get their own links"""
+    app.state.search_cache = ResponseCache(
+        ttl=60, sizeof=lambda result: len(result.body)
+    )
+    try:
+        test_item = load_test_data("test_item.json")
+        collection = test_item["collection"]
+        ids = [test_item["id"], "test-item-2"]
+        for item_id in ids:
+            test_item["id"] = item_id
+            resp = await app_client.post(
+                f"/collections/{collection}/items", json=test_item
+            )
+            assert resp.status_code == 200
+
+        for query in (
+            f"collections={collection}&limit=1",
+            f"limit=1&collections={collection}",
+        ):
+            resp = await app_client.get(f"/search?{query}")
+            assert resp.status_code == 200
+            links = {link["rel"]: link["href"] for link in resp.json()["links"]}
+            assert links["self"].endswith(f"/search?{query}")
+            assert links["next"].startswith(f"{links['self']}&token=next:")
+        assert len(app.state.search_cache) == 1
+
+        for body in (
+            {"collections": [collection], "ids": ids, "limit": 1},
+            {"ids": ids[::-1], "limit": 1, "collections": [collection]},
+        ):
+            resp = await app_client.post("/search", json=body)
+            assert resp.status_code == 200
+            links = {link["rel"]: link for link in resp.json()["links"]}
+            assert links["next"]["body"]["ids"] == body["ids"]
+        assert len(app.state.search_cache) == 2
+    finally:
+        del app.state.search_cache
+
+
+def test_response_cache_generation():
+    """Test responses rendered before an invalidation of the cache aren't cached"""
+    cache = ResponseCache(ttl=60)
+    generation = cache.generation
+    cache.invalidate_tag("collection")
+    cache.set("key", b"stale", tags=["collection"], generation=generation)
+    assert cache.get("key") is None
+
+    cache.set("key", b"fresh", tags=["collection"], generation=cache.generation)
+    assert cache.get("key") == b"fresh"
+
+
+def test_ttl_cache_generation():
+    """Test values computed before the cache was cleared aren't cached"""
+    cache = TTLCache(ttl=60)
+    generation = cache.generation
+    cache.clear()
+    cache.set("key", b"stale", generation=generation)
+    assert cache.get("key") is None
+
+    cache.set("key", b"fresh", generation=cache.generation)
+    assert cache.get("key") == b"fresh"
+
+
+@pytest.mark.asyncio
+async def test_search_single_flight(
+    app, app_client, load_test_data, load_test_collection
+):
+    """Test concurrent identical searches share a single database call"""
+    app.state.search_flights = SingleFlight()
+    try:
+        test_item = load_test_data("test_item.json")
+        resp = await app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+        params = {"collections": [test_item["collection"]]}
+        responses = await asyncio.gather(
+            *[app_client.post("/search", json=params) for _ in range(5)]
+        )
+        assert all(resp.status_code == 200 for resp in responses)
+        assert len({resp.content for resp in responses}) == 1
+        assert app.state.search_flights.hits + app.state.search_flights.misses == 5
+        assert app.state.search_flights.misses < 5
+        assert len(app.state.search_flights) == 0
+    finally:
+        del app.state.search_flights
+
+
+@pytest.mark.asyncio
+async def test_search_single_flight_links(
+    app, app_client, load_test_data, load_test_collection
+):
+    """Test concurrent equivalent searches share a call but get their own links"""
+    app.state.search_flights = SingleFlight()
+    try:
+        test_item = load_test_data("test_item.json")
+        collection = test_item["collection"]
+        ids = [test_item["id"], "test-item-2"]
+        for item_id in ids:
+            test_item["id"] = item_id
+            resp = await app_client.post(
+                f"/collections/{collection}/items", json=test_item
+            )
+            assert resp.status_code == 200
+
+        bodies = [{"ids": ids, "limit": 1}, {"ids": ids[::-1], "limit": 1}] * 3
+        responses = await asyncio.gather(
+            *[app_client.post("/search", json=body) for body in bodies]
+        )
+        for body, resp in zip(bodies, responses):
+            assert resp.status_code == 200
+            links = {link["rel"]: link for link in resp.json()["links"]}
+            assert links["next"]["body"]["ids"] == body["ids"]
+
+        responses = await asyncio.gather(
+            *[
+                app_client.get(f"/collections/{collection}/items?limit=1")
+                for _ in range(5)
+            ]
+        )
+        assert all(resp.status_code == 200 for resp in responses)
+        next_links = [
+            link["href"]
+            for resp in responses
+            for link in resp.json()["links"]
+            if link["rel"] == "next"
+        ]
+        assert len(next_links) == 5
+        assert all(f"/collections/{collection}/items?" in href for href in next_links)
+    finally:
+        del app.state.search_flights
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancelled_call():
+    """Test a call arriving as the cancelled call of its key stops runs again"""
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "result"
+
+    task = asyncio.ensure_future(flights.run("key", slow))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert await flights.run("key", fast) == "result"
+    assert flights.misses == 2
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_search_export(app_client, load_test_data, load_test_collection):
+    """Test all matching items are streamed as newline delimited json"""
+    test_item = load_test_data("test_item.json")
+    ids = []
+    for _ in range(3):
+        test_item["id"] = str(uuid.uuid4())
+        ids.append(test_item["id"])
+        resp = await app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+
+    params = {"collections": [test_item["collection"]], "limit": 1}
+    resp = await app_client.post("/search/export", json=params)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    features = [json.loads(line) for line in resp.text.splitlines()]
+    assert sorted(feature["id"] for feature in features) == sorted(ids)
+    item_links = {link["rel"]: link["href"] for link in features[0]["links"]}
+    assert item_links["self"] == (
+        f"http://test/collections/{test_item['collection']}/items/{features[0]['id']}"
+    )
+
+    params = {"collections": ["other-collection"]}
+    resp = await app_client.post("/search/export", json=params)
+    assert resp.status_code == 200
+    assert resp.text == ""
+
+
+@pytest.mark.asyncio
+async def test_search_columnar(app_client, load_test_data, load_test_collection):
+    """Test search results are encoded column-wise when requested"""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    test_item = load_test_data("test_item.json")
+    resp = await app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    headers = {"Accept": "application/vnd.apache.arrow.stream"}
+    resp = await app_client.get(
+        "/search", params={"ids": test_item["id"]}, headers=headers
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(resp.content).read_all()
+    assert table.column("id").to_pylist() == [test_item["id"]]
+    assert table.column("collection").to_pylist() == [test_item["collection"]]
+    assert table.column("gsd").to_pylist() == [test_item["properties"]["gsd"]]
+
+    headers = {"Accept": "application/x-parquet"}
+    resp = await app_client.get(
+        f"/collections/{test_item['collection']}/items", headers=headers
+    )
+    assert resp.status_code == 200
+    table = pq.read_table(pa.BufferReader(resp.content))
+    assert table.num_rows == 1
+    assert b"geo" in table.schema.metadata
+
+    # JSON is preferred by q-value
+    headers = {"Accept": "application/x-parquet;q=0.5, application/geo+json"}
+    resp = await app_client.get(
+        f"/collections/{test_item['collection']}/items", headers=headers
+    )
+    assert resp.status_code == 200
+    assert resp.json()["features"][0]["id"] == test_item["id"]
+
+
+@pytest.mark.asyncio
+async def test_search_columnar_without_pyarrow(
+    app_client, load_test_data, load_test_collection, monkeypatch
+):
+    """Test search results fall back to json when pyarrow isn't installed"""
+    monkeypatch.setattr(arrow, "columnar_available", lambda: False)
+    test_item = load_test_data("test_item.json")
+    resp = await app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    headers = {"Accept": "application/vnd.apache.arrow.stream"}
+    resp = await app_client.get(
+        "/search", params={"ids": test_item["id"]}, headers=headers
+    )
+    assert resp.status_code == 200
+    assert resp.json()["features"][0]["id"] == test_item["id"]
+
+
+@pytest.mark.asyncio
+async def test_vector_tiles(app_client, load_test_data, load_test_collection):
+    """Test item footprints are rendered in vector tiles"""
+    test_item = load_test_data("test_item.json")
+    resp = await app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    resp = await app_client.get(
+        f"/collections/{test_item['collection']}/tiles/0/0/0.mvt"
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert len(resp.content) > 0
+
+    resp = await app_client.get(
+        "/search/tiles/0/0/0.mvt", params={"collections": "other-collection"}
+    )
+    assert resp.status_code == 200
+    assert resp.content == b""
+
+    resp = await app_client.get(
+        f"/collections/{test_item['collection']}/tiles/1/2/0.mvt"
+    )
+    assert resp.status_code == 400
+
+    resp = await app_client.get("/search/tiles/0/0/0.mvt", params={"query": "{bad"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_item_insert(app_client, load_test_data, load_test_collection):
+    """Test items are bulk loaded, and replaced when upserting"""
+    test_item = load_test_data("test_item.json")
+    items = []
+    for week in range(3):
+        item = copy.deepcopy(test_item)
+        item["id"] = str(uuid.uuid4())
+        item["properties"]["datetime"] = (
+            datetime(2020, 2, 12) + timedelta(weeks=week)
+        ).strftime(DATETIME_RFC339)
+        items.append(item)
+
+    bulk_url = f"/collections/{test_item['collection']}/bulk_items"
+    resp = await app_client.post(bulk_url, json={"items": items})
+    assert resp.status_code == 200
+
+    resp = await app_client.post(bulk_url, json={"items": items})
+    assert resp.status_code == 409
+
+    items[0]["properties"]["gsd"] = 42
+    items[1]["properties"]["datetime"] = "2021-01-01T00:00:00Z"
+    resp = await app_client.post(bulk_url, json={"items": items, "method": "upsert"})
+    assert resp.status_code == 200
+
+    resp = await app_client.post(
+        "/search", json={"collections": [test_item["collection"]], "limit": 10}
+    )
+    features = {feature["id"]: feature for feature in resp.json()["features"]}
+    assert len(features) == 3
+    assert features[items[0]["id"]]["properties"]["gsd"] == 42
+    assert features[items[1]["id"]]["properties"]["datetime"].startswith("2021-01-01")
+
+
+@pytest.mark.asyncio
+async def test_bulk_item_insert_ndjson(
+    app_client, load_test_data, load_test_collection
+):
+    """Test items streamed as ndjson are loaded, and bad lines reported"""
+    test_item = load_test_data("test_item.json")
+    lines = []
+    for _ in range(3):
+        test_item["id"] = str(uuid.uuid4())
+        lines.append(json.dumps(test_item))
+    lines.insert(1, "{not json")
+
+    resp = await app_client.post(
+        f"/collections/{test_item['collection']}/bulk_items/ndjson",
+        content="\n".join(lines),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200
+    report = resp.json()
+    assert report["received"] == 4
+    assert report["loaded"] == 3
+    assert report["queued"] == 0
+    assert [error["line"] for error in report["errors"]] == [2]
+
+    resp = await app_client.get(f"/collections/{test_item['collection']}/items")
+    assert len(resp.json()["features"]) == 3
+
+    resp = await app_client.post(
+        f"/collections/{test_item['collection']}/bulk_items/ndjson",
+        content=lines[0],
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200
+    report = resp.json()
+    assert report["loaded"] == 0
+    assert report["errors"][0]["error"].startswith("UniqueViolationError: ")
+
+
+@pytest.mark.asyncio
+async def test_bulk_item_insert_ndjson_queued(
+    app, app_client, load_test_data, load_test_collection, tmp_path
+):
+    """Test items streamed as ndjson to the ingest queue are reported as queued"""
+    app.state.settings.ingest_queue_path = str(tmp_path)
+    await start_ingest_queue(app)
+    try:
+        test_item = load_test_data("test_item.json")
+        resp = await app_client.post(
+            f"/collections/{test_item['collection']}/bulk_items/ndjson",
+            content=json.dumps(test_item),
+            headers={"content-type": "application/x-ndjson"},
+        )
+        assert resp.status_code == 200
+        report = resp.json()
+        assert report["received"] == 1
+        assert report["loaded"] == 0
+        assert report["queued"] == 1
+    finally:
+        await stop_ingest_queue(app)
+        app.state.settings.ingest_queue_path = None
+        app.state.ingest_queue = None
+
+
+@pytest.mark.asyncio
+async def test_create_item_coalesced(
+    app, app_client, load_test_data, load_test_collection
+):
+    """Test concurrent creates grouped in a transaction get their own outcome"""
+    app.state.settings.write_coalescing = True
+    try:
+        test_item = load_test_data("test_item.json")
+        items = []
+        for item_id in ("coalesced-1", "coalesced-2", "coalesced-1"):
+            item = copy.deepcopy(test_item)
+            item["id"] = item_id
+            items.append(item)
+
+        responses = await asyncio.gather(
+            *(
+                app_client.post(f"/collections/{item['collection']}/items", json=item)
+                for item in items
+            )
+        )
+        assert sorted(resp.status_code for resp in responses) == [200, 200, 409]
+
+        resp = await app_client.get(f"/collections/{test_item['collection']}/items")
+        assert len(resp.json()["features"]) == 2
+    finally:
+        app.state.settings.write_coalescing = False
+
+
+@pytest.mark.asyncio
+async def test_create_item_queued(
+    app, app_client, load_test_data, load_test_collection, tmp_path
+):
+    """Test items are acknowledged once queued and loaded in the background"""
+    app.state.settings.ingest_queue_path = str(tmp_path)
+    await start_ingest_queue(app)
+    try:
+        test_item = load_test_data("test_item.json")
+        resp = await app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 202
+        job = resp.json()
+        assert job["status"] == "pending"
+        assert resp.headers["location"].endswith(f"/ingest/jobs/{job['id']}")
+
+        for _ in range(50):
+            resp = await app_client.get(f"/ingest/jobs/{job['id']}")
+            assert resp.status_code == 200
+            if resp.json()["status"] != "pending":
+                break
+            await asyncio.sleep(0.1)
+        assert resp.json()["status"] == "succeeded"
+
+        resp = await app_client.get(
+            f"/collections/{test_item['collection']}/items/{test_item['id']}"
+        )
+        assert resp.status_code == 200
+
+        resp = await app_client.get("/ingest/jobs/unknown")
+        assert resp.status_code == 404
+    finally:
+        await stop_ingest_queue(app)
+        app.state.settings.ingest_queue_path = None
+        app.state.ingest_queue = None
+
+
+@pytest.mark.asyncio
+async def test_ingest_job_replayed(app, load_test_data, load_test_collection, tmp_path):
+    """Test jobs loaded before their consumer stopped succeed when queued again"""
+    queue = IngestQueue(path=str(tmp_path), claim_timeout=0, status_retention=60)
+    test_item = load_test_data("test_item.json")
+    job_id = queue._put("create_items", [orjson.dumps(test_item).decode()])
+
+    # The consumer stops once the items are written, before recording the job
+    [(name, job)] = queue._claim()
+    assert await queue._load(app.state.writepool, job["func"], job["items"]) is None
+    queue._requeue_abandoned()
+
+    assert await queue._drain(app) == 1
+    status = await queue.status(job_id)
+    assert status.status == IngestJobStatus.SUCCEEDED
+
+    # Statuses are removed once expired
+    old = time.time() - 120
+    os.utime(queue._job_path("status", job_id), (old, old))
+    queue._prune_statuses()
+    assert await queue.status(job_id) is None
+
+
 @pytest.mark.skip
 @pytest.mark.asyncio
 async def test_search_invalid_query_field(app_client):
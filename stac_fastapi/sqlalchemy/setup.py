@@ -15,6 +15,7 @@ __version__ = load_source(
 
 install_requires = [
     "fastapi",
+    "anyio>=3",
     "attrs",
     "pydantic[dotenv]",
     "stac_pydantic==1.3.8",
@@ -26,6 +27,7 @@ install_requires = [
     "sqlalchemy==1.3.23",
     "shapely",
     "psycopg2-binary",
+    "asyncpg",
     "alembic",
     "fastapi-utils",
 ]
@@ -0,0 +1 @@
+"""stac_fastapi.sqlalchemy.aio module, clients running on asyncpg."""
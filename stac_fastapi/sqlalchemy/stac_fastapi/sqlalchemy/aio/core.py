@@ -0,0 +1,280 @@
+"""Asynchronous item crud client."""
+import json
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Type, Union
+
+import asyncpg
+import attr
+import sqlalchemy as sa
+from sqlakeyset import Paging, unserialize_bookmark
+from sqlalchemy.orm import Query
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.expression import Select, UnaryExpression
+
+from stac_fastapi.extensions.core import ContextExtension
+from stac_fastapi.sqlalchemy.aio.session import AsyncSession, fetch, fetchval
+from stac_fastapi.sqlalchemy.aio.tokens import AsyncPaginationTokenClient
+from stac_fastapi.sqlalchemy.core import CoreCrudClient, NumType
+from stac_fastapi.sqlalchemy.count import Explain
+from stac_fastapi.sqlalchemy.models import database, schemas
+from stac_fastapi.sqlalchemy.serializers import ItemSerializer
+from stac_fastapi.sqlalchemy.types.search import SQLAlchemySTACSearch
+from stac_fastapi.types.config import CountStrategy, Settings
+from stac_fastapi.types.errors import NotFoundError
+from stac_fastapi.types.timings import SERIALIZATION, timed
+
+
+def collection_from_row(
+    table: Type[database.Collection], row: Any, base_url: str
+) -> schemas.Collection:
+    """Serialize a row of the collections table."""
+    collection = table(**row._asdict())
+    collection.base_url = base_url
+    return schemas.Collection.from_orm(collection)
+
+
+def _order_column(clause: Any) -> Tuple[Any, bool]:
+    """Get the column of an ORDER BY clause and whether it is descending."""
+    if isinstance(clause, UnaryExpression) and clause.modifier in (
+        operators.asc_op,
+        operators.desc_op,
+    ):
+        return clause.element, clause.modifier is operators.desc_op
+    return clause, False
+
+
+def _keyset_condition(
+    columns: List[Tuple[Any, bool]], place: Tuple, backwards: bool
+) -> sa.sql.ColumnElement:
+    """Select the rows following a place of the order, or preceding it backwards."""
+    conditions = []
+    for index, (column, descending) in enumerate(columns):
+        beyond = (
+            column < place[index] if descending != backwards else column > place[index]
+        )
+        ties = [
+            other == value for (other, _), value in zip(columns[:index], place[:index])
+        ]
+        conditions.append(sa.and_(*ties, beyond))
+    return sa.or_(*conditions)
+
+
+@attr.s
+class AsyncCoreCrudClient(AsyncPaginationTokenClient, CoreCrudClient):
+    """Client for core endpoints defined by stac, running on asyncpg.
+
+    The endpoints of `CoreCrudClient` are overridden by coroutines selecting the same
+    rows, and pages are keyset pages with the bookmarks of sqlakeyset.
+    """
+
+    session: AsyncSession = attr.ib(default=attr.Factory(AsyncSession.create_from_env))
+
+    async def _count_matched(
+        self,
+        conn: asyncpg.Connection,
+        statement: Select,
+        key: Hashable,
+        request: Any,
+    ) -> int:
+        """Get the number of items matched by a statement, like `count_matched`."""
+        settings = Settings.get()
+        if settings.count_strategy == CountStrategy.cached:
+            count = self.count_cache.get(key)
+            if count is not None:
+                return count
+
+        statement = statement.order_by(None)
+        if settings.count_strategy == CountStrategy.estimated:
+            plan = json.loads(await fetchval(conn, Explain(statement), request))
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+            if estimate >= settings.count_exact_threshold:
+                return estimate
+        count = await fetchval(
+            conn, statement.with_only_columns([sa.func.count()]), request
+        )
+
+        if settings.count_strategy == CountStrategy.cached:
+            self.count_cache.set(key, count)
+        return count
+
+    async def _get_page(
+        self,
+        conn: asyncpg.Connection,
+        statement: Select,
+        order: List,
+        per_page: int,
+        keyset: Optional[str],
+        request: Any,
+    ) -> Paging:
+        """Select a page of rows following the place of a sqlakeyset bookmark."""
+        place, backwards = unserialize_bookmark(keyset) if keyset else (None, False)
+        columns = [_order_column(clause) for clause in order]
+        for index, (column, descending) in enumerate(columns):
+            statement = statement.column(column.label(f"_keyset_{index}"))
+            statement = statement.order_by(
+                column.asc() if descending == backwards else column.desc()
+            )
+        if place:
+            statement = statement.where(_keyset_condition(columns, place, backwards))
+        rows = await fetch(conn, statement.limit(per_page + 1), request)
+        places = [
+            tuple(getattr(row, f"_keyset_{index}") for index in range(len(columns)))
+            for row in rows
+        ]
+        return Paging(rows, per_page, backwards, place, places)
+
+    async def _page_tokens(
+        self, paging: Paging, request: Any
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Create the tokens of the next and previous pages."""
+        next_token = previous_token = None
+        if paging.has_next:
+            next_token = await self.encode_token(paging.bookmark_next, request)
+        if paging.has_previous:
+            previous_token = await self.encode_token(paging.bookmark_previous, request)
+        return next_token, previous_token
+
+    async def all_collections(self, **kwargs) -> List[schemas.Collection]:
+        """Read all collections from the database."""
+        request = kwargs["request"]
+        async with self.session.acquire(request) as conn:
+            rows = await fetch(
+                conn, sa.select([self.collection_table.__table__]), request
+            )
+        with timed(request, SERIALIZATION):
+            return [
+                collection_from_row(self.collection_table, row, str(request.base_url))
+                for row in rows
+            ]
+
+    async def get_collection(self, id: str, **kwargs) -> schemas.Collection:
+        """Get collection by id."""
+        request = kwargs["request"]
+        statement = sa.select([self.collection_table.__table__]).where(
+            self.collection_table.id == id
+        )
+        async with self.session.acquire(request) as conn:
+            rows = await fetch(conn, statement, request)
+        if not rows:
+            raise NotFoundError(f"{self.collection_table.__name__} {id} not found")
+        with timed(request, SERIALIZATION):
+            return collection_from_row(
+                self.collection_table, rows[0], str(request.base_url)
+            )
+
+    async def item_collection(
+        self, id: str, limit: int = 10, token: str = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Read an item collection from the database."""
+        request = kwargs["request"]
+        serializer = ItemSerializer(base_url=str(request.base_url))
+        statement = (
+            Query(serializer.columns(self.item_table))
+            .join(self.collection_table)
+            .filter(self.collection_table.id == id)
+            .statement
+        )
+        async with self.session.acquire(request) as conn:
+            count = None
+            if self.extension_is_enabled(ContextExtension):
+                count = await self._count_matched(
+                    conn, statement, ("collection", id), request
+                )
+            keyset = await self.decode_token(token, conn, request) if token else None
+            paging = await self._get_page(
+                conn,
+                statement,
+                [self.item_table.datetime.desc(), self.item_table.id],
+                limit,
+                keyset,
+                request,
+            )
+        next_token, previous_token = await self._page_tokens(paging, request)
+        links = self._item_collection_links(
+            request, id, limit, next_token, previous_token
+        )
+        return self._feature_collection(
+            request, paging.rows, serializer, links, limit, count
+        )
+
+    async def get_item(
+        self, item_id: str, collection_id: str, **kwargs
+    ) -> Dict[str, Any]:
+        """Get item by id."""
+        request = kwargs["request"]
+        serializer = ItemSerializer(base_url=str(request.base_url))
+        statement = sa.select(serializer.columns(self.item_table)).where(
+            self.item_table.id == item_id
+        )
+        async with self.session.acquire(request) as conn:
+            rows = await fetch(conn, statement, request)
+        if not rows:
+            raise NotFoundError(f"{self.item_table.__name__} {item_id} not found")
+        with timed(request, SERIALIZATION):
+            return serializer.serialize(rows[0])
+
+    async def get_search(
+        self,
+        collections: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        bbox: Optional[List[NumType]] = None,
+        datetime: Optional[Union[str, datetime]] = None,
+        limit: Optional[int] = 10,
+        query: Optional[str] = None,
+        token: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sortby: Optional[str] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """GET search catalog."""
+        search_request = self._get_search_request(
+            collections, ids, bbox, datetime, limit, query, token, fields, sortby
+        )
+        resp = await self.post_search(search_request, request=kwargs["request"])
+        resp["links"] = self._get_links(resp["links"], kwargs["request"])
+        return resp
+
+    async def post_search(
+        self, search_request: SQLAlchemySTACSearch, **kwargs
+    ) -> Dict[str, Any]:
+        """POST search catalog."""
+        request = kwargs["request"]
+        filter_kwargs = self._search_projection(search_request)
+
+        # Only the projected fields are selected
+        serializer = ItemSerializer(
+            base_url=str(request.base_url),
+            include=filter_kwargs.get("include"),
+            exclude=filter_kwargs.get("exclude"),
+        )
+        statement = self._filter_items(
+            Query(serializer.columns(self.item_table)), search_request
+        ).statement
+
+        async with self.session.acquire(request) as conn:
+            keyset = (
+                await self.decode_token(search_request.token, conn, request)
+                if search_request.token
+                else None
+            )
+            count = None
+            if self.extension_is_enabled(ContextExtension):
+                if search_request.ids:
+                    count = len(search_request.ids)
+                else:
+                    count = await self._count_matched(
+                        conn, statement, search_request.filter_key(), request
+                    )
+            paging = await self._get_page(
+                conn,
+                statement,
+                self._search_order(search_request),
+                search_request.limit,
+                keyset,
+                request,
+            )
+        next_token, previous_token = await self._page_tokens(paging, request)
+        links = self._search_links(request, next_token, previous_token)
+        return self._feature_collection(
+            request, paging.rows, serializer, links, search_request.limit, count
+        )
@@ -0,0 +1,256 @@
+"""asyncpg connection pools running sqlalchemy statements.
+
+Statements are built with sqlalchemy core, from the same ORM models as the ones of
+the synchronous clients, compiled for postgres and run with asyncpg. The parameters
+and the selected columns are converted by the sqlalchemy types, so the rows match the
+ones of the synchronous session.
+"""
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+import asyncpg
+import attr
+from fastapi import FastAPI
+from pydantic.datetime_parse import parse_datetime
+from sqlalchemy.dialects.postgresql.base import PGDialect
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.expression import ClauseElement
+from sqlalchemy.util import KeyedTuple
+
+from stac_fastapi.sqlalchemy.config import SqlalchemySettings
+from stac_fastapi.types import errors
+from stac_fastapi.types.metrics import Sample
+from stac_fastapi.types.timings import DB, POOL_WAIT, timed
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncpgDialect(PGDialect):
+    """Postgres dialect compiling statements for asyncpg.
+
+    Parameters are rendered in the pyformat style, then replaced with asyncpg's
+    positional parameters.
+    """
+
+    driver = "asyncpg"
+    default_paramstyle = "pyformat"
+    implicit_returning = True
+    supports_native_decimal = True
+
+
+dialect = AsyncpgDialect()
+
+
+def _encode_timestamp(value: Union[str, datetime]) -> str:
+    """Encode a timestamp parameter as text."""
+    return value if isinstance(value, str) else value.isoformat()
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Send timestamps as text, cast by the database like with psycopg2.
+
+    sqlalchemy doesn't type the strings compared to timestamp columns, which asyncpg
+    would otherwise refuse to encode.
+    """
+    for name in ("timestamp", "timestamptz"):
+        await conn.set_type_codec(
+            name,
+            schema="pg_catalog",
+            encoder=_encode_timestamp,
+            decoder=parse_datetime,
+            format="text",
+        )
+
+
+def bind_args(compiled: SQLCompiler, params: Optional[Dict] = None) -> List[Any]:
+    """Get the positional parameters of a compiled statement."""
+    processors = compiled._bind_processors
+    return [
+        processors[name](value) if name in processors else value
+        for name, value in compiled.construct_params(params).items()
+    ]
+
+
+def compile_statement(statement: ClauseElement) -> Tuple[str, SQLCompiler]:
+    """Compile a statement, with the positional parameters of asyncpg."""
+    compiled = statement.compile(dialect=dialect)
+    positions = {
+        name: f"${position}"
+        for position, name in enumerate(compiled.bind_names.values(), start=1)
+    }
+    return compiled.string % positions, compiled
+
+
+def result_rows(compiled: SQLCompiler, records: List[asyncpg.Record]) -> List[Any]:
+    """Convert the records selected by a compiled statement to named tuples."""
+    keys = [column[0] for column in compiled._result_columns]
+    processors = [
+        column[3]._cached_result_processor(dialect, None)
+        for column in compiled._result_columns
+    ]
+    return [
+        KeyedTuple(
+            [
+                processor(value) if processor else value
+                for processor, value in zip(processors, record)
+            ],
+            keys,
+        )
+        for record in records
+    ]
+
+
+def statement_timeout(request: Any) -> Optional[float]:
+    """Get the statement timeout of the route being served, passed to asyncpg."""
+    return getattr(getattr(request, "state", None), "statement_timeout", None)
+
+
+@contextmanager
+def translate_errors() -> Iterator[None]:
+    """Translate database errors into errors of the api."""
+    try:
+        yield
+    except asyncpg.UniqueViolationError as e:
+        raise errors.ConflictError("resource already exists") from e
+    except asyncpg.ForeignKeyViolationError as e:
+        raise errors.ForeignKeyError("collection does not exist") from e
+    except (asyncio.TimeoutError, asyncpg.QueryCanceledError) as e:
+        raise errors.QueryTimeoutError(
+            "database query exceeded the statement timeout"
+        ) from e
+    except asyncpg.PostgresError as e:
+        logger.error(e, exc_info=True)
+        raise errors.DatabaseError("unhandled database error")
+
+
+async def fetch(
+    conn: asyncpg.Connection, statement: ClauseElement, request: Any = None
+) -> List[Any]:
+    """Run a statement, returning the selected rows."""
+    sql, compiled = compile_statement(statement)
+    with translate_errors():
+        records = await conn.fetch(
+            sql, *bind_args(compiled), timeout=statement_timeout(request)
+        )
+    return result_rows(compiled, records)
+
+
+async def fetchval(
+    conn: asyncpg.Connection, statement: ClauseElement, request: Any = None
+) -> Any:
+    """Run a statement, returning the first value selected."""
+    sql, compiled = compile_statement(statement)
+    with translate_errors():
+        return await conn.fetchval(
+            sql, *bind_args(compiled), timeout=statement_timeout(request)
+        )
+
+
+async def execute(
+    conn: asyncpg.Connection, statement: ClauseElement, request: Any = None
+) -> str:
+    """Run a statement, returning its status."""
+    sql, compiled = compile_statement(statement)
+    with translate_errors():
+        return await conn.execute(
+            sql, *bind_args(compiled), timeout=statement_timeout(request)
+        )
+
+
+@attr.s
+class AsyncSession:
+    """asyncpg connection pools to the reader and writer databases.
+
+    The pools are opened by `connect`, on startup of the application.
+    """
+
+    reader_conn_string: str = attr.ib()
+    writer_conn_string: str = attr.ib()
+    pool_size: int = attr.ib(default=5)
+    max_overflow: int = attr.ib(default=10)
+    reader: Optional[asyncpg.pool.Pool] = attr.ib(default=None, init=False)
+    writer: Optional[asyncpg.pool.Pool] = attr.ib(default=None, init=False)
+
+    @classmethod
+    def create_from_env(cls):
+        """Create from environment."""
+        return cls(
+            reader_conn_string=os.environ["READER_CONN_STRING"],
+            writer_conn_string=os.environ["WRITER_CONN_STRING"],
+        )
+
+    @classmethod
+    def create_from_settings(cls, settings: SqlalchemySettings) -> "AsyncSession":
+        """Create an AsyncSession object from settings."""
+        return cls(
+            reader_conn_string=settings.reader_connection_string,
+            writer_conn_string=settings.writer_connection_string,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+        )
+
+    async def connect(self) -> None:
+        """Open the connection pools."""
+        for name in ("reader", "writer"):
+            pool = await asyncpg.create_pool(
+                getattr(self, f"{name}_conn_string"),
+                min_size=self.pool_size,
+                max_size=self.pool_size + self.max_overflow,
+                init=_init_connection,
+                server_settings={"application_name": "stac-fastapi-sqlalchemy"},
+            )
+            setattr(self, name, pool)
+
+    async def close(self) -> None:
+        """Close the connection pools."""
+        for pool in (self.reader, self.writer):
+            if pool is not None:
+                await pool.close()
+        self.reader = self.writer = None
+
+    @asynccontextmanager
+    async def acquire(
+        self, request: Any, write: bool = False
+    ) -> AsyncIterator[asyncpg.Connection]:
+        """Acquire a connection of the reader or writer pool for a request.
+
+        The time spent waiting for the connection and holding it are added to the
+        `pool_wait` and `db` timings of the request.
+        """
+        pool = self.writer if write else self.reader
+        with timed(request, POOL_WAIT):
+            conn = await pool.acquire()
+        try:
+            with timed(request, DB):
+                yield conn
+        finally:
+            await pool.release(conn)
+
+    def pool_metrics(self, app: FastAPI) -> Iterator[Sample]:
+        """Collect the size and use of the connection pools, for the metrics extension."""
+        for name, pool in (("reader", self.reader), ("writer", self.writer)):
+            if pool is None:
+                continue
+            labels = {"pool": name}
+            yield Sample(
+                "stac_db_pool_size",
+                pool.get_size(),
+                labels,
+                help="Number of open connections of a pool.",
+            )
+            yield Sample(
+                "stac_db_pool_in_use",
+                pool.get_size() - pool.get_idle_size(),
+                labels,
+                help="Number of connections of a pool in use.",
+            )
+            yield Sample(
+                "stac_db_pool_max_size",
+                pool.get_max_size(),
+                labels,
+                help="Maximum number of connections of a pool.",
+            )
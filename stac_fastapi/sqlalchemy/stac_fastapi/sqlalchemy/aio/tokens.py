@@ -0,0 +1,64 @@
+"""Asynchronous pagination token client."""
+from typing import Any, Type
+
+import asyncpg
+import attr
+import sqlalchemy as sa
+
+from stac_fastapi.sqlalchemy.aio.session import AsyncSession, execute, fetchval
+from stac_fastapi.sqlalchemy.models import database
+from stac_fastapi.sqlalchemy.tokens import new_token_id, sign_keyset, verify_token
+from stac_fastapi.types.errors import ConflictError, NotFoundError
+
+
+@attr.s
+class AsyncPaginationTokenClient:
+    """Pagination token specific CRUD operations, with asyncpg.
+
+    Tokens are the ones of `stac_fastapi.sqlalchemy.tokens.PaginationTokenClient`, so
+    the synchronous and asynchronous clients can serve each other's pages.
+    """
+
+    session: AsyncSession = attr.ib(default=attr.Factory(AsyncSession.create_from_env))
+    token_table: Type[database.PaginationToken] = attr.ib(
+        default=database.PaginationToken
+    )
+
+    async def insert_token(self, keyset: str, request: Any, tries: int = 0) -> str:
+        """Store a keyset in the tokens table, returning its id."""
+        uid = new_token_id()
+        statement = sa.insert(self.token_table.__table__).values(id=uid, keyset=keyset)
+        try:
+            async with self.session.acquire(request, write=True) as conn:
+                await execute(conn, statement, request)
+        except ConflictError:
+            # Try again if uid already exists in the database
+            if tries >= 5:
+                raise
+            return await self.insert_token(keyset, request, tries=tries + 1)
+        return uid
+
+    async def get_token(
+        self, token_id: str, conn: asyncpg.Connection, request: Any
+    ) -> str:
+        """Retrieve a keyset from the tokens table."""
+        statement = sa.select([self.token_table.keyset]).where(
+            self.token_table.id == token_id
+        )
+        keyset = await fetchval(conn, statement, request)
+        if keyset is None:
+            raise NotFoundError(f"{self.token_table.__name__} {token_id} not found")
+        return keyset
+
+    async def encode_token(self, keyset: str, request: Any) -> str:
+        """Create a token from a keyset."""
+        return sign_keyset(keyset) or await self.insert_token(keyset, request)
+
+    async def decode_token(
+        self, token: str, conn: asyncpg.Connection, request: Any
+    ) -> str:
+        """Retrieve the keyset from a token, with the connection serving the page."""
+        keyset = verify_token(token)
+        if keyset is None:
+            keyset = await self.get_token(token, conn, request)
+        return keyset
@@ -0,0 +1,222 @@
+"""Asynchronous transactions extension client."""
+import json
+from typing import AsyncIterator, Dict, List, Optional, Type
+
+import asyncpg
+import attr
+import sqlalchemy as sa
+
+from stac_fastapi.extensions.third_party.bulk_transactions import BulkTransactionMethod
+from stac_fastapi.sqlalchemy.aio.core import collection_from_row
+from stac_fastapi.sqlalchemy.aio.session import (
+    AsyncSession,
+    bind_args,
+    compile_statement,
+    execute,
+    fetch,
+    fetchval,
+    translate_errors,
+)
+from stac_fastapi.sqlalchemy.models import database, schemas
+from stac_fastapi.sqlalchemy.serializers import ItemSerializer
+from stac_fastapi.sqlalchemy.transactions import BulkTransactionsClient
+from stac_fastapi.types.core import BaseTransactionsClient
+from stac_fastapi.types.errors import InvalidQueryParameter, NotFoundError
+
+
+@attr.s
+class AsyncTransactionsClient(BaseTransactionsClient):
+    """Transactions extension specific CRUD operations, running on asyncpg."""
+
+    session: AsyncSession = attr.ib(default=attr.Factory(AsyncSession.create_from_env))
+    collection_table: Type[database.Collection] = attr.ib(default=database.Collection)
+    item_table: Type[database.Item] = attr.ib(default=database.Item)
+
+    async def create_item(self, model: schemas.Item, **kwargs) -> schemas.Item:
+        """Create item."""
+        request = kwargs["request"]
+        data = self.item_table.get_database_model(model)
+        async with self.session.acquire(request, write=True) as conn:
+            await execute(
+                conn, sa.insert(self.item_table.__table__).values(**data), request
+            )
+        item = self.item_table(**data)
+        item.base_url = str(request.base_url)
+        return schemas.Item.from_orm(item)
+
+    async def create_collection(
+        self, model: schemas.Collection, **kwargs
+    ) -> schemas.Collection:
+        """Create collection."""
+        request = kwargs["request"]
+        data = self.collection_table.get_database_model(model)
+        async with self.session.acquire(request, write=True) as conn:
+            await execute(
+                conn, sa.insert(self.collection_table.__table__).values(**data), request
+            )
+        collection = self.collection_table(**data)
+        collection.base_url = str(request.base_url)
+        return schemas.Collection.from_orm(collection)
+
+    async def update_item(self, model: schemas.Item, **kwargs) -> schemas.Item:
+        """Update item."""
+        request = kwargs["request"]
+        data = self.item_table.get_database_model(model)
+        statement = (
+            sa.update(self.item_table.__table__)
+            .where(self.item_table.id == model.id)
+            .values(**data)
+            .returning(self.item_table.id)
+        )
+        async with self.session.acquire(request, write=True) as conn:
+            if await fetchval(conn, statement, request) is None:
+                raise NotFoundError(f"Item {model.id} not found")
+        item = self.item_table(**data)
+        item.base_url = str(request.base_url)
+        return schemas.Item.from_orm(item)
+
+    async def update_collection(
+        self, model: schemas.Collection, **kwargs
+    ) -> schemas.Collection:
+        """Update collection."""
+        request = kwargs["request"]
+        statement = (
+            sa.update(self.collection_table.__table__)
+            .where(self.collection_table.id == model.id)
+            .values(**self.collection_table.get_database_model(model))
+            .returning(self.collection_table.id)
+        )
+        async with self.session.acquire(request, write=True) as conn:
+            if await fetchval(conn, statement, request) is None:
+                raise NotFoundError(f"Collection {model.id} not found")
+        return model
+
+    async def delete_item(self, item_id: str, collection_id: str, **kwargs) -> Dict:
+        """Delete item."""
+        request = kwargs["request"]
+        serializer = ItemSerializer(base_url=str(request.base_url))
+        statement = (
+            sa.select(serializer.columns(self.item_table))
+            .where(self.item_table.id == item_id)
+            .with_for_update()
+        )
+        async with self.session.acquire(request, write=True) as conn:
+            async with conn.transaction():
+                rows = await fetch(conn, statement, request)
+                if not rows:
+                    raise NotFoundError(f"Item {item_id} not found")
+                await execute(
+                    conn,
+                    sa.delete(self.item_table.__table__).where(
+                        self.item_table.id == item_id
+                    ),
+                    request,
+                )
+        return serializer.serialize(rows[0])
+
+    async def delete_collection(self, id: str, **kwargs) -> schemas.Collection:
+        """Delete collection."""
+        request = kwargs["request"]
+        statement = (
+            sa.select([self.collection_table.__table__])
+            .where(self.collection_table.id == id)
+            .with_for_update()
+        )
+        async with self.session.acquire(request, write=True) as conn:
+            async with conn.transaction():
+                rows = await fetch(conn, statement, request)
+                if not rows:
+                    raise NotFoundError(f"Collection {id} not found")
+                await execute(
+                    conn,
+                    sa.delete(self.collection_table.__table__).where(
+                        self.collection_table.id == id
+                    ),
+                    request,
+                )
+        return collection_from_row(
+            self.collection_table, rows[0], str(request.base_url)
+        )
+
+
+@attr.s
+class AsyncBulkTransactionsClient(BulkTransactionsClient):
+    """Postgres bulk transactions, running on asyncpg.
+
+    Items are loaded like with `BulkTransactionsClient`, one transaction per chunk.
+    """
+
+    session: AsyncSession = attr.ib(default=attr.Factory(AsyncSession.create_from_env))
+
+    def __attrs_post_init__(self):
+        """Connections are acquired from the writer pool of the session."""
+
+    async def _copy_rows(self, items: List[Dict]) -> AsyncIterator[bytes]:
+        """Stream preprocessed items in the COPY text format."""
+        for item in items:
+            yield self._copy_row(item).encode()
+
+    async def _copy_items(
+        self, conn: asyncpg.Connection, items: List[Dict], chunk_size: int
+    ) -> None:
+        """Load preprocessed items with COPY, one transaction per chunk."""
+        table = database.Item.__table__
+        columns = [column.name for column in table.columns]
+        for chunk in self._chunks(items, chunk_size):
+            with translate_errors():
+                async with conn.transaction():
+                    await conn.copy_to_table(
+                        table.name,
+                        schema_name=table.schema,
+                        columns=columns,
+                        source=self._copy_rows(chunk),
+                    )
+
+    async def _insert_items(
+        self, conn: asyncpg.Connection, items: List[Dict], chunk_size: int
+    ) -> None:
+        """Load preprocessed items with INSERT statements, one transaction per chunk."""
+        table = database.Item.__table__
+        sql, compiled = compile_statement(table.insert())
+        for chunk in self._chunks(items, chunk_size):
+            args = [
+                bind_args(
+                    compiled,
+                    {
+                        column.name: (
+                            json.dumps(item["geometry"])
+                            if column.name == "geometry"
+                            else item.get(column.name)
+                        )
+                        for column in table.columns
+                    },
+                )
+                for item in chunk
+            ]
+            with translate_errors():
+                async with conn.transaction():
+                    await conn.executemany(sql, args)
+
+    async def bulk_item_insert(
+        self, items: schemas.Items, chunk_size: Optional[int] = None, **kwargs
+    ) -> str:
+        """Bulk item insertion.
+
+        Items are loaded with COPY when `use_copy` is set, otherwise with INSERT
+        statements.
+        """
+        if getattr(items, "method", None) == BulkTransactionMethod.UPSERT:
+            raise InvalidQueryParameter("Bulk upserts are not supported")
+        # Use items.items because schemas.Items is a model with an items key
+        processed_items = [self._preprocess_item(item) for item in items.items]
+        request = kwargs.get("request")
+        async with self.session.acquire(request, write=True) as conn:
+            if self.use_copy:
+                await self._copy_items(
+                    conn, processed_items, chunk_size or self.copy_chunk_size
+                )
+            else:
+                await self._insert_items(
+                    conn, processed_items, chunk_size or len(processed_items) or 1
+                )
+        return f"Successfully added {len(processed_items)} items."
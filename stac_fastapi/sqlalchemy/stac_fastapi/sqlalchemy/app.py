@@ -1,4 +1,6 @@
 """FastAPI application."""
+from anyio.to_thread import current_default_thread_limiter
+
 from stac_fastapi.api.app import StacApi
 from stac_fastapi.extensions.core import (
     FieldsExtension,
@@ -6,7 +8,16 @@ from stac_fastapi.extensions.core import (
     SortExtension,
     TransactionExtension,
 )
-from stac_fastapi.extensions.third_party import BulkTransactionExtension
+from stac_fastapi.extensions.third_party import (
+    BulkTransactionExtension,
+    MetricsExtension,
+)
+from stac_fastapi.sqlalchemy.aio.core import AsyncCoreCrudClient
+from stac_fastapi.sqlalchemy.aio.session import AsyncSession
+from stac_fastapi.sqlalchemy.aio.transactions import (
+    AsyncBulkTransactionsClient,
+    AsyncTransactionsClient,
+)
 from stac_fastapi.sqlalchemy.config import SqlalchemySettings
 from stac_fastapi.sqlalchemy.core import CoreCrudClient
 from stac_fastapi.sqlalchemy.session import Session
@@ -17,22 +28,52 @@ from stac_fastapi.sqlalchemy.transactions import (
 from stac_fastapi.sqlalchemy.types.search import SQLAlchemySTACSearch
 
 settings = SqlalchemySettings()
-session = Session.create_from_settings(settings)
+if settings.async_clients:
+    session = AsyncSession.create_from_settings(settings)
+    client = AsyncCoreCrudClient(session=session)
+    transactions_client = AsyncTransactionsClient(session=session)
+    bulk_transactions_client = AsyncBulkTransactionsClient(session=session)
+else:
+    session = Session.create_from_settings(settings)
+    client = CoreCrudClient(session=session)
+    transactions_client = TransactionsClient(session=session)
+    bulk_transactions_client = BulkTransactionsClient(session=session)
+extensions = [
+    TransactionExtension(client=transactions_client),
+    BulkTransactionExtension(client=bulk_transactions_client),
+    FieldsExtension(),
+    QueryExtension(),
+    SortExtension(),
+]
+if settings.enable_metrics:
+    extensions.append(
+        MetricsExtension(collectors=[session.pool_metrics, client.cache_metrics])
+    )
 api = StacApi(
     settings=settings,
-    extensions=[
-        TransactionExtension(client=TransactionsClient(session=session)),
-        BulkTransactionExtension(client=BulkTransactionsClient(session=session)),
-        FieldsExtension(),
-        QueryExtension(),
-        SortExtension(),
-    ],
-    client=CoreCrudClient(session=session),
+    extensions=extensions,
+    client=client,
     search_request_model=SQLAlchemySTACSearch,
 )
 app = api.app
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Size the threadpool running the client calls, or connect to the database."""
+    if settings.threadpool_size:
+        current_default_thread_limiter().total_tokens = settings.threadpool_size
+    if settings.async_clients:
+        await session.connect()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the connection pools of the asynchronous clients."""
+    if settings.async_clients:
+        await session.close()
+
+
 def run():
     """Run app from command line using uvicorn if available."""
     try:
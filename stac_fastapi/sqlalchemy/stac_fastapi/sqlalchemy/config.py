@@ -1,5 +1,5 @@
 """Postgres API configuration."""
-from typing import Set
+from typing import Optional, Set
 
 from stac_fastapi.types.config import ApiSettings
 
@@ -14,6 +14,23 @@ class SqlalchemySettings(ApiSettings):
         postgres_host_writer: hostname for the writer connection.
         postgres_port: database port.
         postgres_dbname: database name.
+        pagination_token_secret: key used to sign self-contained pagination tokens,
+            shared by all the workers. Without it, the keysets are stored in the
+            tokens table and tokens are their ids.
+        legacy_pagination_tokens: accept token ids stored in the tokens table by
+            earlier releases when `pagination_token_secret` is set.
+        db_pool_size: number of connections kept open to each database.
+        db_max_overflow: number of connections opened above `db_pool_size` under
+            load.
+        geometry_max_decimal_digits: maximum number of decimal digits of the
+            coordinates of the geometries, which are encoded as GeoJSON by the
+            database.
+        threadpool_size: number of threads running the (synchronous) client calls,
+            which bounds the number of queries in flight. Defaults to the starlette
+            threadpool size.
+        async_clients: serve the api with the asynchronous clients running on
+            asyncpg, so the number of queries in flight is only bounded by the
+            connection pools.
     """
 
     postgres_user: str
@@ -29,6 +46,16 @@ class SqlalchemySettings(ApiSettings):
     # Fields which are item properties but indexed as distinct fields in the database model
     indexed_fields: Set[str] = {"datetime"}
 
+    pagination_token_secret: Optional[str] = None
+    legacy_pagination_tokens: bool = False
+
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    threadpool_size: Optional[int] = None
+    async_clients: bool = False
+
+    geometry_max_decimal_digits: int = 15
+
     @property
     def reader_connection_string(self):
         """Create reader psql connection string."""
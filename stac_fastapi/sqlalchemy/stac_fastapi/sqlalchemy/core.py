@@ -2,30 +2,37 @@
 import json
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Type, Union
+from typing import Any, Dict, Iterator, List, Optional, Set, Type, Union
 from urllib.parse import urlencode
 
 import attr
 import geoalchemy2 as ga
 import sqlalchemy as sa
+from fastapi import FastAPI
 from shapely.geometry import Polygon as ShapelyPolygon
 from shapely.geometry import shape
 from sqlakeyset import get_page
-from sqlalchemy import func
+from sqlalchemy.orm import Query
 from sqlalchemy.orm import Session as SqlSession
 from stac_pydantic import ItemCollection
 from stac_pydantic.api import ConformanceClasses
 from stac_pydantic.api.extensions.paging import PaginationLink
 from stac_pydantic.shared import Relations
+from starlette.requests import Request
 
 from stac_fastapi.extensions.core import ContextExtension, FieldsExtension
+from stac_fastapi.sqlalchemy.count import count_matched
 from stac_fastapi.sqlalchemy.models import database, schemas
-from stac_fastapi.sqlalchemy.session import Session
+from stac_fastapi.sqlalchemy.serializers import ItemSerializer
+from stac_fastapi.sqlalchemy.session import Session, prepare_session
 from stac_fastapi.sqlalchemy.tokens import PaginationTokenClient
 from stac_fastapi.sqlalchemy.types.search import SQLAlchemySTACSearch
+from stac_fastapi.types.cache import TTLCache
 from stac_fastapi.types.config import Settings
 from stac_fastapi.types.core import BaseCoreClient
 from stac_fastapi.types.errors import NotFoundError
+from stac_fastapi.types.metrics import Sample, cache_samples
+from stac_fastapi.types.timings import SERIALIZATION, timed
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +46,22 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
     session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
     item_table: Type[database.Item] = attr.ib(default=database.Item)
     collection_table: Type[database.Collection] = attr.ib(default=database.Collection)
+    _count_cache: Optional[TTLCache] = attr.ib(default=None, init=False, repr=False)
+
+    @property
+    def count_cache(self) -> TTLCache:
+        """Cache of the number of items matched by searches, created on first use."""
+        if self._count_cache is None:
+            settings = Settings.get()
+            self._count_cache = TTLCache(
+                ttl=settings.count_cache_ttl, maxsize=settings.count_cache_maxsize
+            )
+        return self._count_cache
+
+    def cache_metrics(self, app: FastAPI) -> Iterator[Sample]:
+        """Collect the lookups of the client caches, for the metrics extension."""
+        if self._count_cache is not None:
+            yield from cache_samples("count_cache", self._count_cache)
 
     @staticmethod
     def _lookup_id(
@@ -62,26 +85,31 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
     def all_collections(self, **kwargs) -> List[schemas.Collection]:
         """Read all collections from the database."""
         with self.session.reader.context_session() as session:
+            prepare_session(session, kwargs["request"])
             collections = session.query(self.collection_table).all()
             response = []
-            for collection in collections:
-                collection.base_url = str(kwargs["request"].base_url)
-                response.append(schemas.Collection.from_orm(collection))
+            with timed(kwargs["request"], SERIALIZATION):
+                for collection in collections:
+                    collection.base_url = str(kwargs["request"].base_url)
+                    response.append(schemas.Collection.from_orm(collection))
             return response
 
     def get_collection(self, id: str, **kwargs) -> schemas.Collection:
         """Get collection by id."""
         with self.session.reader.context_session() as session:
+            prepare_session(session, kwargs["request"])
             collection = self._lookup_id(id, self.collection_table, session)
             # TODO: Don't do this
             collection.base_url = str(kwargs["request"].base_url)
-            return schemas.Collection.from_orm(collection)
+            with timed(kwargs["request"], SERIALIZATION):
+                return schemas.Collection.from_orm(collection)
 
     def item_collection(
         self, id: str, limit: int = 10, token: str = None, **kwargs
     ) -> ItemCollection:
         """Read an item collection from the database."""
         with self.session.reader.context_session() as session:
+            prepare_session(session, kwargs["request"])
             collection_children = (
                 session.query(self.item_table)
                 .join(self.collection_table)
@@ -90,48 +118,32 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
             )
             count = None
             if self.extension_is_enabled(ContextExtension):
-                count_query = collection_children.statement.with_only_columns(
-                    [func.count()]
-                ).order_by(None)
-                count = collection_children.session.execute(count_query).scalar()
-            token = self.get_token(token) if token else token
+                count = count_matched(
+                    collection_children, self.count_cache, ("collection", id)
+                )
+            token = self.decode_token(token) if token else token
             page = get_page(collection_children, per_page=limit, page=(token or False))
             # Create dynamic attributes for each page
             page.next = (
-                self.insert_token(keyset=page.paging.bookmark_next)
+                self.encode_token(page.paging.bookmark_next)
                 if page.paging.has_next
                 else None
             )
             page.previous = (
-                self.insert_token(keyset=page.paging.bookmark_previous)
+                self.encode_token(page.paging.bookmark_previous)
                 if page.paging.has_previous
                 else None
             )
 
-            links = []
-            if page.next:
-                links.append(
-                    PaginationLink(
-                        rel=Relations.next,
-                        type="application/geo+json",
-                        href=f"{kwargs['request'].base_url}collections/{id}/items?token={page.next}&limit={limit}",
-                        method="GET",
-                    )
-                )
-            if page.previous:
-                links.append(
-                    PaginationLink(
-                        rel=Relations.previous,
-                        type="application/geo+json",
-                        href=f"{kwargs['request'].base_url}collections/{id}/items?token={page.previous}&limit={limit}",
-                        method="GET",
-                    )
-                )
+            links = self._item_collection_links(
+                kwargs["request"], id, limit, page.next, page.previous
+            )
 
             response_features = []
-            for item in page:
-                item.base_url = str(kwargs["request"].base_url)
-                response_features.append(schemas.Item.from_orm(item))
+            with timed(kwargs["request"], SERIALIZATION):
+                for item in page:
+                    item.base_url = str(kwargs["request"].base_url)
+                    response_features.append(schemas.Item.from_orm(item))
 
             context_obj = None
             if self.extension_is_enabled(ContextExtension):
@@ -147,11 +159,38 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
     def get_item(self, item_id: str, collection_id: str, **kwargs) -> schemas.Item:
         """Get item by id."""
         with self.session.reader.context_session() as session:
+            prepare_session(session, kwargs["request"])
             item = self._lookup_id(item_id, self.item_table, session)
             item.base_url = str(kwargs["request"].base_url)
-            return schemas.Item.from_orm(item)
+            with timed(kwargs["request"], SERIALIZATION):
+                return schemas.Item.from_orm(item)
 
-    def get_search(
+    def _item_collection_links(
+        self,
+        request: Request,
+        id: str,
+        limit: int,
+        next_token: Optional[str],
+        previous_token: Optional[str],
+    ) -> List[PaginationLink]:
+        """Create the paging links of an item collection."""
+        links = []
+        for rel, token in (
+            (Relations.next, next_token),
+            (Relations.previous, previous_token),
+        ):
+            if token:
+                links.append(
+                    PaginationLink(
+                        rel=rel,
+                        type="application/geo+json",
+                        href=f"{request.base_url}collections/{id}/items?token={token}&limit={limit}",
+                        method="GET",
+                    )
+                )
+        return links
+
+    def _get_search_request(
         self,
         collections: Optional[List[str]] = None,
         ids: Optional[List[str]] = None,
@@ -162,10 +201,8 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
         token: Optional[str] = None,
         fields: Optional[List[str]] = None,
         sortby: Optional[str] = None,
-        **kwargs,
-    ) -> Dict[str, Any]:
-        """GET search catalog."""
-        # Parse request parameters
+    ) -> SQLAlchemySTACSearch:
+        """Parse the parameters of a GET search."""
         base_args = {
             "collections": collections,
             "ids": ids,
@@ -200,15 +237,15 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
                     includes.add(field)
             base_args["fields"] = {"include": includes, "exclude": excludes}
 
-        # Do the request
-        search_request = SQLAlchemySTACSearch(**base_args)
-        resp = self.post_search(search_request, request=kwargs["request"])
+        return SQLAlchemySTACSearch(**base_args)
 
-        # Pagination
+    @staticmethod
+    def _get_links(links: List[PaginationLink], request: Request) -> List:
+        """Turn the paging links of a POST search into links of a GET search."""
         page_links = []
-        for link in resp["links"]:
+        for link in links:
             if link.rel == Relations.next or link.rel == Relations.previous:
-                query_params = dict(kwargs["request"].query_params)
+                query_params = dict(request.query_params)
                 if link.body and link.merge:
                     query_params.update(link.body)
                 link.method = "GET"
@@ -218,175 +255,165 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
                 page_links.append(link)
             else:
                 page_links.append(link)
-        resp["links"] = page_links
-        return resp
+        return page_links
 
-    def post_search(
-        self, search_request: SQLAlchemySTACSearch, **kwargs
+    def get_search(
+        self,
+        collections: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+        bbox: Optional[List[NumType]] = None,
+        datetime: Optional[Union[str, datetime]] = None,
+        limit: Optional[int] = 10,
+        query: Optional[str] = None,
+        token: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        sortby: Optional[str] = None,
+        **kwargs,
     ) -> Dict[str, Any]:
-        """POST search catalog."""
-        with self.session.reader.context_session() as session:
-            token = (
-                self.get_token(search_request.token) if search_request.token else False
-            )
-            query = session.query(self.item_table)
-
-            # Filter by collection
-            count = None
-            if search_request.collections:
-                query = query.join(self.collection_table).filter(
-                    sa.or_(
-                        *[
-                            self.collection_table.id == col_id
-                            for col_id in search_request.collections
-                        ]
-                    )
-                )
+        """GET search catalog."""
+        search_request = self._get_search_request(
+            collections, ids, bbox, datetime, limit, query, token, fields, sortby
+        )
+        resp = self.post_search(search_request, request=kwargs["request"])
+        resp["links"] = self._get_links(resp["links"], kwargs["request"])
+        return resp
 
-            # Sort
-            if search_request.sortby:
-                sort_fields = [
-                    getattr(
-                        self.item_table.get_field(sort.field), sort.direction.value
-                    )()
-                    for sort in search_request.sortby
+    def _search_projection(self, search_request: SQLAlchemySTACSearch) -> Dict:
+        """Get the fields projection of a search, as include and exclude expressions."""
+        if not self.extension_is_enabled(FieldsExtension):
+            return {}
+        if search_request.query is not None:
+            query_include: Set[str] = set(
+                [
+                    k if k in Settings.get().indexed_fields else f"properties.{k}"
+                    for k in search_request.query.keys()
                 ]
-                sort_fields.append(self.item_table.id)
-                query = query.order_by(*sort_fields)
+            )
+            if not search_request.field.include:
+                search_request.field.include = query_include
             else:
-                # Default sort is date
-                query = query.order_by(
-                    self.item_table.datetime.desc(), self.item_table.id
+                search_request.field.include.union(query_include)
+
+        return search_request.field.filter_fields
+
+    def _filter_items(
+        self, query: Query, search_request: SQLAlchemySTACSearch
+    ) -> Query:
+        """Filter a query of items with the parameters of a search."""
+        # Filter by collection
+        if search_request.collections:
+            query = query.join(self.collection_table).filter(
+                sa.or_(
+                    *[
+                        self.collection_table.id == col_id
+                        for col_id in search_request.collections
+                    ]
                 )
+            )
 
-            # Ignore other parameters if ID is present
-            if search_request.ids:
-                id_filter = sa.or_(
-                    *[self.item_table.id == i for i in search_request.ids]
-                )
-                items = query.filter(id_filter).order_by(self.item_table.id)
-                page = get_page(items, per_page=search_request.limit, page=token)
-                if self.extension_is_enabled(ContextExtension):
-                    count = len(search_request.ids)
-                page.next = (
-                    self.insert_token(keyset=page.paging.bookmark_next)
-                    if page.paging.has_next
-                    else None
-                )
-                page.previous = (
-                    self.insert_token(keyset=page.paging.bookmark_previous)
-                    if page.paging.has_previous
-                    else None
-                )
+        # Ignore other parameters if ID is present
+        if search_request.ids:
+            return query.filter(
+                sa.or_(*[self.item_table.id == i for i in search_request.ids])
+            )
 
-            else:
-                # Spatial query
-                poly = None
-                if search_request.intersects is not None:
-                    poly = shape(search_request.intersects)
-                elif search_request.bbox:
-                    poly = ShapelyPolygon.from_bounds(*search_request.bbox)
-
-                if poly:
-                    filter_geom = ga.shape.from_shape(poly, srid=4326)
-                    query = query.filter(
-                        ga.func.ST_Intersects(self.item_table.geometry, filter_geom)
-                    )
+        # Spatial query
+        poly = None
+        if search_request.intersects is not None:
+            poly = shape(search_request.intersects)
+        elif search_request.bbox:
+            poly = ShapelyPolygon.from_bounds(*search_request.bbox)
+
+        if poly:
+            filter_geom = ga.shape.from_shape(poly, srid=4326)
+            query = query.filter(
+                ga.func.ST_Intersects(self.item_table.geometry, filter_geom)
+            )
 
-                # Temporal query
-                if search_request.datetime:
-                    # Two tailed query (between)
-                    if ".." not in search_request.datetime:
-                        query = query.filter(
-                            self.item_table.datetime.between(*search_request.datetime)
-                        )
-                    # All items after the start date
-                    if search_request.datetime[0] != "..":
-                        query = query.filter(
-                            self.item_table.datetime >= search_request.datetime[0]
-                        )
-                    # All items before the end date
-                    if search_request.datetime[1] != "..":
-                        query = query.filter(
-                            self.item_table.datetime <= search_request.datetime[1]
-                        )
-
-                # Query fields
-                if search_request.query:
-                    for (field_name, expr) in search_request.query.items():
-                        field = self.item_table.get_field(field_name)
-                        for (op, value) in expr.items():
-                            query = query.filter(op.operator(field, value))
-
-                if self.extension_is_enabled(ContextExtension):
-                    count_query = query.statement.with_only_columns(
-                        [func.count()]
-                    ).order_by(None)
-                    count = query.session.execute(count_query).scalar()
-                page = get_page(query, per_page=search_request.limit, page=token)
-                # Create dynamic attributes for each page
-                page.next = (
-                    self.insert_token(keyset=page.paging.bookmark_next)
-                    if page.paging.has_next
-                    else None
+        # Temporal query
+        if search_request.datetime:
+            # Two tailed query (between)
+            if ".." not in search_request.datetime:
+                query = query.filter(
+                    self.item_table.datetime.between(*search_request.datetime)
                 )
-                page.previous = (
-                    self.insert_token(keyset=page.paging.bookmark_previous)
-                    if page.paging.has_previous
-                    else None
+            # All items after the start date
+            if search_request.datetime[0] != "..":
+                query = query.filter(
+                    self.item_table.datetime >= search_request.datetime[0]
                 )
-
-            links = []
-            if page.next:
-                links.append(
-                    PaginationLink(
-                        rel=Relations.next,
-                        type="application/geo+json",
-                        href=f"{kwargs['request'].base_url}search",
-                        method="POST",
-                        body={"token": page.next},
-                        merge=True,
-                    )
+            # All items before the end date
+            if search_request.datetime[1] != "..":
+                query = query.filter(
+                    self.item_table.datetime <= search_request.datetime[1]
                 )
-            if page.previous:
+
+        # Query fields
+        if search_request.query:
+            for (field_name, expr) in search_request.query.items():
+                field = self.item_table.get_field(field_name)
+                for (op, value) in expr.items():
+                    query = query.filter(op.operator(field, value))
+        return query
+
+    def _search_order(self, search_request: SQLAlchemySTACSearch) -> List:
+        """Get the order of the items matched by a search, which is unique."""
+        if search_request.sortby:
+            order = [
+                getattr(self.item_table.get_field(sort.field), sort.direction.value)()
+                for sort in search_request.sortby
+            ]
+            order.append(self.item_table.id)
+        else:
+            # Default sort is date
+            order = [self.item_table.datetime.desc(), self.item_table.id]
+        if search_request.ids:
+            order.append(self.item_table.id)
+        return order
+
+    def _search_links(
+        self,
+        request: Request,
+        next_token: Optional[str],
+        previous_token: Optional[str],
+    ) -> List[PaginationLink]:
+        """Create the paging links of a search."""
+        links = []
+        for rel, token in (
+            (Relations.next, next_token),
+            (Relations.previous, previous_token),
+        ):
+            if token:
                 links.append(
                     PaginationLink(
-                        rel=Relations.previous,
+                        rel=rel,
                         type="application/geo+json",
-                        href=f"{kwargs['request'].base_url}search",
+                        href=f"{request.base_url}search",
                         method="POST",
-                        body={"token": page.previous},
+                        body={"token": token},
                         merge=True,
                     )
                 )
+        return links
 
-            response_features = []
-            filter_kwargs = {}
-            if self.extension_is_enabled(FieldsExtension):
-                if search_request.query is not None:
-                    query_include: Set[str] = set(
-                        [
-                            k
-                            if k in Settings.get().indexed_fields
-                            else f"properties.{k}"
-                            for k in search_request.query.keys()
-                        ]
-                    )
-                    if not search_request.field.include:
-                        search_request.field.include = query_include
-                    else:
-                        search_request.field.include.union(query_include)
-
-                filter_kwargs = search_request.field.filter_fields
-
-            xvals = []
-            yvals = []
-            for item in page:
-                item.base_url = str(kwargs["request"].base_url)
-                item_model = schemas.Item.from_orm(item)
-                xvals += [item_model.bbox[0], item_model.bbox[2]]
-                yvals += [item_model.bbox[1], item_model.bbox[3]]
-                response_features.append(item_model.to_dict(**filter_kwargs))
+    def _feature_collection(
+        self,
+        request: Request,
+        rows: List[Any],
+        serializer: ItemSerializer,
+        links: List[PaginationLink],
+        limit: int,
+        count: Optional[int],
+    ) -> Dict[str, Any]:
+        """Serialize a page of items selected with `serializer.columns`."""
+        response_features = []
+        xvals = []
+        yvals = []
+        with timed(request, SERIALIZATION):
+            for row in rows:
+                xvals += [float(row.bbox[0]), float(row.bbox[2])]
+                yvals += [float(row.bbox[1]), float(row.bbox[3])]
+                response_features.append(serializer.serialize(row))
 
         try:
             bbox = (min(xvals), min(yvals), max(xvals), max(yvals))
@@ -396,8 +423,8 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
         context_obj = None
         if self.extension_is_enabled(ContextExtension):
             context_obj = {
-                "returned": len(page),
-                "limit": search_request.limit,
+                "returned": len(rows),
+                "limit": limit,
                 "matched": count,
             }
 
@@ -408,3 +435,57 @@ class CoreCrudClient(PaginationTokenClient, BaseCoreClient):
             "links": links,
             "bbox": bbox,
         }
+
+    def post_search(
+        self, search_request: SQLAlchemySTACSearch, **kwargs
+    ) -> Dict[str, Any]:
+        """POST search catalog."""
+        with self.session.reader.context_session() as session:
+            prepare_session(session, kwargs["request"])
+            token = (
+                self.decode_token(search_request.token)
+                if search_request.token
+                else False
+            )
+            filter_kwargs = self._search_projection(search_request)
+
+            # Only the projected fields are selected
+            serializer = ItemSerializer(
+                base_url=str(kwargs["request"].base_url),
+                include=filter_kwargs.get("include"),
+                exclude=filter_kwargs.get("exclude"),
+            )
+            query = self._filter_items(
+                session.query(*serializer.columns(self.item_table)), search_request
+            ).order_by(*self._search_order(search_request))
+
+            count = None
+            if self.extension_is_enabled(ContextExtension):
+                if search_request.ids:
+                    count = len(search_request.ids)
+                else:
+                    count = count_matched(
+                        query, self.count_cache, search_request.filter_key()
+                    )
+            page = get_page(query, per_page=search_request.limit, page=token)
+            # Create dynamic attributes for each page
+            page.next = (
+                self.encode_token(page.paging.bookmark_next)
+                if page.paging.has_next
+                else None
+            )
+            page.previous = (
+                self.encode_token(page.paging.bookmark_previous)
+                if page.paging.has_previous
+                else None
+            )
+
+            links = self._search_links(kwargs["request"], page.next, page.previous)
+            return self._feature_collection(
+                kwargs["request"],
+                list(page),
+                serializer,
+                links,
+                search_request.limit,
+                count,
+            )
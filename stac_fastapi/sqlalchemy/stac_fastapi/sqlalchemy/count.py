@@ -0,0 +1,54 @@
+"""Number of items matched by searches."""
+from typing import Hashable
+
+from sqlalchemy import func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from stac_fastapi.types.cache import TTLCache
+from stac_fastapi.types.config import CountStrategy, Settings
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a statement."""
+
+    def __init__(self, statement: ClauseElement):
+        """Explain a statement."""
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kwargs) -> str:
+    """Compile an `EXPLAIN (FORMAT JSON)` statement."""
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kwargs)
+
+
+def count_matched(query: Query, cache: TTLCache, key: Hashable) -> int:
+    """Get the number of items matched by a query, with the configured strategy.
+
+    Args:
+        query: the filtered query.
+        cache: counts cached with the `cached` strategy.
+        key: key of the count in the cache, equal for queries matching the same items.
+
+    Returns:
+        The number of matching items, which is approximate if estimated.
+    """
+    settings = Settings.get()
+    if settings.count_strategy == CountStrategy.cached:
+        count = cache.get(key)
+        if count is not None:
+            return count
+
+    statement = query.statement.order_by(None)
+    if settings.count_strategy == CountStrategy.estimated:
+        plan = query.session.execute(Explain(statement)).scalar()
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= settings.count_exact_threshold:
+            return estimate
+    count = query.session.execute(statement.with_only_columns([func.count()])).scalar()
+
+    if settings.count_strategy == CountStrategy.cached:
+        cache.set(key, count)
+    return count
@@ -19,21 +19,26 @@ BaseModel = declarative_base()
 
 
 class GeojsonGeometry(ga.Geometry):
-    """Custom geoalchemy type which returns GeoJSON."""
+    """Custom geoalchemy type which returns GeoJSON.
+
+    The geometry is encoded as GeoJSON by the database, with at most
+    `geometry_max_decimal_digits` decimal digits, so no geometry object is built.
+    """
 
     from_text = "ST_GeomFromGeoJSON"
 
+    def column_expression(self, col):
+        """Select the geometry as GeoJSON."""
+        return sa.func.ST_AsGeoJSON(
+            col, Settings.get().geometry_max_decimal_digits, type_=self
+        )
+
     def result_processor(self, dialect: str, coltype):
         """Override default processer to return GeoJSON."""
 
-        def process(value: Optional[bytes]):
+        def process(value: Optional[str]):
             if value is not None:
-                geom = ga.shape.to_shape(
-                    ga.elements.WKBElement(
-                        value, srid=self.srid, extended=self.extended
-                    )
-                )
-                return json.loads(json.dumps(geom.__geo_interface__))
+                return json.loads(value)
 
         return process
 
@@ -0,0 +1,176 @@
+"""Serialization of item rows to GeoJSON."""
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union
+from urllib.parse import urljoin
+
+import attr
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array
+from stac_pydantic.shared import DATETIME_RFC339
+
+from stac_fastapi.sqlalchemy.models import database
+from stac_fastapi.types.config import Settings
+from stac_fastapi.types.links import ItemLinks, filter_links
+from stac_fastapi.types.projection import FieldTree, as_field_tree, project
+
+# Substituted in the links rendered once per page
+COLLECTION_PLACEHOLDER = "__collection_id__"
+ITEM_PLACEHOLDER = "__item_id__"
+
+
+@attr.s
+class ItemSerializer:
+    """Serialize items selected as plain columns to GeoJSON dictionaries.
+
+    Rows are selected with `columns` so neither ORM objects nor pydantic models are
+    built, and the fields projection is compiled into the select list. The inferred
+    links are rendered once and the projection is applied again while each item is
+    assembled, for the nested fields the database doesn't trim. The output matches
+    `schemas.Item.from_orm(item).to_dict(**filter_kwargs)`.
+
+    Attributes:
+        base_url: base url of the links.
+        include: fields to include, as a pydantic include expression.
+        exclude: fields to exclude, as a pydantic exclude expression.
+    """
+
+    base_url: str = attr.ib()
+    include: Optional[Union[Set[str], FieldTree]] = attr.ib(default=None)
+    exclude: Optional[Union[Set[str], FieldTree]] = attr.ib(default=None)
+
+    def __attrs_post_init__(self):
+        """Render the inferred links."""
+        self._link_templates = [
+            json.loads(link.json(exclude_unset=True))
+            for link in ItemLinks(
+                collection_id=COLLECTION_PLACEHOLDER,
+                item_id=ITEM_PLACEHOLDER,
+                base_url=self.base_url,
+            ).create_links()
+        ]
+
+    def _field_projection(self, field: str) -> Optional[Tuple[Any, Any]]:
+        """Get the nested include and exclude expressions of a field.
+
+        Returns None if the field is not part of the output.
+        """
+        sub_include = sub_exclude = None
+        if self.include is not None:
+            include = as_field_tree(self.include)
+            if field not in include:
+                return None
+            if include[field] is not ...:
+                sub_include = as_field_tree(include[field])
+        if self.exclude:
+            exclude = as_field_tree(self.exclude)
+            if field in exclude:
+                if exclude[field] is ...:
+                    return None
+                sub_exclude = as_field_tree(exclude[field])
+        return sub_include, sub_exclude
+
+    @staticmethod
+    def _project_jsonb(
+        column: sa.Column, include: Optional[Dict], exclude: Optional[Dict]
+    ) -> sa.sql.ColumnElement:
+        """Select the projection of a jsonb column, so the rest isn't transferred."""
+        if include is not None:
+            keys = sorted(
+                key for key in include if (exclude or {}).get(key, None) is not ...
+            )
+            empty = sa.cast(sa.literal("{}"), JSONB)
+            if not keys:
+                return empty.label(column.key)
+            subset = (
+                sa.select(
+                    [
+                        sa.func.jsonb_object_agg(
+                            sa.literal_column("kv.key"), sa.literal_column("kv.value")
+                        )
+                    ]
+                )
+                .select_from(sa.func.jsonb_each(column).alias("kv"))
+                .where(
+                    sa.literal_column("kv.key")
+                    == sa.any_(sa.cast(array(keys), ARRAY(sa.Text)))
+                )
+                .as_scalar()
+            )
+            return sa.func.coalesce(subset, empty, type_=JSONB).label(column.key)
+        if exclude:
+            keys = sorted(key for key, value in exclude.items() if value is ...)
+            if keys:
+                return column.op("-", return_type=JSONB)(
+                    sa.cast(array(keys), ARRAY(sa.Text))
+                ).label(column.key)
+        return column
+
+    def columns(self, table: Type[database.Item]) -> List:
+        """Columns to select.
+
+        Fields left out by the projection aren't selected and only the projected
+        keys of `properties` and `assets` are, the ones needed to build the links and
+        to page are always selected.
+        """
+        columns = [table.id, table.collection_id, table.bbox]
+        for field, column in (
+            ("stac_version", table.stac_version),
+            ("stac_extensions", table.stac_extensions),
+            ("geometry", table.geometry),
+            ("properties", table.properties),
+            ("assets", table.assets),
+            ("links", table.links),
+        ):
+            projection = self._field_projection(field)
+            if projection is None:
+                continue
+            if field in ("properties", "assets"):
+                column = self._project_jsonb(column, *projection)
+            columns.append(column)
+        return columns + [
+            # Use getattr to accommodate extension namespaces
+            getattr(table, field.split(":")[-1])
+            for field in Settings.get().indexed_fields
+        ]
+
+    def links(self, row: Any) -> List[Dict]:
+        """Create the links of an item."""
+        links = [
+            dict(
+                link,
+                href=link["href"]
+                .replace(COLLECTION_PLACEHOLDER, row.collection_id)
+                .replace(ITEM_PLACEHOLDER, row.id),
+            )
+            for link in self._link_templates
+        ]
+        if getattr(row, "links", None):
+            links += [
+                dict(link, href=urljoin(self.base_url, link["href"]))
+                for link in filter_links(row.links)
+            ]
+        return links
+
+    def serialize(self, row: Any) -> Dict:
+        """Serialize a row selected with `columns`."""
+        properties = dict(getattr(row, "properties", None) or {})
+        for field in Settings.get().indexed_fields:
+            value = getattr(row, field.split(":")[-1])
+            if field == "datetime":
+                value = value.strftime(DATETIME_RFC339)
+            properties[field] = value
+        item = {
+            "type": "Feature",
+            "stac_version": getattr(row, "stac_version", None),
+            "stac_extensions": getattr(row, "stac_extensions", None),
+            "id": row.id,
+            "geometry": getattr(row, "geometry", None),
+            "bbox": [float(value) for value in row.bbox],
+            "properties": properties,
+            "assets": getattr(row, "assets", None),
+            "links": self.links(row),
+            "collection": row.collection_id,
+        }
+        if self.include is None and not self.exclude:
+            return item
+        return project(item, self.include, self.exclude)
@@ -1,23 +1,100 @@
 """database session management."""
 import logging
 import os
+import time
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Iterator
 
 import attr
 import psycopg2
 import sqlalchemy as sa
+from fastapi import FastAPI
 from fastapi_utils.session import FastAPISessionMaker as _FastAPISessionMaker
 from sqlalchemy.orm import Session as SqlSession
 
 from stac_fastapi.sqlalchemy.config import SqlalchemySettings
 from stac_fastapi.types import errors
+from stac_fastapi.types.metrics import Sample
+from stac_fastapi.types.timings import DB, POOL_WAIT, add_timing, timed
 
 logger = logging.getLogger(__name__)
 
+# `SET LOCAL` doesn't accept bind parameters
+STATEMENT_TIMEOUT_QUERY = sa.text(
+    "SELECT set_config('statement_timeout', :timeout, true)"
+)
+
+
+def set_statement_timeout(session: SqlSession, request: Any) -> None:
+    """Apply the statement timeout of the route being served to a session.
+
+    The timeout lasts until the end of the transaction, which is the whole session
+    with `context_session`.
+    """
+    timeout = getattr(getattr(request, "state", None), "statement_timeout", None)
+    if timeout:
+        session.execute(
+            STATEMENT_TIMEOUT_QUERY, {"timeout": str(round(timeout * 1000))}
+        )
+
+
+def prepare_session(session: SqlSession, request: Any) -> None:
+    """Check out the connection of a session serving a request.
+
+    The time spent waiting for the connection is added to the `pool_wait` timing of
+    the request, and the time spent running queries on it to the `db` timing until
+    it is returned to the pool. The statement timeout of the route is applied.
+    """
+    with timed(request, POOL_WAIT):
+        connection = session.connection()
+    connection.info["request"] = request
+    set_statement_timeout(session, request)
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    """Record the start of a query."""
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    """Add the duration of a query to the request the connection serves."""
+    start = conn.info.pop("query_start", None)
+    if start is not None:
+        add_timing(conn.info.get("request"), DB, time.perf_counter() - start)
+
+
+def _release_connection(dbapi_connection, connection_record):
+    """Forget the request served by a connection returned to the pool."""
+    connection_record.info.pop("request", None)
+
 
 class FastAPISessionMaker(_FastAPISessionMaker):
-    """FastAPISessionMaker."""
+    """FastAPISessionMaker.
+
+    Args:
+        database_uri: sqlalchemy database uri.
+        pool_size: number of connections kept open by the engine.
+        max_overflow: number of connections opened above `pool_size` under load.
+    """
+
+    def __init__(self, database_uri: str, pool_size: int = 5, max_overflow: int = 10):
+        """Init."""
+        super().__init__(database_uri)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+
+    def get_new_engine(self) -> sa.engine.Engine:
+        """Create an engine with the configured connection pool."""
+        engine = sa.create_engine(
+            self.database_uri,
+            pool_pre_ping=True,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+        )
+        sa.event.listen(engine, "before_cursor_execute", _start_query)
+        sa.event.listen(engine, "after_cursor_execute", _end_query)
+        sa.event.listen(engine, "checkin", _release_connection)
+        return engine
 
     @contextmanager
     def context_session(self) -> Iterator[SqlSession]:
@@ -29,6 +106,10 @@ class FastAPISessionMaker(_FastAPISessionMaker):
                 raise errors.ConflictError("resource already exists") from e
             elif isinstance(e.orig, psycopg2.errors.ForeignKeyViolation):
                 raise errors.ForeignKeyError("collection does not exist") from e
+            elif isinstance(e.orig, psycopg2.errors.QueryCanceled):
+                raise errors.QueryTimeoutError(
+                    "database query exceeded the statement timeout"
+                ) from e
             logger.error(e, exc_info=True)
             raise errors.DatabaseError("unhandled database error")
 
@@ -39,6 +120,8 @@ class Session:
 
     reader_conn_string: str = attr.ib()
     writer_conn_string: str = attr.ib()
+    pool_size: int = attr.ib(default=5)
+    max_overflow: int = attr.ib(default=10)
 
     @classmethod
     def create_from_env(cls):
@@ -54,9 +137,39 @@ class Session:
         return cls(
             reader_conn_string=settings.reader_connection_string,
             writer_conn_string=settings.writer_connection_string,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
         )
 
     def __attrs_post_init__(self):
         """Post init handler."""
-        self.reader: FastAPISessionMaker = FastAPISessionMaker(self.reader_conn_string)
-        self.writer: FastAPISessionMaker = FastAPISessionMaker(self.writer_conn_string)
+        self.reader: FastAPISessionMaker = FastAPISessionMaker(
+            self.reader_conn_string, self.pool_size, self.max_overflow
+        )
+        self.writer: FastAPISessionMaker = FastAPISessionMaker(
+            self.writer_conn_string, self.pool_size, self.max_overflow
+        )
+
+    def pool_metrics(self, app: FastAPI) -> Iterator[Sample]:
+        """Collect the size and use of the connection pools, for the metrics extension."""
+        for name, maker in (("reader", self.reader), ("writer", self.writer)):
+            pool = maker.cached_engine.pool
+            labels = {"pool": name}
+            yield Sample(
+                "stac_db_pool_size",
+                pool.checkedin() + pool.checkedout(),
+                labels,
+                help="Number of open connections of a pool.",
+            )
+            yield Sample(
+                "stac_db_pool_in_use",
+                pool.checkedout(),
+                labels,
+                help="Number of connections of a pool in use.",
+            )
+            yield Sample(
+                "stac_db_pool_max_size",
+                maker.pool_size + maker.max_overflow,
+                labels,
+                help="Maximum number of connections of a pool.",
+            )
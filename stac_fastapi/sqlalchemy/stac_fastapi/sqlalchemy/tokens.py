@@ -1,23 +1,98 @@
 """Pagination token client."""
 import abc
+import binascii
+import hashlib
+import hmac
 import logging
 import os
-from base64 import urlsafe_b64encode
-from typing import Type
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Optional, Type
 
 import attr
 from sqlalchemy.orm import Session as SqlSession
 
 from stac_fastapi.sqlalchemy.models import database
 from stac_fastapi.sqlalchemy.session import Session
-from stac_fastapi.types.errors import DatabaseError
+from stac_fastapi.types.config import Settings
+from stac_fastapi.types.errors import ConflictError, InvalidQueryParameter
 
 logger = logging.getLogger(__name__)
 
+# Number of bytes of the HMAC digest kept in the token
+SIGNATURE_SIZE = 12
+
+
+def _b64encode(value: bytes) -> str:
+    """Encode bytes as unpadded urlsafe base64."""
+    return urlsafe_b64encode(value).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    """Decode unpadded urlsafe base64."""
+    return urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _secret() -> Optional[str]:
+    """Get the key signing pagination tokens, if configured."""
+    return getattr(Settings.get(), "pagination_token_secret", None)
+
+
+def _sign(payload: bytes) -> bytes:
+    """Sign a token payload."""
+    key = _secret().encode()
+    return hmac.new(key, payload, hashlib.sha256).digest()[:SIGNATURE_SIZE]
+
+
+def new_token_id() -> str:
+    """Create the id of a token stored in the tokens table."""
+    # uid has collision chance of 1e-7 percent
+    return urlsafe_b64encode(os.urandom(6)).decode()
+
+
+def sign_keyset(keyset: str) -> Optional[str]:
+    """Create a self-contained token from a keyset.
+
+    Returns None if no secret is configured, the keyset is then stored in the tokens
+    table.
+    """
+    if not _secret():
+        return None
+    payload = keyset.encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def verify_token(token: str) -> Optional[str]:
+    """Retrieve the keyset of a self-contained token.
+
+    Returns None if the token is the id of a keyset stored in the tokens table.
+    """
+    secret = _secret()
+    payload, sep, signature = token.partition(".")
+    if sep and secret:
+        try:
+            keyset = _b64decode(payload)
+            valid = hmac.compare_digest(_b64decode(signature), _sign(keyset))
+        except (binascii.Error, ValueError):
+            valid = False
+        if valid:
+            return keyset.decode()
+    elif not sep and (
+        not secret or getattr(Settings.get(), "legacy_pagination_tokens", False)
+    ):
+        return None
+    raise InvalidQueryParameter(f"Invalid pagination token {token}")
+
 
 @attr.s
 class PaginationTokenClient(abc.ABC):
-    """Pagination token specific CRUD operations."""
+    """Pagination token specific CRUD operations.
+
+    With `pagination_token_secret` set, tokens are self-contained: the sqlakeyset
+    bookmark is encoded in the token and signed so clients can't page with arbitrary
+    keysets, and token ids issued by older releases are looked up in the tokens table
+    when `legacy_pagination_tokens` is enabled. Without a secret, bookmarks are stored
+    in the tokens table and tokens are their ids, so every worker can resolve them.
+    """
 
     session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
     token_table: Type[database.PaginationToken] = attr.ib(
@@ -32,24 +107,30 @@ class PaginationTokenClient(abc.ABC):
         """Lookup row by id."""
         ...
 
-    def insert_token(self, keyset: str, tries: int = 0) -> str:  # type:ignore
-        """Insert a keyset into the database."""
-        # uid has collision chance of 1e-7 percent
-        uid = urlsafe_b64encode(os.urandom(6)).decode()
-        with self.session.writer.context_session() as session:
-            try:
-                token = database.PaginationToken(id=uid, keyset=keyset)
-                session.add(token)
-                return uid
-            except DatabaseError:
-                # Try again if uid already exists in the database
-                # TODO: Explicitely check for ConflictError (if insert fails for other reasons it should be raised)
-                if tries > 5:
-                    raise
-                self.insert_token(keyset, tries=tries + 1)
+    def insert_token(self, keyset: str, tries: int = 0) -> str:
+        """Store a keyset in the tokens table, returning its id."""
+        uid = new_token_id()
+        try:
+            with self.session.writer.context_session() as session:
+                session.add(self.token_table(id=uid, keyset=keyset))
+        except ConflictError:
+            # Try again if uid already exists in the database
+            if tries >= 5:
+                raise
+            return self.insert_token(keyset, tries=tries + 1)
+        return uid
 
     def get_token(self, token_id: str) -> str:
-        """Retrieve a keyset from the database."""
+        """Retrieve a keyset from the tokens table."""
         with self.session.reader.context_session() as session:
             token = self._lookup_id(token_id, self.token_table, session)
             return token.keyset
+
+    def encode_token(self, keyset: str) -> str:
+        """Create a token from a keyset."""
+        return sign_keyset(keyset) or self.insert_token(keyset)
+
+    def decode_token(self, token: str) -> str:
+        """Retrieve the keyset from a token."""
+        keyset = verify_token(token)
+        return keyset if keyset is not None else self.get_token(token)
@@ -2,22 +2,78 @@
 
 import json
 import logging
-from typing import Dict, Optional, Type
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Type
 
 import attr
+import geoalchemy2 as ga
+import sqlalchemy as sa
+from psycopg2 import errors
+from pydantic.json import pydantic_encoder
+from shapely import wkb
+from shapely.geometry import shape
+from sqlalchemy.dialects.postgresql import JSONB
 
 # TODO: This import should come from `backend` module
 from stac_fastapi.extensions.third_party.bulk_transactions import (
     BaseBulkTransactionsClient,
+    BulkTransactionMethod,
 )
 from stac_fastapi.sqlalchemy.models import database, schemas
 from stac_fastapi.sqlalchemy.session import Session
 from stac_fastapi.types.core import BaseTransactionsClient
-from stac_fastapi.types.errors import NotFoundError
+from stac_fastapi.types.errors import (
+    ConflictError,
+    ForeignKeyError,
+    InvalidQueryParameter,
+    NotFoundError,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _copy_escape(value: str) -> str:
+    """Escape a field of the COPY text format."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _array_literal(values: List[Any]) -> str:
+    """Format a list as a PostgreSQL array literal."""
+    elements = (
+        "NULL"
+        if value is None
+        else '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+        for value in values
+    )
+    return "{" + ",".join(elements) + "}"
+
+
+class _IterStream:
+    """Read-only file-like object over an iterator of strings, as used by COPY."""
+
+    def __init__(self, lines: Iterator[str]):
+        """Stream the concatenation of lines."""
+        self._lines = lines
+        self._buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        """Read up to size characters, consuming the lines as needed."""
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += next(self._lines)
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
 @attr.s
 class TransactionsClient(BaseTransactionsClient):
     """Transactions extension specific CRUD operations."""
@@ -105,10 +161,18 @@ class TransactionsClient(BaseTransactionsClient):
 
 @attr.s
 class BulkTransactionsClient(BaseBulkTransactionsClient):
-    """Postgres bulk transactions."""
+    """Postgres bulk transactions.
+
+    Attributes:
+        use_copy: load items with COPY rather than with INSERT statements.
+        copy_chunk_size: number of items loaded per COPY transaction when no chunk
+            size is requested.
+    """
 
     session: Session = attr.ib(default=attr.Factory(Session.create_from_env))
     debug: bool = attr.ib(default=False)
+    use_copy: bool = attr.ib(default=True)
+    copy_chunk_size: int = attr.ib(default=10000)
 
     def __attrs_post_init__(self):
         """Create sqlalchemy engine."""
@@ -121,21 +185,76 @@ class BulkTransactionsClient(BaseBulkTransactionsClient):
         # TODO: dedup with GetterDict logic (ref #58)
         """
         item = item.dict(exclude_none=True)
-        item["geometry"] = json.dumps(item["geometry"])
         item["collection_id"] = item.pop("collection")
         item["datetime"] = item["properties"].pop("datetime")
         return item
 
+    @staticmethod
+    def _copy_row(item: Dict) -> str:
+        """Format a preprocessed item as a line of the COPY text format."""
+        fields = []
+        for column in database.Item.__table__.columns:
+            value = item.get(column.name)
+            if value is None:
+                fields.append("\\N")
+                continue
+            if isinstance(column.type, ga.Geometry):
+                # EWKB is loaded as is, without parsing GeoJSON in the database
+                value = wkb.dumps(shape(value), hex=True, srid=4326)
+            elif isinstance(column.type, JSONB):
+                value = json.dumps(value, default=pydantic_encoder)
+            elif isinstance(column.type, sa.ARRAY):
+                value = _array_literal(value)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            fields.append(_copy_escape(str(value)))
+        return "\t".join(fields) + "\n"
+
+    def _copy_items(self, items: List[Dict], chunk_size: int) -> None:
+        """Load preprocessed items with COPY, one transaction per chunk."""
+        columns = ", ".join(column.name for column in database.Item.__table__.columns)
+        table = database.Item.__table__.fullname
+        sql = f"COPY {table} ({columns}) FROM STDIN"
+
+        connection = self.engine.raw_connection()
+        try:
+            for chunk in self._chunks(items, chunk_size):
+                try:
+                    with connection.cursor() as cursor:
+                        rows = (self._copy_row(item) for item in chunk)
+                        cursor.copy_expert(sql, _IterStream(rows))
+                    connection.commit()
+                except errors.UniqueViolation as e:
+                    connection.rollback()
+                    raise ConflictError(str(e)) from e
+                except errors.ForeignKeyViolation as e:
+                    connection.rollback()
+                    raise ForeignKeyError(str(e)) from e
+                except Exception:
+                    connection.rollback()
+                    raise
+        finally:
+            connection.close()
+
     def bulk_item_insert(
         self, items: schemas.Items, chunk_size: Optional[int] = None, **kwargs
     ) -> str:
-        """Bulk item insertion using sqlalchemy core.
+        """Bulk item insertion.
 
-        https://docs.sqlalchemy.org/en/13/faq/performance.html#i-m-inserting-400-000-rows-with-the-orm-and-it-s-really-slow
+        Items are loaded with COPY when `use_copy` is set, otherwise using sqlalchemy
+        core: https://docs.sqlalchemy.org/en/13/faq/performance.html#i-m-inserting-400-000-rows-with-the-orm-and-it-s-really-slow
         """
+        if getattr(items, "method", None) == BulkTransactionMethod.UPSERT:
+            raise InvalidQueryParameter("Bulk upserts are not supported")
         # Use items.items because schemas.Items is a model with an items key
         processed_items = [self._preprocess_item(item) for item in items.items]
         return_msg = f"Successfully added {len(processed_items)} items."
+        if self.use_copy:
+            self._copy_items(processed_items, chunk_size or self.copy_chunk_size)
+            return return_msg
+
+        for item in processed_items:
+            item["geometry"] = json.dumps(item["geometry"])
         if chunk_size:
             for chunk in self._chunks(processed_items, chunk_size):
                 self.engine.execute(database.Item.__table__.insert(), chunk)
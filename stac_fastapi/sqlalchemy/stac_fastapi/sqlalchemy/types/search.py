@@ -3,6 +3,8 @@
 # TODO: replace with stac-pydantic
 """
 
+import hashlib
+import json
 import logging
 import operator
 from dataclasses import dataclass
@@ -18,6 +20,7 @@ from stac_pydantic.api.extensions.fields import FieldsExtension as FieldsBase
 from stac_pydantic.utils import AutoValueEnum
 
 from stac_fastapi.types.config import Settings
+from stac_fastapi.types.projection import add_default_includes, compile_fields
 
 logger = logging.getLogger("uvicorn")
 logger.setLevel(logging.INFO)
@@ -101,20 +104,11 @@ class FieldsExtension(FieldsBase):
     def _get_field_dict(fields: Optional[Set[str]]) -> Dict:
         """Pydantic include/excludes notation.
 
-        Internal method to create a dictionary for advanced include or exclude of pydantic fields on model export
+        Internal method to create a dictionary for advanced include or exclude of pydantic fields on model export,
+        from field paths of any depth.
         Ref: https://pydantic-docs.helpmanual.io/usage/exporting_models/#advanced-include-and-exclude
         """
-        field_dict = {}
-        for field in fields or []:
-            if "." in field:
-                parent, key = field.split(".")
-                if parent not in field_dict:
-                    field_dict[parent] = {key}
-                else:
-                    field_dict[parent].add(key)
-            else:
-                field_dict[field] = ...  # type:ignore
-        return field_dict
+        return compile_fields(fields)
 
     @property
     def filter_fields(self) -> Dict:
@@ -125,9 +119,11 @@ class FieldsExtension(FieldsBase):
         Ref: https://pydantic-docs.helpmanual.io/usage/exporting_models/#advanced-include-and-exclude
         """
         # Always include default_includes, even if they
-        # exist in the exclude list.
-        include = (self.include or set()) - (self.exclude or set())
-        include |= Settings.get().default_includes or set()
+        # exist in the exclude list, unless narrowed by a nested include.
+        include = add_default_includes(
+            (self.include or set()) - (self.exclude or set()),
+            Settings.get().default_includes or set(),
+        )
 
         return {
             "include": self._get_field_dict(include),
@@ -164,3 +160,29 @@ class SQLAlchemySTACSearch(Search):
                         SQLAlchemySTACSearch,
                     )
         return values
+
+    def filter_key(self) -> str:
+        """Hash of the normalized filters, equal for searches matching the same items.
+
+        Paging, sorting and fields are left out, so all the pages of a search share
+        the key.
+        """
+        normalized: Dict[str, Any] = {}
+        if self.collections:
+            normalized["collections"] = sorted(set(self.collections))
+        if self.ids:
+            normalized["ids"] = sorted(set(self.ids))
+        if self.bbox:
+            normalized["bbox"] = [float(coord) for coord in self.bbox]
+        if self.intersects:
+            normalized["intersects"] = self.intersects.dict()
+        if self.datetime:
+            normalized["datetime"] = self.datetime
+        if self.query:
+            normalized["query"] = {
+                field.value: {op.value: value for op, value in expr.items()}
+                for field, expr in self.query.items()
+            }
+        return hashlib.sha256(
+            json.dumps(normalized, sort_keys=True, default=str).encode()
+        ).hexdigest()
@@ -1,6 +1,19 @@
 from datetime import datetime, timedelta
 
 from stac_pydantic import Item
+from starlette.testclient import TestClient
+
+from stac_fastapi.api.app import StacApi
+from stac_fastapi.api.middleware import AdmissionController
+from stac_fastapi.extensions.third_party import MetricsExtension
+from stac_fastapi.sqlalchemy.config import SqlalchemySettings
+from stac_fastapi.sqlalchemy.core import CoreCrudClient
+from stac_fastapi.types.config import (
+    AdmissionLimits,
+    ApiSettings,
+    CountStrategy,
+    Settings,
+)
 
 from ..conftest import MockStarletteRequest
 
@@ -41,6 +54,79 @@ def test_transactions_router(api_client):
     assert not transaction_routes - api_routes
 
 
+def test_app_admission_control(db_session):
+    settings = SqlalchemySettings(
+        admission_control=True,
+        admission_limits={
+            "search": AdmissionLimits(
+                concurrency=0, queue_size=0, queue_timeout=1, retry_after=3
+            ),
+            "item": AdmissionLimits(concurrency=1, queue_size=0, queue_timeout=1),
+        },
+    )
+    api = StacApi(settings=settings, client=CoreCrudClient(session=db_session))
+
+    with TestClient(api.app) as client:
+        resp = client.get("/search")
+        assert resp.status_code == 429
+        assert resp.headers["Retry-After"] == "3"
+
+        resp = client.get("/conformance")
+        assert resp.status_code == 200
+        resp = client.get("/collections")
+        assert resp.status_code == 200
+
+    queues = api.app.state.admission.queues
+    assert queues["search"].rejected == 1
+    assert queues["item"].rejected == 0
+    assert queues["item"].in_flight == 0
+
+
+def test_app_admission_control_route_classes():
+    controller = AdmissionController(limits=ApiSettings().admission_limits)
+
+    def route_class(method, path):
+        return controller.route_class({"method": method, "path": path})
+
+    assert route_class("GET", "/search") == "search"
+    assert route_class("POST", "/search") == "search"
+    assert route_class("GET", "/collections/test/items") == "search"
+    assert route_class("POST", "/collections/test/items") == "write"
+    assert route_class("PUT", "/collections/test/items") == "write"
+    assert route_class("DELETE", "/collections/test/items/item") == "write"
+    assert route_class("GET", "/collections/test/items/item") == "item"
+    assert route_class("GET", "/_mgmt/ping") is None
+
+
+def test_app_metrics_extension(db_session):
+    client = CoreCrudClient(session=db_session)
+    api = StacApi(
+        settings=SqlalchemySettings(),
+        client=client,
+        extensions=[
+            MetricsExtension(collectors=[db_session.pool_metrics, client.cache_metrics])
+        ],
+    )
+
+    with TestClient(api.app) as test_client:
+        resp = test_client.get("/collections")
+        assert resp.status_code == 200
+        resp = test_client.get("/_mgmt/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    metrics = resp.text.splitlines()
+    labels = '{route="Get Collections",method="GET",status="200"}'
+    assert f"stac_request_duration_seconds_count{labels} 1" in metrics
+    assert f"stac_response_size_bytes_count{labels} 1" in metrics
+    for phase in ("pool_wait", "db", "serialization"):
+        assert (
+            f'stac_request_phase_seconds_count{{route="Get Collections",phase="{phase}"}} 1'
+            in metrics
+        )
+    assert 'stac_db_pool_max_size{pool="reader"} 15' in metrics
+
+
 def test_app_transaction_extension(app_client, load_test_data):
     item = load_test_data("test_item.json")
     resp = app_client.post(f"/collections/{item['collection']}/items", json=item)
@@ -58,6 +144,45 @@ def test_app_context_extension(load_test_data, app_client, postgres_transactions
     assert resp_json["context"]["returned"] == resp_json["context"]["matched"] == 1
 
 
+def test_app_context_extension_estimated_count(
+    load_test_data, app_client, postgres_transactions, monkeypatch
+):
+    monkeypatch.setattr(Settings.get(), "count_strategy", CountStrategy.estimated)
+    item = Item.parse_obj(load_test_data("test_item.json"))
+    postgres_transactions.create_item(item, request=MockStarletteRequest)
+
+    resp = app_client.get("/search", params={"collections": ["test-collection"]})
+    assert resp.status_code == 200
+    # Estimates under the threshold are replaced by exact counts
+    assert resp.json()["context"]["matched"] == 1
+
+
+def test_app_context_extension_cached_count(
+    load_test_data, app_client, postgres_transactions, monkeypatch
+):
+    monkeypatch.setattr(Settings.get(), "count_strategy", CountStrategy.cached)
+    test_item = load_test_data("test_item.json")
+    postgres_transactions.create_item(
+        Item.parse_obj(test_item), request=MockStarletteRequest
+    )
+
+    resp = app_client.get("/search", params={"collections": ["test-collection"]})
+    assert resp.status_code == 200
+    assert resp.json()["context"]["matched"] == 1
+
+    test_item["id"] = "test-item-2"
+    postgres_transactions.create_item(
+        Item.parse_obj(test_item), request=MockStarletteRequest
+    )
+
+    # The count is shared by all the pages of the search until it expires
+    resp = app_client.get(
+        "/search", params={"collections": ["test-collection"], "limit": 1}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["context"]["matched"] == 1
+
+
 def test_app_fields_extension(load_test_data, app_client, postgres_transactions):
     item = Item.parse_obj(load_test_data("test_item.json"))
     postgres_transactions.create_item(item, request=MockStarletteRequest)
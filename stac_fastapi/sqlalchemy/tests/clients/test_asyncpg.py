@@ -0,0 +1,146 @@
+import uuid
+from typing import Awaitable, Callable
+
+import anyio
+import pytest
+from stac_pydantic import Collection, Item
+from tests.conftest import MockStarletteRequest
+
+from stac_fastapi.extensions.core import ContextExtension
+from stac_fastapi.extensions.third_party.bulk_transactions import Items
+from stac_fastapi.sqlalchemy.aio.core import AsyncCoreCrudClient
+from stac_fastapi.sqlalchemy.aio.session import AsyncSession
+from stac_fastapi.sqlalchemy.aio.transactions import (
+    AsyncBulkTransactionsClient,
+    AsyncTransactionsClient,
+)
+from stac_fastapi.sqlalchemy.core import CoreCrudClient
+from stac_fastapi.sqlalchemy.types.search import SQLAlchemySTACSearch
+from stac_fastapi.types.errors import ConflictError, NotFoundError
+
+
+def run(session: AsyncSession, call: Callable[[], Awaitable]):
+    """Run a coroutine with the connection pools of a session open."""
+
+    async def main():
+        await session.connect()
+        try:
+            return await call()
+        finally:
+            await session.close()
+
+    return anyio.run(main)
+
+
+def test_async_crud(
+    async_session: AsyncSession,
+    postgres_core: CoreCrudClient,
+    load_test_data: Callable,
+):
+    core = AsyncCoreCrudClient(session=async_session)
+    transactions = AsyncTransactionsClient(session=async_session)
+    coll = Collection.parse_obj(load_test_data("test_collection.json"))
+    item = Item.parse_obj(load_test_data("test_item.json"))
+
+    async def crud():
+        await transactions.create_collection(coll, request=MockStarletteRequest)
+        await transactions.create_item(item, request=MockStarletteRequest)
+        with pytest.raises(ConflictError):
+            await transactions.create_item(item, request=MockStarletteRequest)
+
+        item.properties.gsd = 30
+        await transactions.update_item(item, request=MockStarletteRequest)
+        fetched = await core.get_item(item.id, coll.id, request=MockStarletteRequest)
+        collection = await core.get_collection(coll.id, request=MockStarletteRequest)
+
+        await transactions.delete_item(item.id, coll.id, request=MockStarletteRequest)
+        with pytest.raises(NotFoundError):
+            await core.get_item(item.id, coll.id, request=MockStarletteRequest)
+        return fetched, collection
+
+    fetched, collection = run(async_session, crud)
+    assert fetched["properties"]["gsd"] == 30
+    assert collection.id == coll.id
+    assert collection.dict(exclude={"links"}) == postgres_core.get_collection(
+        coll.id, request=MockStarletteRequest
+    ).dict(exclude={"links"})
+
+
+def test_async_search_pages(
+    async_session: AsyncSession,
+    postgres_core: CoreCrudClient,
+    postgres_transactions,
+    load_test_data: Callable,
+):
+    coll = Collection.parse_obj(load_test_data("test_collection.json"))
+    postgres_transactions.create_collection(coll, request=MockStarletteRequest)
+    item = load_test_data("test_item.json")
+    items = [Item.parse_obj(dict(item, id=str(uuid.uuid4()))) for _ in range(7)]
+
+    core = AsyncCoreCrudClient(session=async_session, extensions=[ContextExtension()])
+    bulk = AsyncBulkTransactionsClient(session=async_session)
+
+    async def pages():
+        await bulk.bulk_item_insert(Items(items=items), chunk_size=3)
+        forward = []
+        search = SQLAlchemySTACSearch(collections=[coll.id], limit=3)
+        while True:
+            page = await core.post_search(search, request=MockStarletteRequest)
+            forward.append(page)
+            next_links = [link for link in page["links"] if link.rel == "next"]
+            if not next_links:
+                break
+            search = SQLAlchemySTACSearch(
+                collections=[coll.id], limit=3, token=next_links[0].body["token"]
+            )
+        previous = [link for link in page["links"] if link.rel == "previous"]
+        search = SQLAlchemySTACSearch(
+            collections=[coll.id], limit=3, token=previous[0].body["token"]
+        )
+        backward = await core.post_search(search, request=MockStarletteRequest)
+        return forward, backward
+
+    forward, backward = run(async_session, pages)
+    ids = [feature["id"] for page in forward for feature in page["features"]]
+    assert sorted(ids) == sorted(item.id for item in items)
+    assert [len(page["features"]) for page in forward] == [3, 3, 1]
+    assert forward[0]["context"]["matched"] == 7
+    assert [feature["id"] for feature in backward["features"]] == [
+        feature["id"] for feature in forward[1]["features"]
+    ]
+
+    # The synchronous client pages the same way
+    sync = postgres_core.post_search(
+        SQLAlchemySTACSearch(collections=[coll.id], limit=3),
+        request=MockStarletteRequest,
+    )
+    assert [feature["id"] for feature in sync["features"]] == ids[:3]
+    token = [link for link in sync["links"] if link.rel == "next"][0].body["token"]
+    search = SQLAlchemySTACSearch(collections=[coll.id], limit=3, token=token)
+    page = run(
+        async_session,
+        lambda: core.post_search(search, request=MockStarletteRequest),
+    )
+    assert [feature["id"] for feature in page["features"]] == ids[3:6]
+
+
+def test_async_item_collection(
+    async_session: AsyncSession,
+    postgres_transactions,
+    load_test_data: Callable,
+):
+    coll = Collection.parse_obj(load_test_data("test_collection.json"))
+    postgres_transactions.create_collection(coll, request=MockStarletteRequest)
+    item = Item.parse_obj(load_test_data("test_item.json"))
+    for _ in range(5):
+        item.id = str(uuid.uuid4())
+        postgres_transactions.create_item(item, request=MockStarletteRequest)
+
+    core = AsyncCoreCrudClient(session=async_session)
+    fc = run(
+        async_session,
+        lambda: core.item_collection(coll.id, limit=4, request=MockStarletteRequest),
+    )
+    assert len(fc["features"]) == 4
+    assert all(feature["collection"] == coll.id for feature in fc["features"])
+    assert [link.rel for link in fc["links"]] == ["next"]
@@ -14,6 +14,7 @@ from stac_fastapi.extensions.core import (
     SortExtension,
     TransactionExtension,
 )
+from stac_fastapi.sqlalchemy.aio.session import AsyncSession
 from stac_fastapi.sqlalchemy.config import SqlalchemySettings
 from stac_fastapi.sqlalchemy.core import CoreCrudClient
 from stac_fastapi.sqlalchemy.models import database
@@ -79,6 +80,14 @@ def db_session() -> Session:
     )
 
 
+@pytest.fixture
+def async_session() -> AsyncSession:
+    return AsyncSession(
+        reader_conn_string=settings.reader_connection_string,
+        writer_conn_string=settings.writer_connection_string,
+    )
+
+
 @pytest.fixture
 def postgres_core(db_session):
     return CoreCrudClient(
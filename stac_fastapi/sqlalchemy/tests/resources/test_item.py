@@ -6,9 +6,11 @@ from datetime import datetime, timedelta
 from random import randint
 from urllib.parse import parse_qs, urlparse, urlsplit
 
-from shapely.geometry import Polygon
+from shapely.geometry import Polygon, shape
 from stac_pydantic.api.search import DATETIME_RFC339
 
+from stac_fastapi.types.config import Settings
+
 
 def test_create_and_delete_item(app_client, load_test_data):
     """Test creation and deletion of a single item (transactions extension)"""
@@ -208,6 +210,29 @@ def test_item_search_by_id_post(app_client, load_test_data):
     assert set([feat["id"] for feat in resp_json["features"]]) == set(ids)
 
 
+def test_item_search_matches_get_item(app_client, load_test_data):
+    """Test items serialized by search match the items of GET item (core)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    resp = app_client.get(
+        f"/collections/{test_item['collection']}/items/{test_item['id']}"
+    )
+    assert resp.status_code == 200
+    item = resp.json()
+
+    resp = app_client.post("/search", json={"ids": [test_item["id"]]})
+    assert resp.status_code == 200
+    feature = resp.json()["features"][0]
+    for key in ("id", "type", "bbox", "assets", "links"):
+        assert feature[key] == item[key]
+    assert feature["properties"]["datetime"] == item["properties"]["datetime"]
+    assert shape(feature["geometry"]).equals_exact(shape(item["geometry"]), 1e-9)
+
+
 def test_item_search_spatial_query_post(app_client, load_test_data):
     """Test POST search with spatial query (core)"""
     test_item = load_test_data("test_item.json")
@@ -615,6 +640,30 @@ def test_pagination_token_idempotent(app_client, load_test_data):
     ]
 
 
+def test_pagination_token_tampered(app_client, load_test_data, monkeypatch):
+    """Test that modified pagination tokens are rejected (paging extension)"""
+    monkeypatch.setattr(Settings.get(), "pagination_token_secret", "secret")
+    test_item = load_test_data("test_item.json")
+    ids = []
+    for idx in range(2):
+        uid = str(uuid.uuid4())
+        test_item["id"] = uid
+        resp = app_client.post(
+            f"/collections/{test_item['collection']}/items", json=test_item
+        )
+        assert resp.status_code == 200
+        ids.append(uid)
+
+    page = app_client.get("/search", params={"ids": ",".join(ids), "limit": 1})
+    next_link = list(filter(lambda l: l["rel"] == "next", page.json()["links"]))
+    params = parse_qs(urlparse(next_link[0]["href"]).query)
+
+    keyset, signature = params["token"][0].split(".")
+    params["token"] = f"{keyset}x.{signature}"
+    resp = app_client.get("/search", params=params)
+    assert resp.status_code == 400
+
+
 def test_field_extension_get(app_client, load_test_data):
     """Test GET search with included fields (fields extension)"""
     test_item = load_test_data("test_item.json")
@@ -689,6 +738,56 @@ def test_field_extension_exclude_default_includes(app_client, load_test_data):
     assert "geometry" not in resp_json["features"][0]
 
 
+def test_field_extension_exclude_assets(app_client, load_test_data):
+    """Test POST search excluding whole columns and jsonb keys (fields extension)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    body = {
+        "fields": {
+            "exclude": ["assets", "properties.eo:bands"],
+            "include": ["properties.gsd", "properties.eo:bands"],
+        }
+    }
+
+    resp = app_client.post("/search", json=body)
+    feature = resp.json()["features"][0]
+    assert "assets" not in feature
+    assert feature["properties"] == {
+        "gsd": test_item["properties"]["gsd"],
+        "datetime": test_item["properties"]["datetime"],
+    }
+    assert feature["bbox"] == test_item["bbox"]
+
+
+def test_field_extension_nested_paths(app_client, load_test_data):
+    """Test POST search with fields nested at any depth (fields extension)"""
+    test_item = load_test_data("test_item.json")
+    resp = app_client.post(
+        f"/collections/{test_item['collection']}/items", json=test_item
+    )
+    assert resp.status_code == 200
+
+    body = {
+        "fields": {
+            "include": ["assets.B1.href", "properties", "properties.gsd"],
+            "exclude": ["properties.eo:bands"],
+        }
+    }
+
+    resp = app_client.post("/search", json=body)
+    assert resp.status_code == 200
+    feature = resp.json()["features"][0]
+    assert feature["assets"] == {"B1": {"href": test_item["assets"]["B1"]["href"]}}
+    assert "eo:bands" not in feature["properties"]
+    assert (
+        feature["properties"]["landsat:row"] == test_item["properties"]["landsat:row"]
+    )
+
+
 def test_search_intersects_and_bbox(app_client):
     """Test POST search intersects and bbox are mutually exclusive (core)"""
     bbox = [-118, 34, -117, 35]
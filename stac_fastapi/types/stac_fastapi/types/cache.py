@@ -0,0 +1,242 @@
+"""stac_fastapi.types.cache module."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import attr
+
+
+@attr.s
+class TTLCache:
+    """In-process least recently used cache whose entries expire.
+
+    Entries are only ever invalidated by the process which holds the cache, other
+    workers serve their copy until it expires.
+
+    A value computed while the cache was invalidated may be stale, so callers read
+    `generation` before computing it and pass it to `set`, which then drops it if the
+    cache was invalidated in the meantime.
+
+    Attributes:
+        ttl: number of seconds an entry stays valid, caching is disabled when 0.
+        maxsize: maximum number of entries.
+        hits: number of lookups served from the cache.
+        misses: number of lookups not served from the cache.
+        generation: number of invalidations of the cache.
+    """
+
+    ttl: float = attr.ib(default=60)
+    maxsize: int = attr.ib(default=128)
+    hits: int = attr.ib(default=0, init=False)
+    misses: int = attr.ib(default=0, init=False)
+    generation: int = attr.ib(default=0, init=False)
+    _entries: OrderedDict = attr.ib(factory=OrderedDict, init=False, repr=False)
+    _lock: threading.Lock = attr.ib(factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def enabled(self) -> bool:
+        """Check if values are cached at all."""
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Get a value if it is cached and not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._discard(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Cache a value, evicting the least recently used entries if full.
+
+        The value isn't cached if `generation` is given and the cache was invalidated
+        since.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._outdated(generation):
+                return
+            self._insert(key, value)
+            self._evict()
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a value from the cache."""
+        with self._lock:
+            self.generation += 1
+            self._discard(key)
+
+    def clear(self) -> None:
+        """Remove all values from the cache."""
+        with self._lock:
+            self.generation += 1
+            for key in list(self._entries):
+                self._discard(key)
+
+    def _outdated(self, generation: Optional[int]) -> bool:
+        """Check if the cache was invalidated since a generation."""
+        return generation is not None and generation != self.generation
+
+    def _insert(self, key: Hashable, value: Any) -> None:
+        """Store a value as the most recently used entry."""
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def _discard(self, key: Hashable) -> None:
+        """Remove an entry."""
+        self._entries.pop(key, None)
+
+    def _full(self) -> bool:
+        """Check if entries need to be evicted."""
+        return len(self._entries) > self.maxsize
+
+    def _evict(self) -> None:
+        """Evict the least recently used entries until the cache isn't full."""
+        while self._entries and self._full():
+            self._discard(next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self._entries)
+
+
+@attr.s
+class ResponseCache(TTLCache):
+    """Cache of encoded responses bounded by their total size.
+
+    Responses are bytes by default, other values are cached with a `sizeof` giving
+    their size. Entries can be tagged, for instance with the collections they were read from, to
+    invalidate them together. Invalidating a tag also bumps `generation`.
+
+    Attributes:
+        maxbytes: maximum total size of the cached responses.
+        sizeof: size in bytes of a cached response.
+        nbytes: total size of the cached responses.
+    """
+
+    maxbytes: int = attr.ib(default=64 * 1024 * 1024)
+    sizeof: Callable[[Any], int] = attr.ib(default=len, repr=False)
+    nbytes: int = attr.ib(default=0, init=False)
+    _tags: Dict[Hashable, Set[Hashable]] = attr.ib(factory=dict, init=False, repr=False)
+    _entry_tags: Dict[Hashable, Tuple] = attr.ib(factory=dict, init=False, repr=False)
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Iterable[Hashable] = (),
+        generation: Optional[int] = None,
+    ) -> None:
+        """Cache a response, evicting the least recently used entries if full.
+
+        The response isn't cached if `generation` is given and the cache was
+        invalidated since.
+        """
+        size = self.sizeof(value)
+        if not self.enabled or size > self.maxbytes:
+            return
+        with self._lock:
+            if self._outdated(generation):
+                return
+            self._insert(key, value)
+            self.nbytes += size
+            self._entry_tags[key] = tuple(tags)
+            for tag in self._entry_tags[key]:
+                self._tags.setdefault(tag, set()).add(key)
+            self._evict()
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        """Remove all responses with a tag from the cache."""
+        with self._lock:
+            self.generation += 1
+            for key in list(self._tags.get(tag, ())):
+                self._discard(key)
+
+    def _discard(self, key: Hashable) -> None:
+        """Remove an entry and its tags."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.nbytes -= self.sizeof(entry[1])
+        for tag in self._entry_tags.pop(key, ()):
+            keys = self._tags[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def _full(self) -> bool:
+        """Check if entries need to be evicted."""
+        return super()._full() or self.nbytes > self.maxbytes
+
+
+@attr.s
+class SingleFlight:
+    """Share the result of concurrent identical calls.
+
+    The first caller of a key runs the call, callers of the same key arriving while it
+    is in flight await its result instead, or its exception. Nothing is kept once the
+    call completes. The call is shielded so it isn't cancelled with the caller which
+    started it while others wait for it, it is cancelled once all of them are.
+
+    Attributes:
+        hits: number of calls served by a call in flight.
+        misses: number of calls run.
+    """
+
+    hits: int = attr.ib(default=0, init=False)
+    misses: int = attr.ib(default=0, init=False)
+    _calls: Dict[Hashable, asyncio.Future] = attr.ib(
+        factory=dict, init=False, repr=False
+    )
+    _waiters: Dict[asyncio.Future, int] = attr.ib(factory=dict, init=False, repr=False)
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a call, or wait for the identical call in flight."""
+        future = self._calls.get(key)
+        if future is None or future.done():
+            self.misses += 1
+            future = self._calls[key] = asyncio.ensure_future(call())
+            future.add_done_callback(lambda done: self._complete(key, done))
+        else:
+            self.hits += 1
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._waiters[future] -= 1
+            if not self._waiters[future]:
+                del self._waiters[future]
+                # Forget the call right away, so later callers don't await it
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+                future.cancel()
+
+    def _complete(self, key: Hashable, future: asyncio.Future) -> None:
+        """Forget a completed call."""
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Retrieve the exception, which is never awaited if every caller is cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self) -> int:
+        """Return the number of calls in flight."""
+        return len(self._calls)
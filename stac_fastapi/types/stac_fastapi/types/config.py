@@ -1,7 +1,42 @@
 """stac_fastapi.types.config module."""
-from typing import Optional, Set
+from enum import Enum
+from typing import Dict, Optional, Set
 
-from pydantic import BaseSettings
+from pydantic import BaseModel, BaseSettings
+
+
+class CountStrategy(str, Enum):
+    """How the number of items matched by a search is computed.
+
+    Attributes:
+        exact: count the matching items on every request.
+        estimated: use the row estimate of the query planner, counting the matching
+            items only when the estimate is below `count_exact_threshold`.
+        cached: count the matching items and cache the count for `count_cache_ttl`
+            seconds, for all the pages of equivalent searches.
+    """
+
+    exact = "exact"
+    estimated = "estimated"
+    cached = "cached"
+
+
+class AdmissionLimits(BaseModel):
+    """Admission limits of a class of routes.
+
+    Attributes:
+        concurrency: maximum number of requests served at once.
+        queue_size: maximum number of requests waiting to be served, the next ones
+            are rejected with `429 Too Many Requests`.
+        queue_timeout: maximum number of seconds a request waits to be served, after
+            which it is rejected with `503 Service Unavailable`.
+        retry_after: seconds sent in the `Retry-After` header of rejected requests.
+    """
+
+    concurrency: int
+    queue_size: int
+    queue_timeout: float
+    retry_after: int = 1
 
 
 class ApiSettings(BaseSettings):
@@ -16,6 +51,25 @@ class ApiSettings(BaseSettings):
         indexed_fields:
             set of fields which are usually in `item.properties` but are indexed as distinct columns in
             the database.
+        count_strategy: how the number of items matched by a search, reported by the
+            context extension, is computed.
+        count_exact_threshold: estimated number of items under which the matching
+            items are counted with the `estimated` strategy.
+        count_cache_ttl: seconds counts are cached for with the `cached` strategy.
+        count_cache_maxsize: maximum number of cached counts.
+        statement_timeout: seconds after which the database queries of a request are
+            cancelled, no timeout if None.
+        statement_timeouts: statement timeouts of specific routes, keyed by the name
+            of the client method serving them (ex. `post_search`, `item_collection`).
+        disconnect_poll_interval: seconds between checks that the client of a request
+            is still connected, its database queries are cancelled when it isn't. 0
+            disables the checks.
+        admission_control: limit the number of requests served at once, rejecting
+            the ones which would wait too long.
+        admission_limits: admission limits of the `search`, `item` (reads) and
+            `write` classes of routes.
+        enable_metrics: serve the Prometheus metrics of the metrics extension at
+            `/_mgmt/metrics`.
     """
 
     # TODO: Remove `default_includes` attribute so we can use `pydantic.BaseSettings` instead
@@ -25,6 +79,24 @@ class ApiSettings(BaseSettings):
     app_port: int = 8000
     reload: bool = True
 
+    count_strategy: CountStrategy = CountStrategy.exact
+    count_exact_threshold: int = 10000
+    count_cache_ttl: float = 300
+    count_cache_maxsize: int = 1024
+
+    statement_timeout: Optional[float] = None
+    statement_timeouts: Dict[str, float] = {}
+    disconnect_poll_interval: float = 0.5
+
+    admission_control: bool = False
+    admission_limits: Dict[str, AdmissionLimits] = {
+        "search": AdmissionLimits(concurrency=8, queue_size=32, queue_timeout=2),
+        "item": AdmissionLimits(concurrency=32, queue_size=128, queue_timeout=1),
+        "write": AdmissionLimits(concurrency=4, queue_size=16, queue_timeout=5),
+    }
+
+    enable_metrics: bool = False
+
     class Config:
         """model config (https://pydantic-docs.helpmanual.io/usage/model_config/)."""
 
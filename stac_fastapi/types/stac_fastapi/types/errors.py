@@ -29,3 +29,21 @@ class DatabaseError(StacApiError):
     """Generic database errors."""
 
     pass
+
+
+class InvalidQueryParameter(StacApiError):
+    """Error for unknown or invalid query parameters."""
+
+    pass
+
+
+class QueryTimeoutError(StacApiError):
+    """Database query cancelled after exceeding the statement timeout."""
+
+    pass
+
+
+class ClientDisconnectedError(StacApiError):
+    """Request cancelled because the client disconnected."""
+
+    pass
@@ -0,0 +1,75 @@
+"""Samples of the metrics reported by the backends.
+
+Backends expose the state of their connection pools and caches as samples, read by
+the collectors they register with the metrics extension when the metrics are
+scraped.
+"""
+from typing import Callable, Dict, Iterable, Iterator, Union
+
+import attr
+from fastapi import FastAPI
+
+from stac_fastapi.types.cache import ResponseCache, SingleFlight, TTLCache
+
+
+@attr.s
+class Sample:
+    """Value of a metric, read when the metrics are scraped.
+
+    Attributes:
+        name: name of the metric.
+        value: value of the metric.
+        labels: labels of the value.
+        type: `gauge` or `counter`.
+        help: description of the metric.
+    """
+
+    name: str = attr.ib()
+    value: float = attr.ib()
+    labels: Dict[str, str] = attr.ib(factory=dict)
+    type: str = attr.ib(default="gauge")
+    help: str = attr.ib(default="")
+
+
+# Read samples of an application when its metrics are scraped
+Collector = Callable[[FastAPI], Iterable[Sample]]
+
+
+def cache_samples(name: str, cache: Union[TTLCache, SingleFlight]) -> Iterator[Sample]:
+    """Get the samples of the lookups of a cache."""
+    labels = {"cache": name}
+    yield Sample(
+        "stac_cache_hits_total",
+        cache.hits,
+        labels,
+        "counter",
+        "Lookups served from a cache, or calls served by an identical call in "
+        "flight.",
+    )
+    yield Sample(
+        "stac_cache_misses_total",
+        cache.misses,
+        labels,
+        "counter",
+        "Lookups not served from a cache, or calls run.",
+    )
+    lookups = cache.hits + cache.misses
+    yield Sample(
+        "stac_cache_hit_ratio",
+        cache.hits / lookups if lookups else 0,
+        labels,
+        help="Ratio of the lookups served from a cache since the process started.",
+    )
+    yield Sample(
+        "stac_cache_entries",
+        len(cache),
+        labels,
+        help="Number of entries of a cache, or of calls in flight.",
+    )
+    if isinstance(cache, ResponseCache):
+        yield Sample(
+            "stac_cache_bytes",
+            cache.nbytes,
+            labels,
+            help="Total size of the responses of a cache.",
+        )
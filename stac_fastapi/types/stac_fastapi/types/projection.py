@@ -0,0 +1,90 @@
+"""Fields projection.
+
+Include and exclude field paths (`id`, `properties.proj:epsg`, `assets.visual.href`)
+are compiled once per request into a tree, using the pydantic include/exclude
+notation, and the tree is applied to plain dictionaries.
+Ref: https://pydantic-docs.helpmanual.io/usage/exporting_models/#advanced-include-and-exclude
+"""
+from typing import Any, Dict, Iterable, Optional, Set, Union
+
+# Nested dictionary of field names, `...` selects the whole field
+FieldTree = Dict[str, Any]
+
+
+def compile_fields(fields: Optional[Iterable[str]]) -> FieldTree:
+    """Compile dotted field paths of any depth into a tree.
+
+    A path selects the whole field, so `properties` takes precedence over
+    `properties.gsd`.
+    """
+    tree: FieldTree = {}
+    for field in fields or []:
+        *parents, key = field.split(".")
+        node = tree
+        for parent in parents:
+            if node.get(parent) is ...:
+                break
+            node = node.setdefault(parent, {})
+        else:
+            node[key] = ...
+    return tree
+
+
+def add_default_includes(include: Set[str], defaults: Set[str]) -> Set[str]:
+    """Add the default includes to the fields to include.
+
+    A default isn't added when a nested path of it is included, so `assets.B1.href`
+    narrows the default `assets` instead of being overridden by it.
+    """
+    return include | {
+        default
+        for default in defaults
+        if not any(field.startswith(f"{default}.") for field in include)
+    }
+
+
+def as_field_tree(fields: Union[Set[str], FieldTree]) -> FieldTree:
+    """Normalize a set of field names or a tree to a tree."""
+    if isinstance(fields, dict):
+        return fields
+    return dict.fromkeys(fields, ...)
+
+
+def project(
+    value: Dict,
+    include: Optional[Union[Set[str], FieldTree]] = None,
+    exclude: Optional[Union[Set[str], FieldTree]] = None,
+) -> Dict:
+    """Apply include and exclude trees to a dictionary.
+
+    Follows `pydantic.BaseModel.dict`: nested trees apply to nested dictionaries and an
+    empty `include` keeps nothing.
+
+    Args:
+        value: the dictionary to project, which isn't modified.
+        include: fields to keep, all of them if None.
+        exclude: fields to remove.
+
+    Returns:
+        The projected dictionary.
+    """
+    include = as_field_tree(include) if include is not None else None
+    exclude = as_field_tree(exclude) if exclude is not None else None
+    projected = {}
+    for key, field_value in value.items():
+        sub_include = sub_exclude = None
+        if include is not None:
+            if key not in include:
+                continue
+            if include[key] is not ...:
+                sub_include = include[key]
+        if exclude is not None and key in exclude:
+            if exclude[key] is ...:
+                continue
+            sub_exclude = exclude[key]
+        if isinstance(field_value, dict) and (
+            sub_include is not None or sub_exclude is not None
+        ):
+            field_value = project(field_value, sub_include, sub_exclude)
+        projected[key] = field_value
+    return projected
@@ -14,6 +14,7 @@ from stac_pydantic.api.extensions.fields import FieldsExtension as FieldsBase
 from stac_pydantic.utils import AutoValueEnum
 
 from stac_fastapi.types.config import Settings
+from stac_fastapi.types.projection import add_default_includes, compile_fields
 
 # Be careful: https://github.com/samuelcolvin/pydantic/issues/1423#issuecomment-642797287
 NumType = Union[float, int]
@@ -55,20 +56,11 @@ class FieldsExtension(FieldsBase):
     def _get_field_dict(fields: Optional[Set[str]]) -> Dict:
         """Pydantic include/excludes notation.
 
-        Internal method to create a dictionary for advanced include or exclude of pydantic fields on model export
+        Internal method to create a dictionary for advanced include or exclude of pydantic fields on model export,
+        from field paths of any depth.
         Ref: https://pydantic-docs.helpmanual.io/usage/exporting_models/#advanced-include-and-exclude
         """
-        field_dict = {}
-        for field in fields or []:
-            if "." in field:
-                parent, key = field.split(".")
-                if parent not in field_dict:
-                    field_dict[parent] = {key}
-                else:
-                    field_dict[parent].add(key)
-            else:
-                field_dict[field] = ...  # type:ignore
-        return field_dict
+        return compile_fields(fields)
 
     @property
     def filter_fields(self) -> Dict:
@@ -79,9 +71,11 @@ class FieldsExtension(FieldsBase):
         Ref: https://pydantic-docs.helpmanual.io/usage/exporting_models/#advanced-include-and-exclude
         """
         # Always include default_includes, even if they
-        # exist in the exclude list.
-        include = (self.include or set()) - (self.exclude or set())
-        include |= Settings.get().default_includes or set()
+        # exist in the exclude list, unless narrowed by a nested include.
+        include = add_default_includes(
+            (self.include or set()) - (self.exclude or set()),
+            Settings.get().default_includes or set(),
+        )
 
         return {
             "include": self._get_field_dict(include),
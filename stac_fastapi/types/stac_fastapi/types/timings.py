@@ -0,0 +1,43 @@
+"""Time spent by requests in each phase of their handling.
+
+Backends time the phases of a request (waiting for a database connection, running
+queries, encoding the response) in `request.state.timings`, which the metrics
+extension reports once the response is sent.
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+# Phases of a request
+POOL_WAIT = "pool_wait"
+DB = "db"
+SERIALIZATION = "serialization"
+
+
+@contextmanager
+def timed(request: Any, phase: str) -> Iterator[None]:
+    """Add the time spent in a block to a phase of a request.
+
+    Nothing is recorded for calls made outside of a request.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(request, phase, time.perf_counter() - start)
+
+
+def add_timing(request: Any, phase: str, seconds: float) -> None:
+    """Add seconds to a phase of a request."""
+    state = getattr(request, "state", None)
+    if state is not None:
+        timings = get_timings(state)
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+def get_timings(state: Any) -> Dict[str, float]:
+    """Get the seconds spent in each phase of a request from its state."""
+    timings = getattr(state, "timings", None)
+    if timings is None:
+        timings = state.timings = {}
+    return timings